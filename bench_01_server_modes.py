@@ -0,0 +1,106 @@
+import argparse
+import json
+import socket
+import threading
+import time
+
+from canoe_proxy_tcp_server import CANoeProxyTcpServer
+
+'''
+Benchmark: threaded vs asyncio engine of CANoeProxyTcpServer.
+
+For every mode a server is started in-process on a free local port, then:
+  1. N idle connections are opened and the thread count of the process is measured.
+  2. Every connection sends the same command M times (request/response) and
+     the global command throughput is measured.
+
+Usage:
+  python bench_01_server_modes.py --config c:\\CANoeProxyService\\config.json --clients 50 --commands 200
+'''
+
+def free_port() -> int:
+  '''Get a free local TCP port'''
+  with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+    s.bind(('127.0.0.1', 0))
+    return s.getsockname()[1]
+
+def client_worker(port: int, command: str, commands: int, ready: threading.Barrier, latencies: list, errors: list):
+  '''Synthetic PLC: connect, wait all clients, send command M times'''
+  try:
+    with socket.create_connection(('127.0.0.1', port), timeout=30) as sock:
+      ready.wait()
+      for _ in range(commands):
+        t0 = time.perf_counter()
+        sock.sendall((command + '\n').encode('utf-8'))
+        if not sock.recv(1024):
+          raise ConnectionError('Server closed connection')
+        latencies.append(time.perf_counter() - t0)
+
+  except Exception as e:
+    errors.append(str(e))
+    ready.abort()
+
+def run_mode(config_path: str, mode: str, clients: int, commands: int, command: str) -> dict:
+  '''Run the benchmark for one engine'''
+  server = CANoeProxyTcpServer(config_path)
+  server.config.service.host = '127.0.0.1'
+  server.config.service.port = free_port()
+  server.config.service.mode = mode
+
+  thread = threading.Thread(target=server.start, daemon=True)
+  thread.start()
+  time.sleep(0.5) # Wait bind
+
+  base_threads = threading.active_count()
+  latencies, errors = [], []
+  ready = threading.Barrier(clients + 1)
+  workers = [
+    threading.Thread(target=client_worker, args=(server.config.service.port, command, commands, ready, latencies, errors), daemon=True)
+    for _ in range(clients)
+  ]
+  for w in workers:
+    w.start()
+
+  # All clients connected and idle
+  deadline = time.time() + 5.0
+  while len(server.clients) < clients and time.time() < deadline:
+    time.sleep(0.05)
+  connected = len(server.clients)
+  idle_threads = threading.active_count() - base_threads - clients # Exclude client threads
+
+  t0 = time.perf_counter()
+  ready.wait()
+  for w in workers:
+    w.join()
+  elapsed = time.perf_counter() - t0
+
+  server.stop()
+  latencies.sort()
+  total = len(latencies)
+
+  return {
+    'mode': mode,
+    'clients': clients,
+    'connected': connected,
+    'server_threads_for_clients': idle_threads,
+    'commands': total,
+    'errors': len(errors),
+    'elapsed_s': round(elapsed, 3),
+    'throughput_cmd_s': round(total / elapsed, 1) if elapsed > 0 else 0.0,
+    'p50_ms': round(latencies[total // 2] * 1000, 3) if total else None,
+    'p99_ms': round(latencies[min(total - 1, int(total * 0.99))] * 1000, 3) if total else None,
+  }
+
+def main():
+  parser = argparse.ArgumentParser(description='Benchmark threaded vs asyncio server modes')
+  parser.add_argument('--config', default=r'c:\CANoeProxyService\config.json', help='Config file')
+  parser.add_argument('--clients', type=int, default=50, help='Concurrent connections')
+  parser.add_argument('--commands', type=int, default=200, help='Commands per connection')
+  parser.add_argument('--command', default='help', help='Command to send (help, status, ...)')
+  args = parser.parse_args()
+
+  results = [run_mode(args.config, mode, args.clients, args.commands, args.command) for mode in ('threaded', 'asyncio')]
+  print(json.dumps(results, indent=2))
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,67 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from bench_01_server_modes import run_mode
+
+'''
+Benchmark: command latency with DEBUG logging on/off and with/without the log queue.
+
+Every variant runs in its own process (logging is configured once per process) with a
+copy of the config file: log level, log > queueSize and a temporary log file.
+Clients send the same command and throughput and p50/p99 latency are measured
+(see bench_01_server_modes.py).
+
+Usage:
+  python bench_02_logging.py --config c:\\CANoeProxyService\\config.json --clients 20 --commands 500
+'''
+
+def run_variant(config_path: str, level: str, queue_size: int, args) -> dict:
+  '''Run one variant in a child process'''
+  with open(config_path, 'r', encoding='utf-8') as f:
+    config = json.load(f)
+
+  with tempfile.TemporaryDirectory() as tmp:
+    config['log'].update(level=level, queueSize=queue_size, printToConsole=False, filePath=os.path.join(tmp, 'bench.log'))
+    variant_path = os.path.join(tmp, 'config.json')
+
+    with open(variant_path, 'w', encoding='utf-8') as f:
+      json.dump(config, f)
+
+    output = subprocess.check_output([
+      sys.executable, __file__, '--run', variant_path, '--mode', args.mode,
+      '--clients', str(args.clients), '--commands', str(args.commands), '--command', args.command
+    ])
+
+  result = json.loads(output)
+  result.update(level=level, queue=queue_size)
+  return result
+
+def main():
+  parser = argparse.ArgumentParser(description='Benchmark command latency with DEBUG logging on/off')
+  parser.add_argument('--config', default=r'c:\CANoeProxyService\config.json', help='Config file')
+  parser.add_argument('--mode', default='threaded', help='Server engine: threaded | asyncio')
+  parser.add_argument('--clients', type=int, default=20, help='Concurrent connections')
+  parser.add_argument('--commands', type=int, default=500, help='Commands per connection')
+  parser.add_argument('--command', default='status', help='Command to send (help, status, ...)')
+  parser.add_argument('--queue', type=int, default=10000, help='log > queueSize of the queued variants')
+  parser.add_argument('--run', help=argparse.SUPPRESS) # Child process: config of one variant
+  args = parser.parse_args()
+
+  # Child process: one variant
+  if args.run:
+    print(json.dumps(run_mode(args.run, args.mode, args.clients, args.commands, args.command)))
+    return
+
+  results = [
+    run_variant(args.config, level, queue_size, args)
+    for queue_size in (0, args.queue)
+    for level in ('INFO', 'DEBUG')
+  ]
+  print(json.dumps(results, indent=2))
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,331 @@
+import argparse
+import json
+import os
+import random
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+import psutil
+
+from canoe_proxy_tcp_server import CANoeProxyTcpServer
+from bench_01_server_modes import free_port
+
+'''
+Benchmark: load generation against CANoeProxyTcpServer with the simulated CANoe backend.
+
+The server runs in-process with a copy of the config file (backend sim, simulator
+timeScale, log to a temporary file). N synthetic PLC clients send a weighted mix of
+commands for a fixed time, optionally DCU commands answered by a fake CAPL server
+(every cfg points to it, on a free local port).
+
+Command mixes (--mix preset or weights, e.g. "status=80,start=10,close=5,unknown=5"):
+  polling: status-heavy polling of a running cfg
+  churn:   start/close of every cfg between status polls
+  mixed:   polling with some start/close, help and unknown commands
+  dcu:     status polls and DCU commands through the service (needs --capl)
+
+Report (JSON): throughput, latency p50/p95/p99/max and response codes per command,
+transport errors, error responses (8xxx, 8FFF of unknown commands is expected), threads of
+the process without the client threads (all clients connected, peak) and peak RSS
+of the process (server and clients, sampled).
+With --baseline a previous report is compared and the exit code is 1 on regression.
+
+Usage:
+  python bench_03_load.py --config c:\\CANoeProxyService\\config.json --clients 20 --duration 10 --mix mixed
+  python bench_03_load.py --mix dcu --capl --output build_a.json
+  python bench_03_load.py --mix dcu --capl --baseline build_a.json --tolerance 0.2
+'''
+
+MIXES = {
+  'polling': {'status': 90, 'help': 5, 'unknown': 5},
+  'churn': {'status': 50, 'start': 25, 'close': 25},
+  'mixed': {'status': 70, 'start': 10, 'close': 5, 'help': 10, 'unknown': 5},
+  'dcu': {'status': 40, 'Read_info': 45, 'Window_control': 10, 'DLK_IOControl': 5},
+}
+
+# Responses of the fake CAPL server, {target} = DCU selected with Read_info
+CAPL_RESPONSES = {
+  'Read_info': 'SW01.02,HW03.04,SN{serial}',
+  'Window_control': 'Action_type {arg} {target} OK',
+  'DLK_IOControl': 'DLK_IOControl {arg} {target} OK',
+}
+
+##############################################################
+# Fake CAPL server
+##############################################################
+class FakeCaplServer:
+  """Answers DCU commands like Nodes/Server_Socket.can after latency seconds
+  """
+
+  def __init__(self, latency: float = 0.005):
+    self.latency = latency
+    self.requests = 0
+    self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    self.sock.bind(('127.0.0.1', 0))
+    self.sock.listen(8)
+    self.port = self.sock.getsockname()[1]
+    threading.Thread(target=self._accept, daemon=True).start()
+
+  def _accept(self):
+    while True:
+      try:
+        conn, _ = self.sock.accept()
+      except OSError:
+        return
+      threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+  def _serve(self, conn: socket.socket):
+    target = 'NONE'
+    with conn:
+      while data := conn.recv(4096):
+        name, _, arg = data.decode('utf-8', errors='replace').strip().partition(' ')
+        if name == 'Read_info':
+          target = arg
+        time.sleep(self.latency)
+        self.requests += 1
+        text = CAPL_RESPONSES.get(name, 'Set_target ERROR Invalid Command').format(arg=arg, target=target, serial=self.requests)
+        conn.sendall((text + '\r\n').encode('utf-8'))
+
+  def close(self):
+    self.sock.close()
+
+##############################################################
+# Synthetic PLC clients
+##############################################################
+def parse_mix(mix: str) -> dict[str, int]:
+  '''Preset name or "command=weight,..."'''
+  if mix in MIXES:
+    return MIXES[mix]
+  return {name.strip(): int(weight) for name, weight in (item.split('=') for item in mix.split(','))}
+
+def expand(kind: str, rng: random.Random, cfg_ids: list[str], dcu_type: str) -> str:
+  '''Command line of one command kind'''
+  if kind == 'start':
+    return f'start {rng.choice(cfg_ids)}'
+  if kind == 'unknown':
+    return 'random text as command'
+  if kind == 'Read_info':
+    return f'{kind} {dcu_type}'
+  if kind in ('Window_control', 'DLK_IOControl'):
+    return f'{kind} {rng.choice(["UP", "DOWN", "STOP"] if kind == "Window_control" else ["LOCK", "UNLOCK"])}'
+  return kind
+
+def client_worker(port: int, mix: dict[str, int], seed: int, deadline: list[float], cfg_ids: list[str], dcu_type: str,
+                  ready: threading.Barrier, samples: list, errors: list):
+  '''Synthetic PLC: weighted random commands until deadline[0] (set when every client is ready), one at a time'''
+  rng = random.Random(seed)
+  kinds, weights = list(mix), list(mix.values())
+
+  try:
+    with socket.create_connection(('127.0.0.1', port), timeout=60) as sock:
+      ready.wait()
+      buffer = b''
+
+      while time.perf_counter() < deadline[0]:
+        kind = rng.choices(kinds, weights)[0]
+        t0 = time.perf_counter()
+        sock.sendall((expand(kind, rng, cfg_ids, dcu_type) + '\n').encode('utf-8'))
+
+        while b'\n' not in buffer:
+          data = sock.recv(4096)
+          if not data:
+            raise ConnectionError('Server closed connection')
+          buffer += data
+
+        line, buffer = buffer.split(b'\n', 1)
+        response = line.decode('utf-8', errors='replace')
+        code = response[:4] if len(response) > 4 and response[4] == ',' else 'raw'
+        samples.append((kind, code, time.perf_counter() - t0))
+
+  except threading.BrokenBarrierError:
+    pass
+  except Exception as e:
+    errors.append(str(e))
+    ready.abort()
+
+##############################################################
+# Benchmark
+##############################################################
+def write_config(config_path: str, tmp: str, args, capl: FakeCaplServer | None) -> str:
+  '''Copy of the config for the simulated backend'''
+  with open(config_path, 'r', encoding='utf-8') as f:
+    config = json.load(f)
+
+  config['service'].update(mode=args.mode, metricsPort=0)
+  config['log'].update(level=args.log_level, printToConsole=False, filePath=os.path.join(tmp, 'bench.log'))
+  config['log'].setdefault('requestLog', {})['enabled'] = False
+  config['canOe']['backend'] = 'sim'
+  config['canOe'].setdefault('simulator', {}).update(timeScale=args.time_scale, seed=args.seed)
+
+  if capl is not None:
+    for cfg in config['canOe']['cfgs']:
+      cfg.update(host='127.0.0.1', port=capl.port)
+
+  variant_path = os.path.join(tmp, 'config.json')
+  with open(variant_path, 'w', encoding='utf-8') as f:
+    json.dump(config, f)
+  return variant_path
+
+def percentile(values: list[float], q: float) -> float:
+  return values[min(len(values) - 1, int(len(values) * q))]
+
+def summarize(samples: list) -> dict:
+  '''Latency (ms) and response codes per command kind'''
+  by_kind: dict[str, dict] = {}
+
+  for kind, code, seconds in samples:
+    entry = by_kind.setdefault(kind, {'latencies': [], 'codes': {}})
+    entry['latencies'].append(seconds)
+    entry['codes'][code] = entry['codes'].get(code, 0) + 1
+
+  result = {}
+  for kind, entry in sorted(by_kind.items()):
+    latencies = sorted(entry['latencies'])
+    result[kind] = {
+      'count': len(latencies),
+      'p50_ms': round(percentile(latencies, 0.50) * 1000, 3),
+      'p95_ms': round(percentile(latencies, 0.95) * 1000, 3),
+      'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+      'max_ms': round(latencies[-1] * 1000, 3),
+      'codes': entry['codes'],
+    }
+  return result
+
+def run_load(args) -> dict:
+  '''Start server (and fake CAPL server), run the clients, return the report'''
+  mix = parse_mix(args.mix)
+  process = psutil.Process()
+  capl = FakeCaplServer(args.capl_latency) if args.capl else None
+
+  with tempfile.TemporaryDirectory() as tmp:
+    server = CANoeProxyTcpServer(write_config(args.config, tmp, args, capl))
+    server.config.service.host = '127.0.0.1'
+    server.config.service.port = free_port()
+    threading.Thread(target=server.start, daemon=True).start()
+    time.sleep(0.5) # Wait bind
+
+    cfg_ids = [cfg.id for cfg in server.config.canOe.cfgs]
+    server.execute_command('bench', f'start {cfg_ids[0]}') # DCU commands need a running cfg
+
+    samples, errors = [], []
+    deadline = [0.0]
+    ready = threading.Barrier(args.clients + 1, action=lambda: deadline.__setitem__(0, time.perf_counter() + args.duration))
+    workers = [
+      threading.Thread(target=client_worker, daemon=True, args=(
+        server.config.service.port, mix, args.seed + index, deadline, cfg_ids, args.dcu_type, ready, samples, errors))
+      for index in range(args.clients)
+    ]
+    for worker in workers:
+      worker.start()
+
+    # All clients connected and idle
+    wait_until = time.perf_counter() + 5.0
+    while len(server.clients) < args.clients and time.perf_counter() < wait_until:
+      time.sleep(0.01)
+
+    # Threads of the process without the client threads
+    threads = {'connected': threading.active_count() - len(workers), 'peak': 0}
+    rss = {'peak': 0}
+
+    def sample_resources():
+      threads['peak'] = max(threads['peak'], threading.active_count() - len(workers))
+      rss['peak'] = max(rss['peak'], process.memory_info().rss)
+
+    sample_resources()
+    t0 = time.perf_counter()
+    ready.wait()
+
+    while any(worker.is_alive() for worker in workers):
+      sample_resources()
+      time.sleep(args.sample_interval)
+    elapsed = time.perf_counter() - t0
+
+    server.stop()
+    if capl is not None:
+      capl.close()
+
+  error_responses = sum(
+    1 for kind, code, _ in samples
+    if code.startswith('8') and not (kind == 'unknown' and code == '8FFF')
+  )
+
+  return {
+    'mode': args.mode,
+    'mix': mix,
+    'clients': args.clients,
+    'duration_s': round(elapsed, 3),
+    'commands': len(samples),
+    'throughput_cmd_s': round(len(samples) / elapsed, 1) if elapsed > 0 else 0.0,
+    'p50_ms': round(percentile(sorted(s[2] for s in samples), 0.50) * 1000, 3) if samples else None,
+    'p99_ms': round(percentile(sorted(s[2] for s in samples), 0.99) * 1000, 3) if samples else None,
+    'transport_errors': len(errors),
+    'error_responses': error_responses,
+    'error_rate': round((len(errors) + error_responses) / max(1, len(samples)), 4),
+    'threads_connected': threads['connected'],
+    'threads_peak': threads['peak'],
+    'rss_peak_mb': round(rss['peak'] / 1048576, 1),
+    'capl_requests': capl.requests if capl else None,
+    'commands_by_kind': summarize(samples),
+  }
+
+def compare(report: dict, baseline: dict, tolerance: float) -> list[str]:
+  '''Regressions of report against baseline (relative tolerance)'''
+  regressions = []
+
+  if report['throughput_cmd_s'] < baseline['throughput_cmd_s'] * (1 - tolerance):
+    regressions.append(f"throughput {baseline['throughput_cmd_s']} -> {report['throughput_cmd_s']} cmd/s")
+
+  for key in ('p50_ms', 'p99_ms', 'rss_peak_mb', 'threads_peak'):
+    if baseline.get(key) and report.get(key) and report[key] > baseline[key] * (1 + tolerance):
+      regressions.append(f'{key} {baseline[key]} -> {report[key]}')
+
+  if report['error_rate'] > baseline['error_rate'] + tolerance / 100:
+    regressions.append(f"error_rate {baseline['error_rate']} -> {report['error_rate']}")
+
+  return regressions
+
+def main():
+  parser = argparse.ArgumentParser(description='Load benchmark of the proxy service with the simulated backend')
+  parser.add_argument('--config', default=r'c:\CANoeProxyService\config.json', help='Config file')
+  parser.add_argument('--mode', default='threaded', help='Server engine: threaded | asyncio')
+  parser.add_argument('--clients', type=int, default=20, help='Concurrent connections')
+  parser.add_argument('--duration', type=float, default=10.0, help='Seconds of load')
+  parser.add_argument('--mix', default='mixed', help=f'Preset ({", ".join(MIXES)}) or weights "status=80,start=10,..."')
+  parser.add_argument('--capl', action='store_true', help='Fake CAPL server for the DCU commands')
+  parser.add_argument('--capl-latency', type=float, default=0.005, help='Fake CAPL response time (s)')
+  parser.add_argument('--dcu-type', default='DMFL_MMA', help='DCU type of Read_info')
+  parser.add_argument('--time-scale', type=float, default=0.01, help='Simulator timeScale (1.0 = real CANoe latencies)')
+  parser.add_argument('--log-level', default='INFO', help='Log level of the server')
+  parser.add_argument('--seed', type=int, default=1, help='Random seed of clients and simulator')
+  parser.add_argument('--sample-interval', type=float, default=0.25, help='Seconds between thread/RSS samples')
+  parser.add_argument('--output', help='Write the report to this file')
+  parser.add_argument('--baseline', help='Report of a previous build to compare with')
+  parser.add_argument('--tolerance', type=float, default=0.2, help='Relative regression tolerance')
+  args = parser.parse_args()
+
+  report = run_load(args)
+  print(json.dumps(report, indent=2))
+
+  if args.output:
+    with open(args.output, 'w', encoding='utf-8') as f:
+      json.dump(report, f, indent=2)
+
+  if args.baseline:
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+      baseline = json.load(f)
+
+    if (baseline['mix'], baseline['clients'], baseline['mode']) != (report['mix'], report['clients'], report['mode']):
+      print('WARNING: baseline was run with other mix, clients or mode', file=sys.stderr)
+
+    regressions = compare(report, baseline, args.tolerance)
+
+    for regression in regressions:
+      print(f'REGRESSION: {regression}', file=sys.stderr)
+    sys.exit(1 if regressions else 0)
+
+if __name__ == '__main__':
+  main()
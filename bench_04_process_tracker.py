@@ -0,0 +1,102 @@
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+
+import psutil
+
+from modules.util.process_util import count_running_processes, get_running_processes, ProcessTracker
+
+'''
+Benchmark: process table scans (count_running_processes, get_running_processes) vs
+ProcessTracker (one scan, then PID liveness and create time checks).
+
+Linux only: a synthetic process table is built with N filler processes (sleep) and
+one target process, a copy of sleep named like the CANoe executable. For every table
+size the functions are called M times (scan on every call) and the
+mean and p99 time per call are measured.
+The tracker is also checked to find a restarted target (new PID) on the next call.
+
+Usage:
+  python bench_04_process_tracker.py --tables 0,200,500 --calls 200
+'''
+
+def spawn(path: str, count: int) -> list[subprocess.Popen]:
+  '''Start count idle processes of path'''
+  return [subprocess.Popen([path, '3600'], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL) for _ in range(count)]
+
+def stop(processes: list[subprocess.Popen]):
+  for process in processes:
+    process.kill()
+  for process in processes:
+    process.wait()
+
+def measure(fn, calls: int) -> dict:
+  '''Mean and p99 time (us) of fn()'''
+  times = []
+  for _ in range(calls):
+    t0 = time.perf_counter()
+    fn()
+    times.append(time.perf_counter() - t0)
+
+  times.sort()
+  return {
+    'mean_us': round(sum(times) / calls * 1e6, 1),
+    'p99_us': round(times[min(calls - 1, int(calls * 0.99))] * 1e6, 1),
+  }
+
+def run_table(target_path: str, name: str, fillers: int, calls: int, verify_interval: float) -> dict:
+  '''Benchmark with fillers extra processes and one target'''
+  filler_processes = spawn(shutil.which('sleep'), fillers)
+  target = spawn(target_path, 1)
+
+  try:
+    tracker = ProcessTracker(name, verify_interval)
+    expected = [target[0].pid]
+    assert get_running_processes(name) == expected and tracker.pids() == expected
+
+    result = {
+      'processes': len(psutil.pids()),
+      'fillers': fillers,
+      'count_running_processes': measure(lambda: count_running_processes(name), calls),
+      'get_running_processes': measure(lambda: get_running_processes(name), calls),
+      'tracker_pids': measure(tracker.pids, calls),
+    }
+    result['speedup'] = round(result['get_running_processes']['mean_us'] / result['tracker_pids']['mean_us'], 1)
+
+    # Target restarted: dead PID is detected and the table is scanned again
+    scans = tracker.scans
+    stop(target)
+    target = spawn(target_path, 1)
+    result['restart_detected'] = tracker.pids() == [target[0].pid] and tracker.scans == scans + 1
+    result['tracker_scans'] = tracker.scans
+    result['tracker_checks'] = tracker.checks
+    return result
+
+  finally:
+    stop(target + filler_processes)
+
+def main():
+  parser = argparse.ArgumentParser(description='Benchmark process table scans vs ProcessTracker')
+  parser.add_argument('--tables', default='0,200,500', help='Filler processes of every synthetic table')
+  parser.add_argument('--calls', type=int, default=200, help='Calls per function')
+  parser.add_argument('--name', default='CANoe64.exe', help='Name of the target process')
+  parser.add_argument('--verify-interval', type=float, default=5.0, help='ProcessTracker verify_interval')
+  args = parser.parse_args()
+
+  with tempfile.TemporaryDirectory() as tmp:
+    target_path = os.path.join(tmp, args.name)
+    shutil.copy(shutil.which('sleep'), target_path)
+
+    results = [
+      run_table(target_path, args.name, int(fillers), args.calls, args.verify_interval)
+      for fillers in args.tables.split(',')
+    ]
+
+  print(json.dumps(results, indent=2))
+
+if __name__ == '__main__':
+  main()
@@ -49,7 +49,7 @@ class CANoeProxyService(win32serviceutil.ServiceFramework):
     # User
     servicemanager.LogWarningMsg('Service is stopping... (closing server socket)')
     try:
-      self.server.server_socket.close()
+      self.server.stop()
       servicemanager.LogInfoMsg('Server socket closed successfully!')
       
     except Exception as e:
@@ -1,21 +1,41 @@
-# System libraries
-import os
 # Datetime libraries
 from datetime import datetime
 import time
 # Communication libraries
 import socket
 import threading
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 # Logging libraries
 import logging
 import logging.handlers
 # User modules
 from modules.util.file_util import check_file
 from modules.models.config_model import ConfigModel
-from modules.util.process_util import *
 from modules.util.string_util import *
-from modules.vector_canoe import *
-from modules.models.canoe_model import CanOeCfgModel
+from modules.util.line_framer import LineFramer
+from modules.util.log_queue import start_queue_logging
+from modules.util.jsonl_writer import JsonlWriter
+from modules.command_registry import registry, RESPONSE_UNKNOWN_COMMAND
+from modules.canoe_state_monitor import CanoeStateMonitor
+from modules.execution_coordinator import ExecutionCoordinator
+from modules.job_table import JobTable
+from modules.watch_hub import WatchHub
+from modules.capl_proxy import CaplProxy
+from modules.response_cache import ResponseCache
+from modules.request_context import RequestContext, new_request, end_request, add_call_observer, remove_call_observer
+from modules.metrics import Metrics, MetricsHttpServer
+from modules.phase_timings import PhaseTimings
+from modules.backends.canoe_backend import create_backend
+# Command modules (register their commands when imported)
+import modules.commands.service_commands
+import modules.commands.job_commands
+import modules.commands.watch_commands
+import modules.commands.dcu_commands
+import modules.commands.cache_commands
+import modules.commands.macro_commands
+import modules.commands.metrics_commands
+from modules.commands.service_commands import start_cfg
 
 ##############################################################
 # Class to handle TCP Server and Process (Apps)
@@ -29,18 +49,68 @@ class CANoeProxyTcpServer:
     # Init system variables
     self.config = None
     self.logger = None
+    self.log_handler = None # Queue handler (log > queueSize > 0)
+    self.log_listener = None # Log writer thread
     
     # Setup
     self.setup_config(config_path)
     self.setup_logger()
+    self.request_log: JsonlWriter | None = self.setup_request_log()
 
     # Define server config
     self.server_socket: socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
     self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1) # 1 enables SO_REUSEADDR
     self.clients = {}
+    self.senders = {} # Thread-safe send(text) of every client, for pushed lines
+    self.isRunning = False
+    self.commands = registry # Command table
+    
+    # CANoe backend (canOe > backend: com | sim)
+    self.backend = create_backend(self.config.canOe)
+    
+    # Serialize start/close, identical requests in flight share one operation
+    self.coordinator = ExecutionCoordinator()
+    
+    # Background jobs (start {cfg_id} async)
+    self.jobs = JobTable(max_jobs=self.config.service.maxJobs)
+    
+    # CANoe state snapshot for status
+    self.monitor = CanoeStateMonitor(
+      read_state=self.backend.read_state,
+      interval=self.config.service.statusInterval
+    )
+    
+    # Push state changes to watching clients (watch)
+    self.watch = WatchHub(self.config.canOe.exe, terminator='') # Senders frame the pushed lines
+    self.monitor.add_listener(self.watch.publish)
+    
+    # One upstream connection per cfg CAPL server, shared by every client
+    self.proxy = CaplProxy(
+      self.config.canOe,
+      timeout=self.config.service.dcuTimeout,
+      drain=self.config.service.dcuDrain
+    )
+    
+    # Read_info responses per (cfg_id, dcu_type), flushed on every CANoe state change,
+    # the entry of a DCU is removed when another one is selected in CAPL
+    self.dcu_cache = ResponseCache(ttl=self.config.service.dcuCacheTtl)
+    self.proxy.add_target_listener(lambda cfg_id, previous, target: self.dcu_cache.invalidate((cfg_id, previous)))
+    self.monitor.add_listener(lambda state: self.dcu_cache.flush())
+    self.monitor.add_listener(lambda state: self.proxy.reset_targets())
+    
+    # Metrics (metrics command, HTTP endpoint on service > metricsPort)
+    self.metrics = self.setup_metrics()
+    self.metrics_http: MetricsHttpServer | None = None
+    self.timings = PhaseTimings() # Start phases per cfg_id (timings command)
+    
+    # Asyncio engine
+    self.loop: asyncio.AbstractEventLoop | None = None
+    self.async_server: asyncio.AbstractServer | None = None
+    self.executor: ThreadPoolExecutor | None = None
+    self.serial_executor: ThreadPoolExecutor | None = None
       
   def start (self):
-    """Start TCP Server
+    """Start TCP Server with the engine selected in config (service > mode)
     """
     # host = 0.0.0.0 listen all networks
     # host = 127.0.0.1 listen local connection
@@ -49,8 +119,71 @@ class CANoeProxyTcpServer:
     self.server_socket.bind((self.config.service.host, self.config.service.port))
     self.server_socket.listen(5) # Listen until 5 clients
     self.isRunning = True
-    self.log_info(f'TCP Server is listening on {self.config.service.host}:{self.config.service.port}')
+    self.monitor.start()
+    
+    if self.config.service.metricsPort > 0:
+      self.metrics_http = MetricsHttpServer(self.metrics, self.config.service.metricsPort)
+      self.metrics_http.start()
+    
+    self.start_warmup()
+    
+    self.log_info(f'TCP Server is listening on {self.config.service.host}:{self.config.service.port} (mode: {self.config.service.mode})')
+    
+    if self.config.service.mode == 'asyncio':
+      self.start_asyncio()
+    else:
+      self.start_threaded()
+  
+  def start_warmup (self):
+    """Warm standby (config.json > warmup): launch CANoe and load the default cfg in background.
+    Runs as a job ("job {id}"), a start of the same cfg_id received meanwhile joins it and
+    other start/close commands wait for it.
+    """
+    warmup = self.config.warmup
+    
+    if not warmup.enabled:
+      return
     
+    cfg = self.config.canOe.get_cfg_by_id(warmup.cfgId)
+    if cfg is None:
+      self.log_error(f'Warmup: unknown cfg_id: {warmup.cfgId}')
+      return
+    
+    def run(progress):
+      response = start_cfg(self, cfg, progress, start=warmup.startMeasurement)
+      self.log_info(f'Warmup {cfg.id}: {response}')
+      return response
+    
+    job = self.jobs.submit(f'warmup {cfg.id}', run)
+    self.log_info(f'Warmup {cfg.id} started (job {job.id}, start measurement: {warmup.startMeasurement})')
+  
+  def stop (self):
+    """Stop TCP Server, valid for both engines
+    """
+    self.isRunning = False
+    self.monitor.stop()
+    self.watch.stop()
+    self.proxy.stop()
+    self.jobs.shutdown()
+    self.backend.shutdown()
+    remove_call_observer(self.metrics.observe_call)
+    
+    if self.metrics_http is not None:
+      self.metrics_http.stop()
+    
+    # Asyncio engine: close server from its own loop
+    if self.loop is not None and self.async_server is not None:
+      self.loop.call_soon_threadsafe(self.async_server.close)
+    
+    self.server_socket.close()
+    
+    if self.request_log is not None:
+      self.request_log.close()
+    self.flush_logger()
+  
+  def start_threaded (self):
+    """Threaded engine: one daemon thread per client
+    """
     try:
       while self.isRunning:
         client_socket, client_address = self.server_socket.accept()
@@ -59,183 +192,278 @@ class CANoeProxyTcpServer:
         thread.start()
     
     except Exception as e:
-      self.log_error(f'TCP Server error in start loop: {e}')
+      if self.isRunning:
+        self.log_error(f'TCP Server error in start loop: {e}')
     finally:
       self.server_socket.close()
+  
+  def start_asyncio (self):
+    """Asyncio engine: every client in one event loop, blocking work in bounded executors
+    """
+    try:
+      asyncio.run(self.serve_asyncio())
     
-  def client_handler (self, client_socket, client_address):
-    """Handle client connection in an isolated thread
+    except Exception as e:
+      if self.isRunning:
+        self.log_error(f'TCP Server error in asyncio loop: {e}')
+    finally:
+      self.server_socket.close()
+  
+  async def serve_asyncio (self):
+    """Serve clients until the server is closed
     """
-        
+    self.loop = asyncio.get_running_loop()
+    self.executor = ThreadPoolExecutor(
+      max_workers=max(1, self.config.service.workers),
+      thread_name_prefix='CANoeProxyWorker'
+    )
+    # start/close wait for each other in the execution coordinator: own threads,
+    # queued or joined operations never hold the workers of the other commands
+    self.serial_executor = ThreadPoolExecutor(
+      max_workers=max(1, self.config.service.serialWorkers),
+      thread_name_prefix='CANoeProxySerial'
+    )
+    
+    try:
+      self.server_socket.setblocking(False)
+      self.async_server = await asyncio.start_server(self.async_client_handler, sock=self.server_socket)
+      
+      async with self.async_server:
+        await self.async_server.serve_forever()
+    
+    except asyncio.CancelledError:
+      pass # Server closed by stop()
+    finally:
+      self.executor.shutdown(wait=False)
+      self.serial_executor.shutdown(wait=False)
+      self.async_server = None
+      self.loop = None
+  
+  async def async_client_handler (self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    """Handle client connection as a coroutine of the event loop
+    """
+    client_address = writer.get_extra_info('peername')
     client_id = f'{client_address[0]}:{client_address[1]}' # Get client id
-    self.clients[client_id] = client_socket # Add socket to client
+    self.clients[client_id] = writer # Add writer to client
+    
+    async def push(data: bytes):
+      writer.write(data)
+      await writer.drain() # Bounded write buffer: wait while the client does not read
+    
+    # Pushed lines from other threads, wait until written. Framed like the last command:
+    # no terminator while the client sends packets without terminator
+    push_terminator = ''
+    self.senders[client_id] = lambda text: asyncio.run_coroutine_threadsafe(push((text + push_terminator).encode('utf-8')), self.loop).result()
     self.log_info(f'Client[{client_id}] connected from {client_address[0]}:{client_address[1]}')
     
+    framer = LineFramer() # One command per packet until the client sends a terminator, then lines
+    frame_timeout = self.config.service.frameTimeout
+    
     try:
       while True:
-        # Receive command from PLC
-        received_data = client_socket.recv(1024).decode('utf-8')
-        args = clear_spaeces(received_data).split(' ')
-        args_nr= len(args) - 1
-        command = args[0]
-        self.log_info(f'Client[{client_id}] received command: {command}')
-                
-        # Raw disconnection
-        if not command:
-          self.log_info(f'Client[{client_id}] command: No command, disconnecting') # Log
-          break # Exit loop
-        
-        
-        
-        
+        # Receive commands from PLC, wait a short time for the rest of a partial command
+        try:
+          data = await asyncio.wait_for(
+            reader.read(len(framer.writable())),
+            frame_timeout if framer.pending and frame_timeout > 0 else None
+          )
         
-        # Get CANoe application status
-        elif command == 'status': # No parameters
-          # PLC command: status
-          # Service response:
-          # 0000,{cfg_id} {cfg_file} measurement running
-          # 7000,{canoe_exe} closed
-          # 7001,No cfg file loaded
-          # 7002,{cfg_file} waiting to start measurement
-          # 8000,Too many open {canoe_exe} instances
-                
-          # Count processes
-          count = count_running_processes(self.config.canOe.exe)
-          
-          # Check status
-          if count < 1:
-            response = f'7000,{self.config.canOe.exe} closed'
-            client_socket.send(response.encode('utf-8'))
-            self.log_info(f'Client[{client_id}] response: {response}')
-            continue
+        except asyncio.TimeoutError:
+          commands = [(framer.flush(), '')] # Command without terminator
         
-          if count > 1:
-            response = f'8000,Too many open {self.config.canOe.exe} instances'
-            client_socket.send(response.encode('utf-8'))
-            self.log_info(f'Client[{client_id}] response: {response}')
-            continue
+        else:
+          # Raw disconnection
+          if not data:
+            self.execute_command(client_id, '')
+            break
           
-          # Read cfg path
-          cfg_path = some_cfg_loaded(self.config.canOe.exe)
-            
-          if cfg_path is None:
-            response = f'7001,No cfg file loaded' 
-            client_socket.send(response.encode('utf-8'))
-            self.log_info(f'Client[{client_id}] response: {response}')
-            continue
+          framer.feed(data)
+          commands = list(framer.frames())
           
-          # Read cfg id
-          cfg_id = self.config.canOe.get_cfg_id_by_path(cfg_path)
-            
-          if cfg_id is None:
-            cfg_id = '???'
-            
-          if is_measurement_running(self.config.canOe.exe):
-            response = f'0000,{cfg_id} {cfg_path} measurement running'
-            
-          else:
-            response = f'7002,{cfg_id} {cfg_path} waiting to start measurement'
+          if framer.pending and frame_timeout <= 0:
+            commands.append((framer.flush(), ''))
+        
+        # Answer pipelined commands in order
+        received = time.perf_counter()
+        for command, terminator in commands:
+          push_terminator = terminator
+          response = await self.execute_async(client_id, command, received)
           
-          # Send response
-          client_socket.send(response.encode('utf-8'))
-          self.log_info(f'Client[{client_id}] response: {response}')
-          continue
+          if response is None:
+            return
           
+          writer.write((response + terminator).encode('utf-8'))
         
+        await writer.drain()
+        self.watch.activate(client_id) # Pushes after the watch response
+    
+    except Exception as e:
+      self.log_error(f'Client[{client_id}] error: {e}')
+    
+    finally:
+      self.watch.unsubscribe(client_id)
+      writer.close()
+      del self.senders[client_id]
+      del self.clients[client_id]
+      self.log_info(f'Client[{client_id}] disconnected!')
+    
+  async def execute_async (self, client_id: str, received_data: str, received: float | None = None) -> str | None:
+    """Execute one command from the event loop, see execute_command.
+    Non-blocking commands (snapshot status, help, counters) are answered on the loop,
+    start/close run in the serial executor and the other commands (COM, psutil,
+    CAPL upstream) in the worker executor.
+    """
+    executor = self.select_executor(received_data)
+    
+    if executor is None:
+      return self.execute_command(client_id, received_data, received)
+    
+    return await self.loop.run_in_executor(executor, self.execute_command, client_id, received_data, received)
+  
+  def select_executor (self, received_data: str) -> ThreadPoolExecutor | None:
+    """Executor of a command in the asyncio engine, None = answer on the event loop
+    """
+    args = clear_spaeces(received_data).split(' ')
+    spec = self.commands.get(args[0])
+    
+    # Unknown command, raw disconnection or command that never blocks
+    if spec is None or not spec.blocks(self, args[1:]):
+      return None
+    
+    return self.serial_executor if spec.serialized else self.executor
+    
+  def client_handler (self, client_socket, client_address):
+    """Handle client connection in an isolated thread
+    """
         
+    client_id = f'{client_address[0]}:{client_address[1]}' # Get client id
+    self.clients[client_id] = client_socket # Add socket to client
+    send_lock = threading.Lock() # Responses and pushed lines do not interleave
+    
+    def send(text: str):
+      with send_lock:
+        client_socket.sendall(text.encode('utf-8'))
+    
+    # Pushed lines framed like the last command: no terminator while the client sends
+    # packets without terminator
+    push_terminator = ''
+    self.senders[client_id] = lambda text: send(text + push_terminator)
+    self.log_info(f'Client[{client_id}] connected from {client_address[0]}:{client_address[1]}')
+    
+    framer = LineFramer() # One command per packet until the client sends a terminator, then lines
+    frame_timeout = self.config.service.frameTimeout
+    
+    try:
+      while True:
+        # Receive commands from PLC, wait a short time for the rest of a partial command
+        client_socket.settimeout(frame_timeout if framer.pending and frame_timeout > 0 else None)
         
+        try:
+          size = client_socket.recv_into(framer.writable())
         
+        except socket.timeout:
+          commands = [(framer.flush(), '')] # Command without terminator
         
-        # Start CANoe application
-        elif command == 'start': # parameters: cfg_id
-          # PLC command: start {cfg_id}
-          # Service response: 
-          # 0000,{cfg_id} {cfg_file} measurement running
-          # 8100,Missing parameters
-          # 8101,Too many parameters
-          # 8102,Unknown cfg_id: {cfg_id}
-          # 8110,{cfg_id} Impossible to start measurement, file: {cfg_path}
-          # 8111,{cfg_id} Some error when opening file {cfg_path}
-          
-          # No arguments
-          if args_nr < 1:
-            response = '8100,Missing parameters'
-            client_socket.send(response.encode('utf-8'))
-            self.log_info(f'Client[{client_id}] response: {response}')
-            continue
-        
-          # Too many arguments
-          if args_nr > 1:
-            response = '8101,Too many parameters'
-            client_socket.send(response.encode('utf-8'))
-            self.log_info(f'Client[{client_id}] response: {response}')
-            continue
-        
-          # Cfg_id argument
-          cfg_id = args[1] # Get cfg_id
-          cfg: CanOeCfgModel = self.config.canOe.get_cfg_by_id(cfg_id)
-          
-          if cfg is None:
-            response = f'8102,Unknown cfg_id: {cfg_id}'
-            client_socket.send(response.encode('utf-8'))
-            self.log_info(f'Client[{client_id}] response: {response}')
-            continue
+        else:
+          # Raw disconnection
+          if size == 0:
+            self.execute_command(client_id, '')
+            break
           
-          # Start application
-          response = start_measurement(cfg_id, cfg.path, self.config.canOe.exe, True)
-          client_socket.send(response.encode('utf-8'))
-          self.log_info(f'Client[{client_id}] response: {response}')
-          continue
+          framer.commit(size)
+          commands = list(framer.frames())
           
+          if framer.pending and frame_timeout <= 0:
+            commands.append((framer.flush(), ''))
         
-        
-        
-        elif command == 'close': # No parameters
-          # PLC command: close
-          # Service response:
-          # 0000,{canoe.exe} closed!
-          # 8200,Impossible to close {canoe_exe}. Force manually!
+        # Answer pipelined commands in order
+        received = time.perf_counter()
+        for command, terminator in commands:
+          push_terminator = terminator
+          response = self.execute_command(client_id, command, received)
           
-          if kill_process(self.config.canOe.exe):
-            response = f'0000,{self.config.canOe.exe} closed!'
+          if response is None:
+            return
           
-          else:
-            response = f'8200,Impossible to close {self.config.canOe.exe}. Force manually!'
-          
-          client_socket.send(response.encode('utf-8'))
-          self.log_info(f'Client[{client_id}] response: {response}')
-          continue
-        
-        
+          send(response + terminator)
         
-        
-        
-        elif command == 'help': # No parameters
-          # PLC command: help
-          # Service response:
-          # 0000,Available commands: status, start {cfg_id}, close, help
-          
-          response = '0000,Available commands: status, start {cfg_id}, close, help'
-          client_socket.send(response.encode('utf-8'))
-          self.log_info(f'Client[{client_id}] response: {response}')
-          continue
-          
-        # Unknown command                
-        else:
-          # 80FF,Error: Unknown command
-          response = '8FFF,Unknown command'
-          client_socket.send(response.encode('utf-8'))
-          self.log_warning(f'Client[{client_id}] response: {response}')
-          continue
+        self.watch.activate(client_id) # Pushes after the watch response
         
     except Exception as e:
       self.log_error(f'Client[{client_id}] error: {e}')
     
     finally:
+      self.watch.unsubscribe(client_id)
       client_socket.close()
+      del self.senders[client_id]
       del self.clients[client_id]
       self.log_info(f'Client[{client_id}] disconnected!')
 
+  def execute_command (self, client_id: str, received_data: str, received: float | None = None) -> str | None:
+    """Execute one command and return its response, shared by both engines
+    Args:
+      client_id (str): Client id used in log messages
+      received_data (str): One command line, without terminator
+      received (float | None): perf_counter when the command was received, for the queue wait time
+    Returns:
+      str | None: Response to send, None when client must be disconnected
+    """
+    args = clear_spaeces(received_data).split(' ')
+    command = args[0]
+    
+    # Raw disconnection
+    if not command:
+      self.log_info(f'Client[{client_id}] received command: {command}')
+      self.log_info(f'Client[{client_id}] command: No command, disconnecting') # Log
+      return None
+    
+    request = new_request(client_id, command, args[1:], received)
+    self.log_info(f'Client[{client_id}] #{request.id} received command: {command}')
+    response = None
+    spec = self.commands.get(command)
+    
+    try:
+      # Unknown command
+      if spec is None:
+        response = RESPONSE_UNKNOWN_COMMAND
+        self.log_warning(f'Client[{client_id}] #{request.id} response: {response}')
+        return response
+      
+      # Registered command
+      response = spec.execute(self, client_id, args[1:])
+      self.log_info(f'Client[{client_id}] #{request.id} response: {response}')
+      return response
+    
+    finally:
+      end_request(request, response)
+      self.metrics.observe_request(request, command if spec is not None else 'unknown')
+      self.write_request_log(request)
+  
+  def write_request_log (self, request: RequestContext):
+    """Write one record of the structured request log (log > requestLog)
+    """
+    if self.request_log is None:
+      return
+    
+    self.request_log.write({
+      'ts': datetime.now().isoformat(timespec='milliseconds'),
+      'id': request.id,
+      'client': request.client_id,
+      'command': request.command,
+      'args': request.args,
+      'code': request.code,
+      'wait_ms': round(request.wait * 1000, 3),
+      'exec_ms': round(request.elapsed * 1000, 3),
+      'calls': [
+        {'kind': call.kind, 'name': call.name, 'ms': round(call.seconds * 1000, 3)}
+        for call in request.calls
+      ],
+      'phases': [
+        {'name': span.name, 'at_ms': round(span.offset * 1000, 3), 'ms': round(span.seconds * 1000, 3)}
+        for span in sorted(request.spans, key=lambda span: span.offset)
+      ]
+    })
+
   def setup_config(self, config_path: str):
     """Load configuration from file
     """
@@ -265,6 +493,19 @@ class CANoeProxyTcpServer:
         backupCount=self.config.log.maxFiles
       ))
       
+      # Optional: write log messages in a background thread (bounded queue)
+      if self.config.log.queueSize > 0:
+        formatter = logging.Formatter(self.config.log.format)
+        for handler in log_handlers:
+          handler.setFormatter(formatter)
+        
+        self.log_handler, self.log_listener = start_queue_logging(
+          log_handlers,
+          self.config.log.queueSize,
+          logging.getLevelName(self.config.log.queueBlockLevel)
+        )
+        log_handlers = [self.log_handler]
+      
       # Set log configuration
       logging.basicConfig(
         level = self.config.log.level,
@@ -287,6 +528,57 @@ class CANoeProxyTcpServer:
         ]
       )
   
+  def setup_metrics(self) -> Metrics:
+    """Metrics with the gauges of the service
+    """
+    metrics = Metrics()
+    add_call_observer(metrics.observe_call)
+    
+    cache = self.dcu_cache
+    metrics.add_gauge('active_clients', lambda: len(self.clients))
+    metrics.add_gauge('watch_subscribers', lambda: len(self.watch.subscribers))
+    metrics.add_gauge('jobs', lambda: len(self.jobs.jobs))
+    metrics.add_gauge('cache_hits', lambda: cache.hits)
+    metrics.add_gauge('cache_misses', lambda: cache.misses)
+    metrics.add_gauge('cache_joined', lambda: cache.joined)
+    metrics.add_gauge('cache_hit_ratio', lambda: (cache.hits + cache.joined) / max(1, cache.hits + cache.joined + cache.misses))
+    metrics.add_gauge('upstream_requests', lambda: sum(link.requests for link in list(self.proxy.links.values())))
+    metrics.add_gauge('upstream_saved', lambda: sum(link.saved for link in list(self.proxy.links.values())))
+    metrics.add_gauge('log_dropped', lambda: self.log_handler.dropped if self.log_handler else 0)
+    metrics.add_gauge('request_log_dropped', lambda: self.request_log.dropped if self.request_log else 0)
+    return metrics
+  
+  def setup_request_log(self) -> JsonlWriter | None:
+    """Structured request log writer, None if disabled
+    """
+    config = self.config.log.requestLog
+    
+    if not config.enabled:
+      return None
+    
+    check_file(config.filePath)
+    return JsonlWriter(
+      config.filePath,
+      max_size=config.maxSize,
+      max_files=config.maxFiles,
+      batch_size=config.batchSize,
+      flush_interval=config.flushInterval
+    )
+  
+  def flush_logger(self):
+    """Write pending log messages and stop the log thread
+    """
+    if self.log_listener is not None:
+      self.log_listener.stop()
+      
+      # Later messages (e.g. threads still closing) are written directly
+      root = logging.getLogger()
+      root.removeHandler(self.log_handler)
+      for handler in self.log_listener.handlers:
+        root.addHandler(handler)
+      
+      self.log_listener = None
+  
   def log_debug(self, message):
     """Log debug message
     """
@@ -0,0 +1,79 @@
+from typing import Callable, Protocol, runtime_checkable
+
+from ..models.canoe_model import CanOeModel
+from ..models.canoe_cfg_model import CanOeCfgModel
+from ..models.canoe_state_model import CanoeState
+
+'''
+  description: CANoe backend interface used by the server.
+  The server only talks to CANoe through a backend:
+    com: Vector CANoe through COM (Windows, pywin32, licensed CANoe)
+    sim: In-process simulator with configurable latencies and failure injection
+  The backend is selected in config.json > canOe > backend.
+'''
+
+@runtime_checkable
+class CanoeBackend(Protocol):
+  """CANoe operations needed by the service commands
+  """
+  name: str
+
+  def read_state(self) -> CanoeState:
+    '''Live read of the CANoe state (processes, loaded cfg, measurement)'''
+    ...
+
+  def start_measurement(self, cfg: CanOeCfgModel, with_ui: bool = True, progress: Callable[[str], None] | None = None, start: bool = True) -> str:
+    '''Open cfg if needed and start measurement.
+    Args:
+      cfg (CanOeCfgModel): Cfg to load
+      with_ui (bool): True use GUI, otherwise hidden
+      progress (Callable[[str], None] | None): Called with the phase: stopping, loading, starting
+      start (bool): False only launches CANoe and loads the cfg (warmup)
+    Returns:
+      str: 0000,{cfg_id} {cfg_path} measurement running\n
+      0000,{cfg_id} {cfg_path} loaded (start = False)\n
+      8110,{cfg_id} Impossible to start measurement, file: {cfg_path}\n
+      8111,{cfg_id} Some error when opening file {cfg_path}
+    '''
+    ...
+
+  def stop_measurement(self, unload: bool = False) -> bool:
+    '''Soft close: stop the measurement, CANoe process (and COM session) stay open.
+    Args:
+      unload (bool): True also unloads the cfg
+    Returns:
+      bool: True if stopped (nothing to stop included), False if it failed or there
+        is more than one instance (only close can fix it)
+    '''
+    ...
+
+  def close(self) -> bool:
+    '''Close (kill) every CANoe process.
+    Returns:
+      bool: True if no process is left
+    '''
+    ...
+
+  def shutdown(self) -> None:
+    '''Release backend resources when the service stops'''
+    ...
+
+##############################################################
+##############################################################
+def create_backend(canoe: CanOeModel) -> CanoeBackend:
+  '''Create the backend selected in config (canOe > backend).
+  Backends are imported on demand: the COM backend needs Windows.
+  Args:
+    canoe (CanOeModel): CANoe configuration
+  Returns:
+    CanoeBackend: Backend instance
+  '''
+  if canoe.backend == 'com':
+    from .com_backend import ComCanoeBackend
+    return ComCanoeBackend(canoe)
+
+  if canoe.backend == 'sim':
+    from .sim_backend import SimCanoeBackend
+    return SimCanoeBackend(canoe)
+
+  raise ValueError(f'Unknown CANoe backend: {canoe.backend}')
@@ -0,0 +1,85 @@
+import time
+import logging
+from typing import Callable
+
+from ..models.canoe_model import CanOeModel
+from ..models.canoe_cfg_model import CanOeCfgModel
+from ..models.canoe_state_model import CanoeState
+from ..canoe_session import CanoeSession
+from ..util.process_util import ProcessTracker, request_snapshot, terminate_processes
+from ..vector_canoe import read_measurement_state, start_measurement, stop_measurement
+from ..request_context import backend_call, phase, CALL_PSUTIL
+
+'''
+  description: CANoe backend through COM (Vector CANoe.Application)
+'''
+
+##############################################################
+# Class to handle Vector CANoe through COM
+##############################################################
+class ComCanoeBackend:
+  """COM backend, every COM call runs in one persistent session thread
+  """
+  name = 'com'
+
+  def __init__(self, canoe: CanOeModel):
+    """Constructor
+    Args:
+      canoe (CanOeModel): CANoe configuration
+    """
+    self.canoe = canoe
+    self.session = CanoeSession()
+    self.tracker = ProcessTracker(canoe.exe, canoe.processVerifyInterval)
+    self.logger = logging.getLogger(self.__class__.__name__)
+
+  def read_state(self) -> CanoeState:
+    '''Live read of the CANoe state: tracked PIDs (process scan only when needed) and one COM call.
+    Phases are traced: state_processes, state_app.'''
+    with backend_call(CALL_PSUTIL, 'tracker_pids'), phase('state_processes'):
+      pids = self.tracker.pids()
+
+    # COM only when there is exactly one instance (Dispatch would launch CANoe)
+    cfg_path, running = (None, False)
+    if len(pids) == 1:
+      cfg_path, running = read_measurement_state(self.canoe.exe, self.session)
+
+    return CanoeState(
+      process_count = len(pids),
+      pid = pids[0] if len(pids) == 1 else None,
+      cfg_path = cfg_path,
+      cfg_id = self.canoe.get_cfg_id_by_path(cfg_path) if cfg_path else None,
+      measurement_running = running,
+      timestamp = time.time()
+    )
+
+  def start_measurement(self, cfg: CanOeCfgModel, with_ui: bool = True, progress: Callable[[str], None] | None = None, start: bool = True) -> str:
+    '''Open cfg if needed and start measurement (start = False: only open)'''
+    try:
+      return start_measurement(cfg.id, cfg.path, self.canoe.exe, with_ui, self.session, cfg.startTimeout, progress, start)
+    finally:
+      self.tracker.invalidate() # Dispatch may have launched CANoe
+
+  def stop_measurement(self, unload: bool = False) -> bool:
+    '''Stop measurement (and unload cfg), CANoe and the COM session stay open'''
+    pids = self.tracker.pids()
+
+    # Closed: nothing to stop (Dispatch would launch CANoe), several instances: only close
+    if len(pids) != 1:
+      return not pids
+
+    return stop_measurement(self.canoe.exe, self.session, unload)
+
+  def close(self) -> bool:
+    '''Terminate every CANoe process at once, kill the survivors (one timeout for all)'''
+    try:
+      with backend_call(CALL_PSUTIL, 'terminate_processes'):
+        report = terminate_processes(self.canoe.exe, snapshot=request_snapshot([self.canoe.exe]))
+      self.logger.info(f'Close {self.canoe.exe}: {report}')
+      return report.ok
+    finally:
+      self.session.reset() # COM object of the killed process is not valid
+      self.tracker.invalidate()
+
+  def shutdown(self) -> None:
+    '''Stop COM session thread'''
+    self.session.stop()
@@ -0,0 +1,227 @@
+import random
+import threading
+import time
+import logging
+from typing import Callable
+
+from ..models.canoe_model import CanOeModel
+from ..models.canoe_cfg_model import CanOeCfgModel
+from ..models.canoe_state_model import CanoeState
+from ..models.simulator_model import SimulatorModel, LatencyModel
+from ..request_context import backend_call, phase, CALL_SIM
+
+'''
+  description: In-process CANoe simulator backend.
+  Models process launch, cfg open, measurement start/stop and process close with
+  configurable or recorded latency distributions (config.json > canOe > simulator)
+  and failure injection, so the proxy can be load-tested without Windows or CANoe.
+'''
+
+##############################################################
+# Class to simulate Vector CANoe
+##############################################################
+class SimCanoeBackend:
+  """Simulated CANoe application, operations are serialized like the COM session
+  """
+  name = 'sim'
+
+  def __init__(self, canoe: CanOeModel, simulator: SimulatorModel | None = None):
+    """Constructor
+    Args:
+      canoe (CanOeModel): CANoe configuration
+      simulator (SimulatorModel | None): Latencies and failures, by default canoe.simulator
+    """
+    self.canoe = canoe
+    self.sim = simulator or canoe.simulator or SimulatorModel.from_dic(None)
+    self.rng = random.Random(self.sim.seed)
+    self.logger = logging.getLogger(self.__class__.__name__)
+
+    # Simulated application state
+    self.pids: list[int] = []
+    self.cfg_path: str | None = None
+    self.running = False
+    self._next_pid = 10000
+    self._forced_failures: dict[str, int] = {}
+    self._op_lock = threading.Lock() # One operation at a time (STA)
+    self._state_lock = threading.Lock()
+
+  ##############################################################
+  # Failure injection
+  ##############################################################
+  def inject_failure(self, operation: str, count: int = 1):
+    '''Force next failures of an operation
+    Args:
+      operation (str): open | start | close
+      count (int): Number of consecutive failures
+    '''
+    with self._state_lock:
+      self._forced_failures[operation] = self._forced_failures.get(operation, 0) + count
+
+  def spawn_instance(self) -> int:
+    '''Launch an extra CANoe process (e.g. "Too many open instances" case)
+    Returns:
+      int: PID of the new process
+    '''
+    with self._state_lock:
+      return self._spawn_locked()
+
+  def crash(self):
+    '''Kill every process without notice (CANoe crash)'''
+    with self._state_lock:
+      self.pids.clear()
+      self.cfg_path = None
+      self.running = False
+
+  ##############################################################
+  # CanoeBackend interface
+  ##############################################################
+  def read_state(self) -> CanoeState:
+    '''Live read of the simulated state, phases are traced like the COM backend: state_processes, state_app'''
+    with backend_call(CALL_SIM, 'read_state'), phase('state_app'):
+      self._wait(self.sim.state)
+
+    with phase('state_processes'), self._state_lock:
+      count = len(self.pids)
+      single = count == 1
+      return CanoeState(
+        process_count = count,
+        pid = self.pids[0] if single else None,
+        cfg_path = self.cfg_path if single else None,
+        cfg_id = self.canoe.get_cfg_id_by_path(self.cfg_path) if single and self.cfg_path else None,
+        measurement_running = self.running if single else False,
+        timestamp = time.time()
+      )
+
+  def start_measurement(self, cfg: CanOeCfgModel, with_ui: bool = True, progress: Callable[[str], None] | None = None, start: bool = True) -> str:
+    '''Same sequence as the COM backend: launch, stop other cfg, open, start (start = False: only open).
+    Stop, open and start share the cfg wait budget (startTimeout).
+    Phases are traced: launch, read_state, stop, open, start.'''
+    progress = progress or (lambda phase: None)
+    
+    with backend_call(CALL_SIM, 'start_measurement'), self._op_lock:
+      target_cfg = cfg.path.lower()
+
+      # Dispatch launches CANoe when it is closed
+      if not self.pids:
+        with phase('launch'):
+          self._wait(self.sim.launch)
+          self.spawn_instance()
+
+      deadline = time.monotonic() + cfg.startTimeout
+
+      with phase('read_state'):
+        current_cfg = (self.cfg_path or '').lower()
+
+      # Case 1: it's already running
+      if self.running and current_cfg == target_cfg:
+        return f'0000,{cfg.id} {cfg.path} measurement running'
+
+      # Case 2: Other config is running, stop it
+      if self.running:
+        progress('stopping')
+        with phase('stop'):
+          stopped = self._wait(self.sim.stop, deadline) and self._alive()
+        if not stopped:
+          return f'8110,{cfg.id} Impossible to start measurement, file: {cfg.path}'
+        self._set(running=False)
+
+      # Case 3: Load new cfg file
+      if current_cfg != target_cfg:
+        progress('loading')
+        with phase('open'):
+          loaded = self._wait(self.sim.open, deadline) and self._alive() and not self._fails('open', self.sim.openFailureRate)
+        if not loaded:
+          return f'8111,{cfg.id} Some error when opening file {cfg.path}'
+        self._set(cfg_path=cfg.path)
+
+      # Only load (warmup)
+      if not start:
+        return f'0000,{cfg.id} {cfg.path} loaded'
+
+      # Start measurement
+      progress('starting')
+      with phase('start'):
+        started = self._wait(self.sim.start, deadline) and self._alive() and not self._fails('start', self.sim.startFailureRate)
+      if not started:
+        return f'8110,{cfg.id} Impossible to start measurement, file: {cfg.path}'
+
+      self._set(running=True)
+      return f'0000,{cfg.id} {cfg.path} measurement running'
+
+  def stop_measurement(self, unload: bool = False) -> bool:
+    '''Stop measurement (and unload cfg), simulated process stays open.
+    Failures are injected with inject_failure('stop').'''
+    with backend_call(CALL_SIM, 'stop_measurement'), self._op_lock:
+      if len(self.pids) != 1:
+        return not self.pids
+
+      if self.running:
+        self._wait(self.sim.stop)
+        if self._fails('stop', 0.0):
+          return False
+        self._set(running=False)
+
+      if unload and self.cfg_path:
+        self._wait(self.sim.stop)
+        self._set(cfg_path=None)
+
+      return True
+
+  def close(self) -> bool:
+    '''Terminate every simulated process. Like the process kill of the COM backend it does
+    not wait for the operation in progress, which then fails'''
+    with backend_call(CALL_SIM, 'close'):
+      if not self.pids:
+        return True
+
+      self._wait(self.sim.close)
+      if self._fails('close', self.sim.closeFailureRate):
+        return False
+
+      self.crash()
+      return True
+
+  def shutdown(self) -> None:
+    '''Nothing to release'''
+    pass
+
+  ##############################################################
+  # Helpers
+  ##############################################################
+  def _wait(self, latency: LatencyModel, deadline: float | None = None) -> bool:
+    '''Sleep one latency sample, False if it does not fit before deadline (monotonic)'''
+    delay = latency.sample(self.rng) * self.sim.timeScale
+    
+    if deadline is not None and time.monotonic() + delay > deadline:
+      time.sleep(max(0.0, deadline - time.monotonic()))
+      return False
+    
+    if delay > 0:
+      time.sleep(delay)
+    return True
+
+  def _fails(self, operation: str, rate: float) -> bool:
+    with self._state_lock:
+      forced = self._forced_failures.get(operation, 0)
+      if forced > 0:
+        self._forced_failures[operation] = forced - 1
+        self.logger.debug(f'Injected failure: {operation}')
+        return True
+
+      return rate > 0 and self.rng.random() < rate
+
+  def _alive(self) -> bool:
+    '''False if CANoe was closed during the operation'''
+    with self._state_lock:
+      return bool(self.pids)
+
+  def _set(self, **state):
+    with self._state_lock:
+      for key, value in state.items():
+        setattr(self, key, value)
+
+  def _spawn_locked(self) -> int:
+    pid = self._next_pid
+    self._next_pid += 1
+    self.pids.append(pid)
+    return pid
@@ -0,0 +1,304 @@
+import contextvars
+import queue
+import threading
+import time
+import logging
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+from .request_context import backend_call, CALL_COM
+
+try:
+  import pythoncom
+  import win32event
+except ImportError: # Not Windows: only injected applications (tests, simulator)
+  pythoncom = None
+  win32event = None
+
+'''
+  description: Persistent COM session with CANoe.
+  One STA worker thread owns a long-lived "CANoe.Application" dispatch, jobs are
+  queued and their results returned with futures. The dispatch is created again
+  when CANoe was restarted: a job that fails because the connection is lost (stale
+  dispatch, the call never reached CANoe) is run once more on a new dispatch. Any
+  other COM error is raised, a job (Open, Start) is never run twice. Jobs run in the
+  context of the caller (request, phase trace).
+
+  Every call has a deadline. A call still running at its deadline (e.g. CANoe shows a
+  modal dialog) raises TimeoutError and the hung thread is abandoned: a new thread with
+  its own apartment and application object takes the queued jobs.
+
+  The application factory can be injected, e.g. a fake object with
+  Configuration/Measurement attributes to run without Windows:
+
+    session = CanoeSession(app_factory=lambda: FakeApplication(), disconnect_errors=(FakeError,))
+    full_name = session.call(lambda app: app.Configuration.FullName)
+
+  COM events (sinks and waits that dispatch them) go through session.events, by default
+  ComEvents; a fake adapter can fire the events of a fake application.
+'''
+
+# HRESULTs of a lost connection to the COM server (call not delivered)
+DISCONNECT_HRESULTS = {
+  -2147417848, # RPC_E_DISCONNECTED: object invoked has disconnected from its clients
+  -2147023174, # RPC_S_SERVER_UNAVAILABLE: the RPC server is unavailable
+  -2147221251, # CO_E_OBJNOTCONNECTED: object is not connected to the server
+}
+
+def is_connection_lost(error: BaseException) -> bool:
+  '''True if error is a lost connection to CANoe (hresult in DISCONNECT_HRESULTS)'''
+  return getattr(error, 'hresult', None) in DISCONNECT_HRESULTS
+
+##############################################################
+# Class to connect COM event sinks and wait for them
+##############################################################
+class ComEvents:
+  """COM events of the session thread: sinks connected with WithEvents, waits dispatch
+  the window messages of the events. Without pywin32 only polling.
+  """
+
+  def attach(self, source: Any, sink_class: type) -> Any:
+    """Connect an instance of sink_class to the events of source
+    Returns:
+      Any: Event sink, None if events are not available (polling only)
+    """
+    try:
+      import win32com.client
+      return win32com.client.WithEvents(source, sink_class)
+    except Exception as e:
+      logging.getLogger(self.__class__.__name__).debug(f'{sink_class.__name__} not available, polling: {e}')
+      return None
+
+  def detach(self, sink: Any):
+    """Disconnect a sink created with attach()
+    """
+    try:
+      if sink is not None:
+        sink.close()
+    except Exception:
+      pass
+
+  def wait(self, condition: Callable[[], bool], deadline: float, poll_min: float = 0.05, poll_max: float = 0.5) -> bool:
+    """Wait until condition() is True or deadline (monotonic) expires.
+    COM events are dispatched while waiting and wake the wait immediately,
+    condition() is polled with exponential backoff as fallback.
+    Returns:
+      bool: True if condition was met before deadline
+    """
+    delay = poll_min
+    while True:
+      if pythoncom is not None:
+        pythoncom.PumpWaitingMessages() # Dispatch COM events to sinks
+
+      if condition():
+        return True
+
+      remaining = deadline - time.monotonic()
+      if remaining <= 0:
+        return False
+
+      # Sleep until next poll or until a COM event (window message) arrives
+      self._sleep(min(delay, remaining))
+      delay = min(delay * 2, poll_max)
+
+  def _sleep(self, seconds: float):
+    if win32event is None:
+      time.sleep(seconds)
+      return
+    win32event.MsgWaitForMultipleObjects([], False, int(seconds * 1000), win32event.QS_ALLINPUT)
+
+def dispatch_canoe_application() -> Any:
+  '''Default application factory: COM dispatch of CANoe.Application'''
+  import win32com.client
+  return win32com.client.Dispatch('CANoe.Application')
+
+@dataclass
+class _Apartment:
+  """Session thread with its job queue and application object
+  """
+  jobs: 'queue.Queue[tuple[Future, contextvars.Context, Callable, tuple, dict] | None]' = field(default_factory=queue.Queue)
+  thread: threading.Thread | None = None
+  app: Any = None # Only used from the apartment thread
+  reset: bool = False # Next job creates the application object again
+
+##############################################################
+# Class to run CANoe COM calls in one dedicated thread
+##############################################################
+class CanoeSession:
+  """Owner thread of the CANoe COM application object
+  """
+
+  def __init__(self, app_factory: Callable[[], Any] = dispatch_canoe_application,
+               disconnect_errors: tuple[type[BaseException], ...] | None = None,
+               name: str = 'CanoeSession', call_timeout: float = 60.0, events: ComEvents | None = None):
+    """Constructor
+    Args:
+      app_factory (Callable[[], Any]): Creates the application object, called in the session thread
+      disconnect_errors (tuple): Error types of a stale application object, by default pythoncom.com_error,
+        retried only when is_connection_lost(error)
+      name (str): Thread name
+      call_timeout (float): Default deadline (s) of call()
+      events (ComEvents | None): Event sinks and waits of the jobs, by default ComEvents
+    """
+    if disconnect_errors is None:
+      disconnect_errors = (pythoncom.com_error,) if pythoncom is not None else ()
+
+    self.app_factory = app_factory
+    self.disconnect_errors = disconnect_errors
+    self.name = name
+    self.call_timeout = call_timeout
+    self.events = events or ComEvents()
+    self.logger = logging.getLogger(self.__class__.__name__)
+    self.connects = 0 # Number of application objects created
+    self.restarts = 0 # Session threads replaced after a hung call
+    self._apartment = _Apartment()
+    self._lock = threading.Lock()
+
+  @property
+  def app(self) -> Any:
+    """Application object of the current session thread
+    """
+    return self._apartment.app
+
+  @property
+  def in_session_thread(self) -> bool:
+    """True if called from the session thread
+    """
+    thread = self._apartment.thread
+    return thread is not None and threading.current_thread() is thread
+
+  def start(self):
+    """Start session thread (also started by the first submit)
+    """
+    with self._lock:
+      self._start_locked(self._apartment)
+
+  def stop(self):
+    """Stop session thread after the queued jobs, releasing the application object
+    """
+    with self._lock:
+      apartment = self._apartment
+      if apartment.thread is not None:
+        apartment.jobs.put(None)
+        self._apartment = _Apartment()
+
+  def submit(self, fn: Callable[..., Any], *args, **kwargs) -> Future:
+    """Queue fn(app, *args, **kwargs) in the session thread
+    Returns:
+      Future: Result of fn
+    """
+    future = Future()
+    with self._lock:
+      self._start_locked(self._apartment)
+      self._apartment.jobs.put((future, contextvars.copy_context(), fn, args, kwargs))
+    return future
+
+  def call(self, fn: Callable[..., Any], *args, timeout: float | None = None, **kwargs) -> Any:
+    """Run fn(app, *args, **kwargs) in the session thread and wait the result
+    Args:
+      timeout (float | None): Deadline in seconds, by default call_timeout
+    Raises:
+      TimeoutError: No result in time. A job still waiting in queue is cancelled, a running
+        job is abandoned with its thread (new session thread)
+    """
+    # Nested call from a job: run it directly, waiting would deadlock
+    if self.in_session_thread:
+      return self._execute(self._apartment, fn, args, kwargs)
+
+    name = getattr(fn, '__name__', 'call')
+    timeout = self.call_timeout if timeout is None else timeout
+
+    with backend_call(CALL_COM, name):
+      apartment = self._apartment
+      future = self.submit(fn, *args, **kwargs)
+      try:
+        return future.result(timeout)
+
+      except FutureTimeoutError:
+        # Still queued behind a long job: never runs
+        if not future.cancel():
+          self._restart(apartment, name)
+        raise TimeoutError(f'COM call {name} did not finish in {timeout}s')
+
+  def reset(self):
+    """Release the application object, next job creates it again (e.g. after killing CANoe)
+    """
+    self._apartment.reset = True
+
+  def _start_locked(self, apartment: _Apartment):
+    if apartment.thread is None:
+      apartment.thread = threading.Thread(target=self._run, args=(apartment,), name=self.name, daemon=True)
+      apartment.thread.start()
+
+  def _restart(self, apartment: _Apartment, name: str):
+    '''Abandon the thread of a hung call, queued jobs move to a new thread'''
+    with self._lock:
+      if self._apartment is not apartment:
+        return # Already replaced
+
+      self.restarts += 1
+      self.logger.error(f'COM call {name} hung, new session thread (#{self.restarts})')
+      self._apartment = _Apartment()
+
+      while True:
+        try:
+          item = apartment.jobs.get_nowait()
+        except queue.Empty:
+          break
+        if item is not None:
+          self._apartment.jobs.put(item)
+
+      apartment.jobs.put(None) # Hung thread ends if the call ever returns
+      self._start_locked(self._apartment)
+
+  def _connect(self, apartment: _Apartment) -> Any:
+    if apartment.reset:
+      apartment.reset = False
+      apartment.app = None
+
+    if apartment.app is None:
+      apartment.app = self.app_factory()
+      self.connects += 1
+      self.logger.debug(f'Application object created (#{self.connects})')
+    return apartment.app
+
+  def _execute(self, apartment: _Apartment, fn: Callable[..., Any], args: tuple, kwargs: dict) -> Any:
+    app = self._connect(apartment)
+    try:
+      return fn(app, *args, **kwargs)
+
+    except self.disconnect_errors as e:
+      # Other COM errors: the call may have run in CANoe, never repeated
+      if not is_connection_lost(e):
+        raise
+
+      # Stale application object (CANoe restarted): connect again, then retry once
+      self.logger.warning(f'COM session lost ({e}), reconnecting')
+      apartment.app = None
+      app = self._connect(apartment)
+      return fn(app, *args, **kwargs)
+
+  def _run(self, apartment: _Apartment):
+    if pythoncom is not None:
+      pythoncom.CoInitialize() # Single threaded apartment
+
+    try:
+      while True:
+        item = apartment.jobs.get()
+        if item is None:
+          break
+
+        future, context, fn, args, kwargs = item
+        if not future.set_running_or_notify_cancel():
+          continue
+
+        try:
+          future.set_result(context.run(self._execute, apartment, fn, args, kwargs))
+        except BaseException as e:
+          future.set_exception(e)
+
+    finally:
+      apartment.app = None
+      if pythoncom is not None:
+        pythoncom.CoUninitialize()
@@ -0,0 +1,133 @@
+import threading
+import logging
+from typing import Callable
+
+from .models.canoe_state_model import CanoeState
+
+'''
+  description: Background monitor of the CANoe application state.
+  A thread refreshes one immutable CanoeState snapshot every interval (backend read_state),
+  so status requests are served without scanning processes or opening COM connections.
+  Live reads run outside the lock; only publishing the snapshot is locked, and listeners
+  are notified after the lock is released.
+'''
+
+def state_key(state: CanoeState) -> tuple:
+  """Fields that define a state change (timestamp excluded)
+  """
+  return (state.process_count, state.pid, state.cfg_path, state.measurement_running)
+
+##############################################################
+# Class to refresh the CANoe state in background
+##############################################################
+class CanoeStateMonitor:
+  """Keep an up to date CanoeState snapshot
+  """
+
+  def __init__(self, read_state: Callable[[], CanoeState], interval: float = 1.0):
+    """Constructor
+    Args:
+      read_state (Callable[[], CanoeState]): Function to make a live read
+      interval (float): Seconds between refreshes, 0 = no thread, every snapshot is a live read
+    """
+    self.read_state = read_state
+    self.interval = interval
+    self.state: CanoeState | None = None
+    self.version = 0 # Incremented by invalidate()
+    self._read_version = -1 # Version seen by the published live read
+    self._reads = 0 # Sequence of started live reads
+    self._published = 0 # Sequence of the published live read
+    self.logger = logging.getLogger(self.__class__.__name__)
+    self._lock = threading.Lock() # Snapshot publishing
+    self._read_lock = threading.Lock() # Coalesces the reads of stale snapshots
+    self._wake = threading.Event()
+    self._stop = threading.Event()
+    self._thread: threading.Thread | None = None
+    self._listeners: list[Callable[[CanoeState], None]] = []
+
+  def add_listener(self, listener: Callable[[CanoeState], None]):
+    """Call listener(state) every time a live read changes the state
+    """
+    self._listeners.append(listener)
+
+  def start(self):
+    """Start background refresh thread
+    """
+    if self.interval <= 0 or self._thread is not None:
+      return
+
+    self._stop.clear()
+    self._thread = threading.Thread(target=self._run, name=self.__class__.__name__, daemon=True)
+    self._thread.start()
+
+  def stop(self):
+    """Stop background refresh thread
+    """
+    self._stop.set()
+    self._wake.set()
+    self._thread = None
+
+  def snapshot(self) -> CanoeState:
+    """Last state, a live read is done only if it is stale
+    """
+    if self.interval <= 0:
+      return self.refresh()
+
+    if self.stale:
+      with self._read_lock:
+        if self.stale:
+          self.refresh()
+
+    return self.state
+
+  def refresh(self) -> CanoeState:
+    """Live read, the result becomes the new snapshot unless a later read was already published
+    """
+    with self._lock:
+      self._reads += 1
+      sequence, version = self._reads, self.version # Changes during the read invalidate again
+
+    state = self.read_state()
+
+    with self._lock:
+      if sequence < self._published:
+        return state # Older than the snapshot
+      previous, self.state = self.state, state
+      self._published, self._read_version = sequence, version
+
+    if previous is None or state_key(previous) != state_key(state):
+      for listener in self._listeners:
+        try:
+          listener(state)
+        except Exception as e:
+          self.logger.error(f'Error in state listener: {e}')
+
+    return state
+
+  @property
+  def cached(self) -> bool:
+    """True if snapshot() answers without a live read
+    """
+    return self.interval > 0 and not self.stale
+
+  @property
+  def stale(self) -> bool:
+    """True if the snapshot was invalidated after its live read (or there is no snapshot yet)
+    """
+    return self._read_version != self.version
+
+  def invalidate(self):
+    """Mark snapshot as stale (state changed) and wake the refresh thread
+    """
+    self.version += 1
+    self._wake.set()
+
+  def _run(self):
+    while not self._stop.is_set():
+      try:
+        self.refresh()
+      except Exception as e:
+        self.logger.error(f'Error refreshing CANoe state: {e}')
+
+      self._wake.wait(self.interval)
+      self._wake.clear()
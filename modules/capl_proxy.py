@@ -0,0 +1,416 @@
+import queue
+import socket
+import threading
+import time
+import logging
+from concurrent.futures import Future
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable
+
+from .models.canoe_model import CanOeModel
+from .models.canoe_cfg_model import CanOeCfgModel
+from .response_matcher import get_matcher, RESPONSE_OK, RESPONSE_NOK
+from .request_context import backend_call, CALL_UPSTREAM
+
+'''
+  description: Multiplexing proxy to the CAPL Server_Socket of every cfg (Nodes/Server_Socket.can).
+  The CAPL node keeps a single client socket, so the service owns one persistent upstream
+  connection per cfg and serializes the commands of every PLC onto it. Each request waits
+  in the link queue and gets back its own response. A macro holds the link for all its
+  steps, commands of other PLCs wait until it ends.
+  Commands defined in the cfg (CanOeCommandModel) finish as soon as the response matches
+  responseOk or responseNok, other commands end after dcuDrain seconds without data.
+  Each link tracks the DCU target selected in the CAPL node: Read_info authenticates and
+  activates the DCU, the next Window_control/DLK_IOControl act on it. The {dcu_type} of
+  their responses is bound to the tracked target, a response of another door is NOK.
+  A Read_info of the DCU already selected is not sent again: the link answers with the
+  OK response of its selection and counts the round trip saved.
+  Based on the _RemoteWorker prototype (test_04_proxy_test.py).
+'''
+
+# Command that selects the DCU target in Server_Socket.can (first argument) and
+# placeholder of the selected target in the responses of the other commands
+TARGET_COMMAND = 'Read_info'
+TARGET_PLACEHOLDER = 'dcu_type'
+
+class UpstreamError(Exception):
+  """Upstream (CAPL server) connection not available
+  """
+  pass
+
+@dataclass(frozen=True)
+class CaplResponse:
+  """Response of the CAPL server
+  """
+  text: str
+  outcome: str | None # RESPONSE_OK | RESPONSE_NOK | None (no command definition or no match)
+
+@dataclass
+class UpstreamRequest:
+  """Request queued in an upstream link
+  """
+  payload: bytes
+  timeout: float
+  classify: Callable[[bytes, str | None], str | None] | None = None # Outcome of a (partial) response with the selected target, None = drain
+  target: str | None = None # DCU target selected by the command (Read_info)
+  selected: str | None = None # DCU target selected in CAPL when the command was sent
+  sent: bool = False # Payload written (maybe in part) to the CAPL server, never sent again
+  future: Future = field(default_factory=Future)
+
+##############################################################
+# Class to own the connection to one CAPL server
+##############################################################
+class UpstreamLink:
+  """Persistent connection to one CAPL server, requests are sent one at a time by a worker thread
+  """
+
+  def __init__(self, cfg_id: str, address: tuple[str, int], connect_timeout: float = 2.0, drain: float = 0.2,
+               on_target: Callable[[str, str | None, str | None], None] | None = None):
+    """Constructor
+    Args:
+      cfg_id (str): Cfg id, used in log messages
+      address (tuple[str, int]): CAPL server host and port
+      connect_timeout (float): Seconds to connect
+      drain (float): Quiet time (s) that ends a response once the first bytes arrived
+      on_target (Callable | None): on_target(cfg_id, previous, target) when the selected target changes
+    """
+    self.cfg_id = cfg_id
+    self.address = address
+    self.connect_timeout = connect_timeout
+    self.drain = drain
+    self.logger = logging.getLogger(f'{self.__class__.__name__}[{cfg_id}]')
+    self.sock: socket.socket | None = None
+    self.connects = 0 # Upstream connections opened
+    self.requests = 0 # Requests sent
+    self.saved = 0 # Redundant target selections answered without a round trip
+    self.target: str | None = None # DCU target selected in the CAPL node
+    self._selection: bytes | None = None # OK response of the Read_info that selected target
+    self.on_target = on_target
+    self._hold = threading.RLock() # Held while a request (or every request of a macro) runs
+    self._queue: 'queue.Queue[UpstreamRequest | None]' = queue.Queue()
+    self._thread = threading.Thread(target=self._run, name=f'{self.__class__.__name__}[{cfg_id}]', daemon=True)
+    self._thread.start()
+
+  def request(self, request: UpstreamRequest) -> bytes:
+    """Send request and wait its response, requests of every client are queued
+    Args:
+      request (UpstreamRequest): Payload as sent to the CAPL server, seconds to wait the
+        (complete) response, classify(data) returns the outcome once data is a whole
+        response (None = response ends after drain seconds without data)
+    Returns:
+      bytes: Response
+    Raises:
+      UpstreamError: CAPL server not reachable
+      TimeoutError: No response in time
+    """
+    with self._hold:
+      self._queue.put(request)
+      return request.future.result()
+
+  @contextmanager
+  def hold(self):
+    """Keep the link for the requests of the calling thread (macro steps), requests
+    of other threads wait: no other command changes the DCU target in between
+    """
+    with self._hold:
+      yield self
+
+  @property
+  def pending(self) -> int:
+    """Requests waiting in queue
+    """
+    return self._queue.qsize()
+
+  def reset_target(self):
+    """Target unknown (measurement restart, reconnect, error)
+    """
+    self._set_target(None)
+
+  def _set_target(self, target: str | None):
+    previous, self.target = self.target, target
+    if previous != target:
+      self._selection = None
+    if previous != target and self.on_target is not None:
+      self.on_target(self.cfg_id, previous, target)
+
+  def stop(self):
+    """Close connection, queued requests fail
+    """
+    self._queue.put(None)
+
+  def _connect(self):
+    host, port = self.address
+    try:
+      self.sock = socket.create_connection((host, port), timeout=self.connect_timeout)
+    except TimeoutError:
+      raise ConnectionError(f'Connect timeout ({self.connect_timeout}s)')
+    self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    self.connects += 1
+    self.reset_target() # New CAPL client: no target selected
+    self.logger.info(f'Connected to CAPL server {host}:{port}')
+
+  def _disconnect(self):
+    if self.sock is not None:
+      try:
+        self.sock.close()
+      except OSError:
+        pass
+      self.sock = None
+
+  def _discard_stale(self):
+    '''Drop bytes left by a previous request (late response after a timeout)'''
+    self.sock.setblocking(False)
+    try:
+      while True:
+        data = self.sock.recv(65536)
+        if not data:
+          raise ConnectionResetError('Closed by CAPL server')
+        self.logger.warning(f'Discarded stale response: {data!r}')
+    except BlockingIOError:
+      pass
+    finally:
+      self.sock.setblocking(True)
+
+  def _exchange(self, request: UpstreamRequest) -> bytes:
+    self._discard_stale()
+    request.sent = True
+    self.sock.sendall(request.payload)
+
+    if request.classify is not None:
+      return self._receive_until(request.timeout, lambda data: request.classify(data, request.selected))
+
+    # First bytes: request timeout
+    self.sock.settimeout(request.timeout)
+    try:
+      data = self.sock.recv(65536)
+    except socket.timeout:
+      raise TimeoutError(f'No response in {request.timeout}s')
+
+    if not data:
+      raise ConnectionResetError('Closed by CAPL server')
+
+    # Rest of the response: until the link is quiet
+    chunks = [data]
+    self.sock.settimeout(self.drain)
+    try:
+      while chunk := self.sock.recv(65536):
+        chunks.append(chunk)
+    except socket.timeout:
+      pass
+
+    return b''.join(chunks)
+
+  def _receive_until(self, timeout: float, classify: Callable[[bytes], str | None]) -> bytes:
+    '''Read until the response matches, no drain wait. The first bytes are waited up to
+    timeout, an unmatched response ends after drain seconds without data'''
+    deadline = time.monotonic() + timeout
+    data = b''
+
+    while not data or classify(data) is None:
+      remaining = deadline - time.monotonic()
+
+      # No response in time
+      if not data and remaining <= 0:
+        raise TimeoutError(f'No response in {timeout}s')
+
+      self.sock.settimeout(self.drain if data else remaining)
+      try:
+        chunk = self.sock.recv(65536)
+      except socket.timeout:
+        # Unexpected response: return what arrived once the link is quiet
+        if data:
+          self.logger.warning(f'Unmatched response: {data!r}')
+          return data
+        continue
+
+      if not chunk:
+        raise ConnectionResetError('Closed by CAPL server')
+      data += chunk
+
+    # Bytes of the same response already received (e.g. line terminator)
+    self.sock.setblocking(False)
+    try:
+      while chunk := self.sock.recv(65536):
+        data += chunk
+    except BlockingIOError:
+      pass
+    finally:
+      self.sock.setblocking(True)
+
+    return data
+
+  def _track_target(self, request: UpstreamRequest, data: bytes | None):
+    '''Update selected target after a response (None = no response)'''
+    outcome = request.classify(data, request.selected) if data is not None and request.classify else None
+
+    # Error or unknown response (wrong door, failed Read_info): target of the CAPL node not known
+    if outcome == RESPONSE_NOK or (request.target is not None and outcome != RESPONSE_OK):
+      self.reset_target()
+      return
+
+    if request.target is not None:
+      self._set_target(request.target)
+      self._selection = data
+
+  def _redundant(self, request: UpstreamRequest) -> bytes | None:
+    '''OK response of the selection if request selects the target already selected on a live connection'''
+    selection = self._selection
+    if request.target is None or request.target != self.target or selection is None or self.sock is None:
+      return None
+
+    # Client dropped by the CAPL node (measurement restart): selection lost
+    try:
+      self._discard_stale()
+    except OSError:
+      self._disconnect()
+      self.reset_target()
+      return None
+
+    return selection
+
+  def _run(self):
+    while (request := self._queue.get()) is not None:
+      # Redundant selection: the DCU is already the target of the CAPL node
+      selection = self._redundant(request)
+      if selection is not None:
+        self.saved += 1
+        request.selected = self.target
+        request.future.set_result(selection)
+        continue
+
+      self.requests += 1
+
+      # One reconnection: the CAPL server drops its client when the measurement restarts.
+      # Only while nothing was written, a command (Window_control) is never run twice
+      for attempt in range(2):
+        try:
+          if self.sock is None:
+            self._connect()
+
+          request.selected = self.target
+          data = self._exchange(request)
+          self._track_target(request, data)
+          request.future.set_result(data)
+          break
+
+        except TimeoutError as e:
+          self._track_target(request, None)
+          request.future.set_exception(e)
+          break
+
+        except OSError as e:
+          self._disconnect()
+          self.logger.warning(f'Upstream error: {e}')
+
+          if attempt == 1 or request.sent:
+            request.future.set_exception(UpstreamError(f'{self.address[0]}:{self.address[1]} {e}'))
+            break
+
+    # Stopped: release waiting requests
+    self._disconnect()
+    while True:
+      try:
+        request = self._queue.get_nowait()
+      except queue.Empty:
+        break
+      if request is not None:
+        request.future.set_exception(UpstreamError('Proxy stopped'))
+
+##############################################################
+# Class to route DCU commands to the CAPL server of each cfg
+##############################################################
+class CaplProxy:
+  """One UpstreamLink per cfg, created on first use
+  """
+
+  def __init__(self, canoe: CanOeModel, timeout: float = 5.0, drain: float = 0.2):
+    """Constructor
+    Args:
+      canoe (CanOeModel): CANoe configuration (cfg host/port)
+      timeout (float): Default seconds to wait a response
+      drain (float): Quiet time (s) that ends a response
+    """
+    self.canoe = canoe
+    self.timeout = timeout
+    self.drain = drain
+    self.links: dict[str, UpstreamLink] = {}
+    self.target_listeners: list[Callable[[str, str | None, str | None], None]] = []
+    self._lock = threading.Lock()
+
+  def add_target_listener(self, listener: Callable[[str, str | None, str | None], None]):
+    """Call listener(cfg_id, previous, target) when the target selected in a CAPL node changes
+    """
+    self.target_listeners.append(listener)
+
+  def _notify_target(self, cfg_id: str, previous: str | None, target: str | None):
+    for listener in self.target_listeners:
+      try:
+        listener(cfg_id, previous, target)
+      except Exception as e:
+        logging.getLogger(self.__class__.__name__).error(f'Target listener error: {e}')
+
+  def link(self, cfg: CanOeCfgModel) -> UpstreamLink:
+    """Upstream link of cfg
+    """
+    with self._lock:
+      link = self.links.get(cfg.id)
+
+      if link is None:
+        # Cfg host is the CAPL listen address, 0.0.0.0 = local PC
+        host = '127.0.0.1' if cfg.host in ('', '0.0.0.0') else cfg.host
+        link = UpstreamLink(cfg.id, (host, cfg.port), drain=self.drain, on_target=self._notify_target)
+        self.links[cfg.id] = link
+
+      return link
+
+  def request(self, cfg: CanOeCfgModel, command: str, timeout: float | None = None) -> CaplResponse:
+    """Send command to the CAPL server of cfg
+    Args:
+      cfg (CanOeCfgModel): Cfg running the CAPL server
+      command (str): Command, e.g. 'Read_info DMFL_MMA'
+      timeout (float | None): Seconds to wait a response, by default the command
+        responseTimeout or the proxy timeout
+    Returns:
+      CaplResponse: Response text and outcome
+    Raises:
+      UpstreamError, TimeoutError: see UpstreamLink.request
+    """
+    name, *args = command.split(' ')
+    definition = cfg.get_command(name)
+    decode = lambda data: data.decode('utf-8', errors='replace')
+    request = UpstreamRequest(command.encode('utf-8'), timeout or self.timeout)
+
+    # Matcher bound to the target selected when the command is sent
+    matcher = lambda selected: get_matcher(definition, tuple(args), ((TARGET_PLACEHOLDER, selected),) if selected else ())
+
+    if definition is not None:
+      request.timeout = timeout or definition.responseTimeout
+      request.classify = lambda data, selected: matcher(selected).match(decode(data))
+
+      # Target tracking needs OK/NOK patterns
+      if name == TARGET_COMMAND and args:
+        request.target = args[0]
+
+    with backend_call(CALL_UPSTREAM, name):
+      text = decode(self.link(cfg).request(request)).strip()
+    return CaplResponse(text, matcher(request.selected).match(text) if definition else None)
+
+  def hold(self, cfg: CanOeCfgModel):
+    """Keep the link of cfg for the requests of the calling thread, see UpstreamLink.hold
+    """
+    return self.link(cfg).hold()
+
+  def reset_targets(self):
+    """Selected targets unknown (measurement restarted)
+    """
+    for link in list(self.links.values()):
+      link.reset_target()
+
+  def stop(self):
+    """Close every upstream link
+    """
+    with self._lock:
+      for link in self.links.values():
+        link.stop()
+      self.links.clear()
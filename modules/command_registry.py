@@ -0,0 +1,121 @@
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+
+'''
+  description: Command registry for CANoeProxyTcpServer.
+  Commands are declared once (name, usage, arity, handler) and dispatched with a dict lookup.
+  Command modules register their handlers in the default registry when they are imported:
+
+    @registry.command('status', description='CANoe application status')
+    def cmd_status(server, client_id: str, args: list[str]) -> str:
+      ...
+
+  A handler receives the server, the client id and the arguments (without the command name)
+  and returns the response to send.
+
+  The asyncio engine answers commands declared with blocking=False on the event loop
+  (snapshot reads, counters), blocking commands run in its executor and serialized
+  commands (they wait for the execution coordinator: start, close) in a separate one.
+'''
+
+# Common responses
+RESPONSE_MISSING_PARAMETERS = '8100,Missing parameters'
+RESPONSE_TOO_MANY_PARAMETERS = '8101,Too many parameters'
+RESPONSE_UNKNOWN_COMMAND = '8FFF,Unknown command'
+
+# Handler signature: (server, client_id, args) -> response
+CommandHandler = Callable[[object, str, list[str]], str]
+
+# Blocking predicate signature: (server, args) -> True if the command may block
+BlockingPredicate = Callable[[object, list[str]], bool]
+
+@dataclass(frozen=True)
+class CommandSpec:
+  """Command declaration
+  """
+  name: str
+  handler: CommandHandler
+  usage: str # Text shown by help, e.g. 'start {cfg_id}'
+  min_args: int = 0
+  max_args: Optional[int] = None # None = no limit
+  description: str = ''
+  blocking: bool | BlockingPredicate = True # False = never blocks (no COM, psutil or upstream I/O)
+  serialized: bool = False # Waits for other start/close operations (execution coordinator)
+
+  def blocks(self, server, args: list[str]) -> bool:
+    """True if the command may block the calling thread
+    """
+    return self.blocking(server, args) if callable(self.blocking) else self.blocking
+
+  def execute(self, server, client_id: str, args: list[str]) -> str:
+    """Validate arity and run handler
+    Args:
+      server: CANoeProxyTcpServer instance
+      client_id (str): Client id
+      args (list[str]): Command arguments, without command name
+    Returns:
+      str: Response
+    """
+    if len(args) < self.min_args:
+      return RESPONSE_MISSING_PARAMETERS
+
+    if self.max_args is not None and len(args) > self.max_args:
+      return RESPONSE_TOO_MANY_PARAMETERS
+
+    return self.handler(server, client_id, args)
+
+##############################################################
+# Class to register and look up commands
+##############################################################
+class CommandRegistry:
+  """Table of commands indexed by name
+  """
+
+  def __init__(self):
+    self.commands: Dict[str, CommandSpec] = {}
+
+  def register(self, name: str, handler: CommandHandler, usage: str | None = None,
+               min_args: int = 0, max_args: Optional[int] = None, description: str = '',
+               blocking: bool | BlockingPredicate = True, serialized: bool = False) -> CommandSpec:
+    """Register a command handler
+    Args:
+      name (str): Command name as sent by the client
+      handler (CommandHandler): Function (server, client_id, args) -> response
+      usage (str): Text for help, by default the command name
+      min_args (int): Min number of arguments (8100 if less)
+      max_args (int | None): Max number of arguments (8101 if more), None = no limit
+      description (str): Short description
+      blocking (bool | BlockingPredicate): False if the handler never blocks, or blocking(server, args)
+      serialized (bool): True if the handler waits for the execution coordinator
+    Returns:
+      CommandSpec: Registered command
+    """
+    if name in self.commands:
+      raise ValueError(f'Command already registered: {name}')
+
+    spec = CommandSpec(name, handler, usage or name, min_args, max_args, description, blocking, serialized)
+    self.commands[name] = spec
+    return spec
+
+  def command(self, name: str, usage: str | None = None, min_args: int = 0,
+              max_args: Optional[int] = None, description: str = '',
+              blocking: bool | BlockingPredicate = True, serialized: bool = False):
+    """Decorator to register a command handler, see register()
+    """
+    def decorator(handler: CommandHandler) -> CommandHandler:
+      self.register(name, handler, usage, min_args, max_args, description, blocking, serialized)
+      return handler
+    return decorator
+
+  def get(self, name: str) -> CommandSpec | None:
+    """Get command by name
+    """
+    return self.commands.get(name)
+
+  def help_text(self) -> str:
+    """Usage of all commands in registration order, e.g. 'status, start {cfg_id}, close, help'
+    """
+    return ', '.join(spec.usage for spec in self.commands.values())
+
+# Default registry used by the server
+registry = CommandRegistry()
@@ -0,0 +1,25 @@
+from ..command_registry import registry
+
+'''
+  description: Cache commands (cache)
+'''
+
+##############################################################
+##############################################################
+@registry.command('cache', usage='cache {flush|stats}', min_args=1, max_args=1, description='Flush cached Read_info responses or show cache counters', blocking=False)
+def cmd_cache(server, client_id: str, args: list[str]) -> str:
+  '''PLC command: cache {flush|stats}
+  Service response:
+    0000,{entries} entries flushed
+    0000,hits={hits} misses={misses} joined={joined} entries={entries}
+    8600,Unknown cache action: {action}
+  '''
+  cache = server.dcu_cache
+
+  if args[0] == 'flush':
+    return f'0000,{cache.flush()} entries flushed'
+
+  if args[0] == 'stats':
+    return f'0000,hits={cache.hits} misses={cache.misses} joined={cache.joined} entries={len(cache.entries)}'
+
+  return f'8600,Unknown cache action: {args[0]}'
@@ -0,0 +1,96 @@
+from ..command_registry import registry
+from ..capl_proxy import UpstreamError, CaplResponse
+from ..response_matcher import RESPONSE_OK, RESPONSE_NOK
+from ..models.canoe_cfg_model import CanOeCfgModel
+
+'''
+  description: DCU commands (Read_info, Window_control, DLK_IOControl).
+  Forwarded to the CAPL server of the running cfg through the multiplexing proxy,
+  the CAPL response is returned as is. OK responses of Read_info are cached while
+  their DCU stays selected in the CAPL node.
+'''
+
+# DCU commands handled by the CAPL node
+DCU_COMMANDS = {
+  'Read_info': ('Read_info {dcu_type}', 'Read sw, hw and sn of the DCU'),
+  'Window_control': ('Window_control {action}', 'Window UP, DOWN or STOP'),
+  'DLK_IOControl': ('DLK_IOControl {action}', 'Door LOCK or UNLOCK'),
+}
+
+def running_cfg(server) -> CanOeCfgModel | None:
+  '''Cfg of the running CANoe instance, None if no cfg is loaded'''
+  cfg_id = server.monitor.snapshot().cfg_id
+  return server.config.canOe.get_cfg_by_id(cfg_id) if cfg_id else None
+
+def dcu_request(server, cfg: CanOeCfgModel, command: str, timeout: float | None = None, cache: bool = True) -> CaplResponse:
+  '''Send command to the CAPL server of cfg, Read_info through the cache
+  Args:
+    cache (bool): False sends Read_info upstream (macro steps, the link is held)
+  Returns:
+    CaplResponse: Response, errors as 8501 and 8502 responses (outcome NOK)
+  '''
+  try:
+    name, *args = command.split(' ')
+
+    # Read_info: sw/hw/sn do not change while the DCU stays on the fixture.
+    # Served from cache only while the DCU is the target selected in CAPL, otherwise
+    # Read_info goes upstream to authenticate and activate it
+    if name == 'Read_info' and cache:
+      dcu_type = ' '.join(args)
+      return server.dcu_cache.get_or_load(
+        (cfg.id, dcu_type),
+        lambda: server.proxy.request(cfg, command, timeout),
+        keep=lambda response: response.outcome == RESPONSE_OK,
+        refresh=server.proxy.link(cfg).target != dcu_type
+      )
+
+    return server.proxy.request(cfg, command, timeout)
+
+  except TimeoutError:
+    return CaplResponse(f'8502,{cfg.id} No response from CAPL server', RESPONSE_NOK)
+
+  except UpstreamError as e:
+    return CaplResponse(f'8501,{cfg.id} CAPL server not available: {e}', RESPONSE_NOK)
+
+def forward(server, client_id: str, command: str) -> str:
+  '''Send command to the CAPL server of the running cfg
+  Service response:
+    {CAPL response}
+    8500,No cfg running
+    8501,{cfg_id} CAPL server not available: {error}
+    8502,{cfg_id} No response from CAPL server
+  '''
+  cfg = running_cfg(server)
+
+  if cfg is None:
+    return '8500,No cfg running'
+
+  return dcu_request(server, cfg, command).text
+
+def _dcu_handler(name: str):
+  def handler(server, client_id: str, args: list[str]) -> str:
+    return forward(server, client_id, ' '.join([name] + args))
+  return handler
+
+for _name, (_usage, _description) in DCU_COMMANDS.items():
+  registry.register(_name, _dcu_handler(_name), _usage, min_args=1, description=_description)
+
+##############################################################
+##############################################################
+@registry.command('upstream', max_args=0, description='State of the CAPL server connections', blocking=False)
+def cmd_upstream(server, client_id: str, args: list[str]) -> str:
+  '''PLC command: upstream
+  Service response:
+    0000,{cfg_id} {connected|disconnected} target={target} requests={requests} saved={saved} queued={queued}; ...
+    0000,No upstream connections
+  '''
+  links = list(server.proxy.links.values())
+
+  if not links:
+    return '0000,No upstream connections'
+
+  return '0000,' + '; '.join(
+    f'{link.cfg_id} {"connected" if link.sock else "disconnected"} target={link.target or "-"} '
+    f'requests={link.requests} saved={link.saved} queued={link.pending}'
+    for link in links
+  )
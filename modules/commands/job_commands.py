@@ -0,0 +1,27 @@
+from ..command_registry import registry
+
+'''
+  description: Job commands (job)
+'''
+
+##############################################################
+##############################################################
+@registry.command('job', usage='job {job_id}', min_args=1, max_args=1, description='State of an async job', blocking=False)
+def cmd_job(server, client_id: str, args: list[str]) -> str:
+  '''PLC command: job {job_id}
+  Service response:
+    0000,{job_id} {state} {elapsed}s (state: queued | loading | starting)
+    0000,{job_id} {state} {elapsed}s {response_code} (state: running | loaded | failed)
+    8301,Unknown job: {job_id}
+  '''
+  job = server.jobs.get(args[0])
+
+  if job is None:
+    return f'8301,Unknown job: {args[0]}'
+
+  response = f'0000,{job.id} {job.state} {job.elapsed:.1f}s'
+
+  if job.done:
+    response += f' {job.code or "????"}'
+
+  return response
@@ -0,0 +1,85 @@
+from ..command_registry import registry, RESPONSE_MISSING_PARAMETERS
+from ..response_matcher import RESPONSE_NOK
+from ..models.canoe_cfg_model import CanOeCfgModel
+from ..models.canoe_macro_model import CanOeMacroStepModel
+from .dcu_commands import DCU_COMMANDS, running_cfg, dcu_request
+
+'''
+  description: DCU batch commands (macro, batch).
+  Steps run one after the other on the CAPL server of the running cfg and are answered
+  with one line: every step response separated by "|". The upstream link is held for
+  the whole macro, a Read_info of another PLC cannot select other DCU between steps.
+'''
+
+def run_steps(server, cfg: CanOeCfgModel, name: str, steps: tuple[CanOeMacroStepModel, ...]) -> str:
+  '''Run DCU steps, stop at the first NOK step with abortOnNok
+  Args:
+    server: CANoeProxyTcpServer instance
+    cfg (CanOeCfgModel): Running cfg
+    name (str): Macro name, "batch" for inline steps
+    steps (tuple[CanOeMacroStepModel, ...]): Steps
+  Returns:
+    str: 0000,{name} {total}/{total}|{response_1}|...|{response_n}
+         8510,{name} aborted at step {step}/{total}|{response_1}|...|{response_step}
+  '''
+  # Only DCU commands, checked before sending anything
+  for step in steps:
+    if step.command.split(' ')[0] not in DCU_COMMANDS:
+      return f'8511,Invalid batch step: {step.command}'
+
+  responses = []
+
+  # Not through the cache: a joined cache load of another thread would wait for this link
+  with server.proxy.hold(cfg):
+    for number, step in enumerate(steps, start=1):
+      response = dcu_request(server, cfg, step.command, step.timeout, cache=False)
+      responses.append(response.text)
+
+      if response.outcome == RESPONSE_NOK and step.abortOnNok:
+        return f'8510,{name} aborted at step {number}/{len(steps)}|' + '|'.join(responses)
+
+  return f'0000,{name} {len(steps)}/{len(steps)}|' + '|'.join(responses)
+
+##############################################################
+##############################################################
+@registry.command('macro', usage='macro {name}', min_args=1, max_args=1, description='Run a DCU macro of the running cfg')
+def cmd_macro(server, client_id: str, args: list[str]) -> str:
+  '''PLC command: macro {name}
+  Service response:
+    0000,{name} {total}/{total}|{response_1}|...|{response_n}
+    8500,No cfg running
+    8510,{name} aborted at step {step}/{total}|{response_1}|...|{response_step}
+    8511,Invalid batch step: {command}
+    8512,{cfg_id} Unknown macro: {name}
+  '''
+  cfg = running_cfg(server)
+
+  if cfg is None:
+    return '8500,No cfg running'
+
+  macro = cfg.get_macro(args[0])
+
+  if macro is None:
+    return f'8512,{cfg.id} Unknown macro: {args[0]}'
+
+  return run_steps(server, cfg, macro.id, macro.steps)
+
+##############################################################
+##############################################################
+@registry.command('batch', usage='batch {command}; {command}...', min_args=1, description='Run DCU commands in one request, abort on the first NOK')
+def cmd_batch(server, client_id: str, args: list[str]) -> str:
+  '''PLC command: batch {command}; {command}; ...
+  Service response: same as macro, with name "batch"
+  '''
+  commands = [command.strip() for command in ' '.join(args).split(';')]
+  steps = tuple(CanOeMacroStepModel(command) for command in commands if command)
+
+  if not steps:
+    return RESPONSE_MISSING_PARAMETERS
+
+  cfg = running_cfg(server)
+
+  if cfg is None:
+    return '8500,No cfg running'
+
+  return run_steps(server, cfg, 'batch', steps)
@@ -0,0 +1,32 @@
+from ..command_registry import registry
+
+'''
+  description: Metrics commands (metrics, timings)
+'''
+
+##############################################################
+##############################################################
+@registry.command('metrics', max_args=0, description='Service metrics: gauges and p50/p95/p99 latency per command and backend', blocking=False)
+def cmd_metrics(server, client_id: str, args: list[str]) -> str:
+  '''PLC command: metrics
+  Service response:
+    0000,active_clients={n} ... {command}:n={count},p50={ms}ms,p95={ms}ms,p99={ms}ms ...
+  '''
+  return f'0000,{server.metrics.summary()}'
+
+##############################################################
+##############################################################
+@registry.command('timings', usage='timings {cfg_id}', min_args=1, max_args=1, description='Start phase durations of cfg_id (last starts)', blocking=False)
+def cmd_timings(server, client_id: str, args: list[str]) -> str:
+  '''PLC command: timings {cfg_id}
+  Service response:
+    0000,{cfg_id} {phase}:n={count},avg={ms}ms,p50={ms}ms,p95={ms}ms,max={ms}ms ...
+    0000,{cfg_id} no samples
+    8102,Unknown cfg_id: {cfg_id}
+  '''
+  cfg_id = args[0]
+
+  if server.config.canOe.get_cfg_by_id(cfg_id) is None:
+    return f'8102,Unknown cfg_id: {cfg_id}'
+
+  return f'0000,{server.timings.summary(cfg_id)}'
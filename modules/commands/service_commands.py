@@ -0,0 +1,168 @@
+from typing import Callable
+
+from ..command_registry import registry, RESPONSE_TOO_MANY_PARAMETERS
+from ..models.canoe_cfg_model import CanOeCfgModel
+from ..request_context import PhaseTrace, current_request, trace_phases, phase
+
+'''
+  description: Service commands (status, start, close, help)
+'''
+
+##############################################################
+##############################################################
+@registry.command('status', max_args=1, description='CANoe application status, "status fresh" forces a live read',
+                  blocking=lambda server, args: args == ['fresh'] or not server.monitor.cached)
+def cmd_status(server, client_id: str, args: list[str]) -> str:
+  '''PLC command: status [fresh]
+  Service response:
+    0000,{cfg_id} {cfg_file} measurement running
+    7000,{canoe_exe} closed
+    7001,No cfg file loaded
+    7002,{cfg_id} {cfg_file} waiting to start measurement
+    8000,Too many open {canoe_exe} instances
+    8101,Too many parameters
+  '''
+  # Only "fresh" is accepted as argument
+  if args and args[0] != 'fresh':
+    return RESPONSE_TOO_MANY_PARAMETERS
+
+  # Snapshot refreshed in background, live read on demand (state check phases traced)
+  with trace_phases() as trace:
+    if args and args[0] == 'fresh':
+      state = server.monitor.refresh()
+    else:
+      state = server.monitor.snapshot()
+
+  if state.cfg_id:
+    keep_phases(server, state.cfg_id, trace, 'status', force=True)
+
+  return state.status_response(server.config.canOe.exe)
+
+##############################################################
+##############################################################
+@registry.command('start', usage='start {cfg_id}', min_args=1, max_args=2, description='Start measurement with cfg_id, "start {cfg_id} async" returns a job id',
+                  serialized=True)
+def cmd_start(server, client_id: str, args: list[str]) -> str:
+  '''PLC command: start {cfg_id} [async]
+  Service response:
+    0000,{cfg_id} {cfg_file} measurement running
+    0000,{job_id} queued (async)
+    8100,Missing parameters
+    8101,Too many parameters
+    8102,Unknown cfg_id: {cfg_id}
+    8110,{cfg_id} Impossible to start measurement, file: {cfg_path}
+    8111,{cfg_id} Some error when opening file {cfg_path}
+    8300,Too many jobs (async)
+  '''
+  # Only "async" is accepted as second argument
+  if len(args) > 1 and args[1] != 'async':
+    return RESPONSE_TOO_MANY_PARAMETERS
+
+  # Cfg_id argument
+  cfg_id = args[0]
+  cfg: CanOeCfgModel = server.config.canOe.get_cfg_by_id(cfg_id)
+
+  if cfg is None:
+    return f'8102,Unknown cfg_id: {cfg_id}'
+
+  # Async: run as a job, PLC polls with "job {job_id}"
+  if len(args) > 1:
+    job = server.jobs.submit(f'start {cfg_id}', lambda progress: start_cfg(server, cfg, progress))
+
+    if job is None:
+      return '8300,Too many jobs'
+
+    return f'0000,{job.id} {job.state}'
+
+  # Start application
+  return start_cfg(server, cfg)
+
+def start_cfg(server, cfg: CanOeCfgModel, progress: Callable[[str], None] | None = None, start: bool = True) -> str:
+  '''Start measurement with cfg, a start of the same cfg_id in flight is joined.
+  Phases of the start are attached to the request and added to server.timings.
+  Args:
+    server: CANoeProxyTcpServer instance
+    cfg (CanOeCfgModel): Cfg to start
+    progress (Callable[[str], None] | None): Called with the phase: stopping, loading, starting
+    start (bool): False only loads the cfg (warmup)
+  Returns:
+    str: Response of the start command
+  '''
+  def start_measurement():
+    with phase('total'):
+      return server.backend.start_measurement(cfg, True, progress, start)
+
+  with trace_phases() as trace:
+    try:
+      return server.coordinator.run(f'{"start" if start else "load"}:{cfg.id}', start_measurement)
+    finally:
+      state_changed(server)
+      keep_phases(server, cfg.id, trace, 'start') # Joined starts have no phases
+
+def keep_phases(server, cfg_id: str, trace: PhaseTrace, operation: str, force: bool = False):
+  '''Add traced phases to server.timings, the debug log and the current request (structured log)
+  Args:
+    cfg_id (str): Cfg of the phases
+    trace (PhaseTrace): Phases traced, nothing to do without spans
+    operation (str): Operation traced, for the log (start, status)
+    force (bool): Keep state check phases only, see PhaseTimings.add
+  '''
+  if not trace.spans:
+    return
+
+  server.timings.add(cfg_id, trace, force)
+  server.log_debug(f'{operation} {cfg_id} phases: ' + ' '.join(f'{span.name}={span.seconds * 1000:.1f}ms' for span in trace.spans))
+
+  request = current_request.get()
+  if request is not None:
+    request.spans.extend(trace.spans)
+
+def state_changed(server):
+  '''CANoe state changed by a command: refresh snapshot, drop cached DCU responses and targets'''
+  server.monitor.invalidate()
+  server.dcu_cache.flush()
+  server.proxy.reset_targets()
+
+##############################################################
+##############################################################
+@registry.command('close', usage='close [soft|hard]', max_args=1, description='Close CANoe application, "close soft" stops the measurement and keeps CANoe open',
+                  serialized=True)
+def cmd_close(server, client_id: str, args: list[str]) -> str:
+  '''PLC command: close [soft|hard], by default canOe > closeMode
+  Service response:
+    0000,{canoe.exe} closed!
+    0000,{canoe_exe} measurement stopped (soft)
+    8200,Impossible to close {canoe_exe}. Force manually!
+    8201,Unknown close mode: {mode}
+  '''
+  canoe = server.config.canOe
+  canoe_exe = canoe.exe
+  mode = args[0] if args else canoe.closeMode
+
+  if mode not in ('soft', 'hard'):
+    return f'8201,Unknown close mode: {mode}'
+
+  try:
+    # Soft: CANoe stays open, kill only if the measurement could not be stopped
+    if mode == 'soft':
+      if server.coordinator.run('close:soft', server.backend.stop_measurement, canoe.softCloseUnload):
+        return f'0000,{canoe_exe} measurement stopped'
+      server.log_warning(f'Soft close failed, closing {canoe_exe}')
+
+    # Hard: a start blocked in CANoe does not hold the close, killing CANoe ends it
+    if server.coordinator.preempt('close', server.backend.close, wait=canoe.closeWaitTimeout):
+      return f'0000,{canoe_exe} closed!'
+
+    return f'8200,Impossible to close {canoe_exe}. Force manually!'
+  finally:
+    state_changed(server)
+
+##############################################################
+##############################################################
+@registry.command('help', description='List available commands', blocking=False)
+def cmd_help(server, client_id: str, args: list[str]) -> str:
+  '''PLC command: help
+  Service response:
+    0000,Available commands: status, start {cfg_id}, close, help
+  '''
+  return f'0000,Available commands: {server.commands.help_text()}'
@@ -0,0 +1,53 @@
+import math
+
+from ..command_registry import registry
+
+'''
+  description: Watch commands (watch, unwatch)
+'''
+
+##############################################################
+##############################################################
+@registry.command('watch', max_args=1, description='Push a status line on every CANoe state change, "watch {seconds}" adds a heartbeat',
+                  blocking=lambda server, args: not server.monitor.cached)
+def cmd_watch(server, client_id: str, args: list[str]) -> str:
+  '''PLC command: watch [heartbeat_s]
+  Service response: current status line (same responses as status),
+  then one status line, framed like the client's commands, every time the
+  state changes and every heartbeat_s seconds without changes.
+    8201,Invalid heartbeat: {heartbeat_s}
+  '''
+  heartbeat = 0.0
+
+  if args:
+    try:
+      heartbeat = float(args[0])
+    except ValueError:
+      heartbeat = math.nan
+
+    # Seconds > 0, nan and inf rejected
+    if not math.isfinite(heartbeat) or heartbeat <= 0:
+      return f'8201,Invalid heartbeat: {args[0]}'
+
+  # First state published before subscribing: it is sent as this response, not pushed
+  server.monitor.snapshot()
+
+  # Subscribe before reading, a change in between is queued (never lost) and
+  # pushed once this response is sent (the client handler activates the subscriber)
+  server.watch.subscribe(client_id, server.senders[client_id], heartbeat)
+
+  return server.monitor.snapshot().status_response(server.config.canOe.exe)
+
+##############################################################
+##############################################################
+@registry.command('unwatch', max_args=0, description='Stop pushing status lines', blocking=False)
+def cmd_unwatch(server, client_id: str, args: list[str]) -> str:
+  '''PLC command: unwatch
+  Service response:
+    0000,Watch stopped
+    8401,Not watching
+  '''
+  if not server.watch.unsubscribe(client_id):
+    return '8401,Not watching'
+
+  return '0000,Watch stopped'
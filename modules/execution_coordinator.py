@@ -0,0 +1,92 @@
+import threading
+import logging
+from concurrent.futures import Future
+from typing import Any, Callable
+
+'''
+  description: Execution coordinator for state-changing CANoe operations (start, close).
+  Operations run one at a time, and a request identical to one already queued or
+  running (same key, e.g. "start:MMA") joins it and gets the same result instead of
+  running the operation again. preempt() runs an operation (hard close) even if the
+  one running does not finish in time, e.g. a start blocked by CANoe.
+'''
+
+##############################################################
+# Class to serialize and coalesce operations
+##############################################################
+class ExecutionCoordinator:
+  """Single-flight execution of keyed operations
+  """
+
+  def __init__(self):
+    self.logger = logging.getLogger(self.__class__.__name__)
+    self.executed = 0 # Operations run
+    self.joined = 0 # Requests served by an operation in flight
+    self.preempted = 0 # Operations run while another one was still running
+    self._exec_lock = threading.Lock() # One operation at a time
+    self._inflight_lock = threading.Lock()
+    self._inflight: dict[str, Future] = {}
+
+  def run(self, key: str, fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run fn(*args, **kwargs) or join the operation in flight with the same key
+    Args:
+      key (str): Operation identity, e.g. 'start:MMA' or 'close'
+      fn (Callable): Operation
+    Returns:
+      Any: Result of the operation (exceptions are raised to every requester)
+    """
+    return self._run(key, fn, args, kwargs, -1)
+
+  def preempt(self, key: str, fn: Callable[..., Any], *args, wait: float, **kwargs) -> Any:
+    """Like run(), but fn runs anyway if the operation running does not finish in wait seconds
+    Args:
+      key (str): Operation identity, e.g. 'close'
+      fn (Callable): Operation that ends the running one (e.g. kill CANoe)
+      wait (float): Max seconds to wait for the running operation
+    Returns:
+      Any: Result of the operation
+    """
+    return self._run(key, fn, args, kwargs, wait)
+
+  def _run(self, key: str, fn: Callable[..., Any], args: tuple, kwargs: dict, wait: float) -> Any:
+    with self._inflight_lock:
+      future = self._inflight.get(key)
+      owner = future is None
+
+      if owner:
+        future = Future()
+        self._inflight[key] = future
+      else:
+        self.joined += 1
+
+    # Identical operation in flight: wait its result
+    if not owner:
+      self.logger.debug(f'Joined operation in flight: {key}')
+      return future.result()
+
+    locked = self._exec_lock.acquire(timeout=wait)
+    try:
+      if not locked:
+        self.preempted += 1
+        self.logger.warning(f'Operation in flight did not finish in {wait}s, running {key} anyway')
+
+      self.executed += 1
+      result = fn(*args, **kwargs)
+      future.set_result(result)
+      return result
+
+    except BaseException as e:
+      future.set_exception(e)
+      raise
+
+    finally:
+      if locked:
+        self._exec_lock.release()
+
+      with self._inflight_lock:
+        del self._inflight[key]
+
+  def in_flight(self, key: str) -> bool:
+    """True if an operation with this key is queued or running
+    """
+    return key in self._inflight
@@ -0,0 +1,121 @@
+import itertools
+import threading
+import time
+import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable
+
+'''
+  description: Asynchronous jobs for long-running commands (start {cfg_id} async).
+  A job runs in background and is polled with "job {id}". Finished jobs are kept
+  in a bounded table, the oldest finished jobs are evicted first.
+'''
+
+# Job states
+JOB_QUEUED = 'queued'
+JOB_LOADING = 'loading'
+JOB_STARTING = 'starting'
+JOB_RUNNING = 'running'
+JOB_LOADED = 'loaded' # Cfg loaded, measurement not started (warmup without startMeasurement)
+JOB_FAILED = 'failed'
+
+@dataclass
+class Job:
+  """Background job
+  """
+  id: str
+  command: str
+  state: str
+  created: float
+  finished: float | None = None
+  response: str | None = None
+
+  @property
+  def done(self) -> bool:
+    return self.state in (JOB_RUNNING, JOB_LOADED, JOB_FAILED)
+
+  @property
+  def elapsed(self) -> float:
+    """Seconds since creation, until finished
+    """
+    return (self.finished or time.monotonic()) - self.created
+
+  @property
+  def code(self) -> str | None:
+    """Response code of the final response, e.g. 0000 or 8110
+    """
+    return self.response.split(',', 1)[0] if self.response else None
+
+##############################################################
+# Class to run and keep jobs
+##############################################################
+class JobTable:
+  """Bounded table of background jobs
+  """
+
+  def __init__(self, max_jobs: int = 100, workers: int = 2):
+    """Constructor
+    Args:
+      max_jobs (int): Max jobs kept, finished jobs are evicted oldest first
+      workers (int): Jobs running at the same time
+    """
+    self.max_jobs = max_jobs
+    self.logger = logging.getLogger(self.__class__.__name__)
+    self.jobs: 'OrderedDict[str, Job]' = OrderedDict()
+    self._ids = itertools.count(1)
+    self._lock = threading.Lock()
+    self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='CANoeProxyJob')
+
+  def submit(self, command: str, fn: Callable[[Callable[[str], None]], str]) -> Job | None:
+    """Run fn(progress) in background
+    Args:
+      command (str): Command text, for information
+      fn (Callable): Operation, receives a progress(phase) callback and returns the final response
+    Returns:
+      Job | None: New job, None if the table is full of unfinished jobs
+    """
+    with self._lock:
+      if len(self.jobs) >= self.max_jobs and not self._evict_locked():
+        return None
+
+      job = Job(id=str(next(self._ids)), command=command, state=JOB_QUEUED, created=time.monotonic())
+      self.jobs[job.id] = job
+
+    self._executor.submit(self._run, job, fn)
+    return job
+
+  def get(self, job_id: str) -> Job | None:
+    """Get job by id
+    """
+    return self.jobs.get(job_id)
+
+  def shutdown(self):
+    """Stop accepting jobs
+    """
+    self._executor.shutdown(wait=False)
+
+  def _evict_locked(self) -> bool:
+    for job_id, job in self.jobs.items():
+      if job.done:
+        del self.jobs[job_id]
+        return True
+    return False
+
+  def _run(self, job: Job, fn: Callable[[Callable[[str], None]], str]):
+    def progress(phase: str):
+      job.state = JOB_STARTING if phase == 'starting' else JOB_LOADING
+
+    try:
+      response = fn(progress)
+    except Exception as e:
+      self.logger.error(f'Job {job.id} error: {e}')
+      response = None
+
+    job.response = response
+    job.finished = time.monotonic()
+    if job.code != '0000':
+      job.state = JOB_FAILED
+    else:
+      job.state = JOB_LOADED if response.endswith(' loaded') else JOB_RUNNING
@@ -0,0 +1,240 @@
+import bisect
+import threading
+import logging
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable
+
+from .request_context import RequestContext, BackendCall
+
+'''
+  description: Service metrics: command counters, latency histograms and backend call durations.
+  Histograms use fixed buckets (one bisect and three increments per observation), quantiles
+  are estimated from the buckets like Prometheus histogram_quantile. Metrics are read with
+  the "metrics" command or in Prometheus text format from a local HTTP endpoint.
+'''
+
+# Upper bounds (s) of the latency buckets, +Inf is implicit
+LATENCY_BUCKETS = (
+  0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+  1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0
+)
+
+##############################################################
+# Class for a fixed-bucket histogram
+##############################################################
+class Histogram:
+  """Latency histogram with fixed buckets
+  """
+
+  def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS):
+    self.buckets = buckets
+    self.counts = [0] * (len(buckets) + 1) # Last = +Inf
+    self.sum = 0.0
+    self.count = 0
+    self._lock = threading.Lock()
+
+  def observe(self, seconds: float):
+    """Add one observation
+    """
+    index = bisect.bisect_left(self.buckets, seconds)
+    with self._lock:
+      self.counts[index] += 1
+      self.sum += seconds
+      self.count += 1
+
+  def quantile(self, q: float) -> float | None:
+    """Estimated quantile (s), linear inside the bucket, None without observations
+    """
+    counts = list(self.counts)
+    total = sum(counts)
+
+    if total == 0:
+      return None
+
+    rank = q * total
+    seen = 0
+
+    for index, count in enumerate(counts):
+      if count and seen + count >= rank:
+        # +Inf bucket: highest finite bound
+        if index == len(self.buckets):
+          return self.buckets[-1]
+        lower = self.buckets[index - 1] if index > 0 else 0.0
+        return lower + (self.buckets[index] - lower) * (rank - seen) / count
+      seen += count
+
+    return self.buckets[-1]
+
+  def cumulative(self) -> list[tuple[str, int]]:
+    """Prometheus buckets: (le, cumulative count)
+    """
+    result, total = [], 0
+    for bound, count in zip(list(self.buckets) + ['+Inf'], list(self.counts)):
+      total += count
+      result.append((str(bound), total))
+    return result
+
+##############################################################
+# Class to collect service metrics
+##############################################################
+class Metrics:
+  """Counters and histograms of commands and backend calls
+  """
+
+  def __init__(self):
+    self.requests: dict[tuple[str, str], int] = {} # (command, code): count
+    self.latency: dict[str, Histogram] = {} # command: histogram
+    self.calls: dict[tuple[str, str], Histogram] = {} # (kind, name): histogram
+    self.gauges: dict[str, Callable[[], float]] = {} # name: read function
+    self._lock = threading.Lock() # Only to create new series
+
+  def add_gauge(self, name: str, read: Callable[[], float]):
+    """Value read when metrics are exported, e.g. active clients or cache hits
+    """
+    self.gauges[name] = read
+
+  def observe_request(self, request: RequestContext, command: str):
+    """Count one finished command
+    Args:
+      request (RequestContext): Finished request
+      command (str): Command label, 'unknown' for unknown commands
+    """
+    key = (command, request.code or 'raw')
+    histogram = self.latency.get(command) or self._series(self.latency, command)
+
+    with self._lock:
+      self.requests[key] = self.requests.get(key, 0) + 1
+    histogram.observe(request.elapsed)
+
+  def observe_call(self, call: BackendCall):
+    """Observe one backend call (request_context call observer)
+    """
+    key = (call.kind, call.name)
+    (self.calls.get(key) or self._series(self.calls, key)).observe(call.seconds)
+
+  def _series(self, table: dict, key) -> Histogram:
+    with self._lock:
+      return table.setdefault(key, Histogram())
+
+  ##############################################################
+  # Export
+  ##############################################################
+  def summary(self) -> str:
+    """One line: gauges, then p50/p95/p99 (ms) of every command and backend call kind
+    """
+    parts = [f'{name}={self._read(read):g}' for name, read in self.gauges.items()]
+
+    for command, histogram in sorted(self.latency.items()):
+      parts.append(f'{command}:n={histogram.count},{self._percentiles(histogram)}')
+
+    # Backend calls grouped by kind
+    kinds: dict[str, Histogram] = {}
+    for (kind, name), histogram in list(self.calls.items()):
+      merged = kinds.setdefault(kind, Histogram())
+      merged.counts = [a + b for a, b in zip(merged.counts, histogram.counts)]
+      merged.count += histogram.count
+
+    for kind, histogram in sorted(kinds.items()):
+      parts.append(f'{kind}:n={histogram.count},{self._percentiles(histogram)}')
+
+    return ' '.join(parts)
+
+  def prometheus(self) -> str:
+    """Prometheus text exposition format
+    """
+    lines = [
+      '# HELP canoe_proxy_requests_total Commands executed by command and response code',
+      '# TYPE canoe_proxy_requests_total counter',
+    ]
+    for (command, code), count in sorted(list(self.requests.items())):
+      lines.append(f'canoe_proxy_requests_total{{command="{command}",code="{code}"}} {count}')
+
+    lines += [
+      '# HELP canoe_proxy_request_seconds Command execution time',
+      '# TYPE canoe_proxy_request_seconds histogram',
+    ]
+    for command, histogram in sorted(list(self.latency.items())):
+      lines += self._histogram_lines('canoe_proxy_request_seconds', f'command="{command}"', histogram)
+
+    lines += [
+      '# HELP canoe_proxy_backend_call_seconds Duration of COM, psutil, CAPL upstream and simulator calls',
+      '# TYPE canoe_proxy_backend_call_seconds histogram',
+    ]
+    for (kind, name), histogram in sorted(list(self.calls.items())):
+      lines += self._histogram_lines('canoe_proxy_backend_call_seconds', f'kind="{kind}",name="{name}"', histogram)
+
+    for name, read in self.gauges.items():
+      lines += [f'# TYPE canoe_proxy_{name} gauge', f'canoe_proxy_{name} {self._read(read):g}']
+
+    return '\n'.join(lines) + '\n'
+
+  @staticmethod
+  def _histogram_lines(metric: str, labels: str, histogram: Histogram) -> list[str]:
+    lines = [f'{metric}_bucket{{{labels},le="{le}"}} {count}' for le, count in histogram.cumulative()]
+    lines.append(f'{metric}_sum{{{labels}}} {histogram.sum:.6f}')
+    lines.append(f'{metric}_count{{{labels}}} {histogram.count}')
+    return lines
+
+  @staticmethod
+  def _percentiles(histogram: Histogram) -> str:
+    values = []
+    for label, q in (('p50', 0.5), ('p95', 0.95), ('p99', 0.99)):
+      value = histogram.quantile(q)
+      values.append(f'{label}={value * 1000:.1f}ms' if value is not None else f'{label}=-')
+    return ','.join(values)
+
+  @staticmethod
+  def _read(read: Callable[[], float]) -> float:
+    try:
+      return float(read())
+    except Exception:
+      return float('nan')
+
+##############################################################
+# Class to serve metrics over HTTP
+##############################################################
+class MetricsHttpServer:
+  """GET /metrics in Prometheus text format, local connections only
+  """
+
+  def __init__(self, metrics: Metrics, port: int, host: str = '127.0.0.1'):
+    """Constructor
+    Args:
+      metrics (Metrics): Metrics to export
+      port (int): TCP port
+      host (str): Listen address, local only by default
+    """
+    self.logger = logging.getLogger(self.__class__.__name__)
+
+    class Handler(BaseHTTPRequestHandler):
+      def do_GET(handler):
+        if handler.path.split('?')[0] != '/metrics':
+          handler.send_error(404)
+          return
+
+        body = metrics.prometheus().encode('utf-8')
+        handler.send_response(200)
+        handler.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        handler.send_header('Content-Length', str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+      def log_message(handler, format, *args):
+        pass # No access log
+
+    self.httpd = ThreadingHTTPServer((host, port), Handler)
+    self.httpd.daemon_threads = True
+    self._thread = threading.Thread(target=self.httpd.serve_forever, name=self.__class__.__name__, daemon=True)
+
+  def start(self):
+    """Serve in background
+    """
+    self._thread.start()
+    host, port = self.httpd.server_address[:2]
+    self.logger.info(f'Metrics on http://{host}:{port}/metrics')
+
+  def stop(self):
+    """Stop serving
+    """
+    self.httpd.shutdown()
+    self.httpd.server_close()
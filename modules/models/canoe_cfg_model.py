@@ -1,6 +1,7 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import List, Optional, Dict, Any
 from .canoe_command_model import CanOeCommandModel
+from .canoe_macro_model import CanOeMacroModel
 
 '''
   author: cyanezf YF-Controls
@@ -18,19 +19,47 @@ class CanOeCfgModel:
   path: str
   host: str
   port: int
-  #commands: list[CanOeCommandModel]
+  startTimeout: float = 30.0 # Wait budget (s) of start: stop previous measurement, open cfg, start measurement
+  commands: list[CanOeCommandModel] = field(default_factory=list) # Expected CAPL responses of DCU commands
+  macros: list[CanOeMacroModel] = field(default_factory=list) # Named sequences of DCU commands
 
   @classmethod
   def from_dic(cls, data: Dict[str, Any]) -> 'CanOeCfgModel':
     """Create CanOeCfgModel from dictionary
     """
-    #commands = [CanOeCommandModel.from_dic(cmd) for cmd in data.get('commands', [])]
+    commands = [CanOeCommandModel.from_dic(cmd) for cmd in data.get('commands', [])]
+    macros = [CanOeMacroModel.from_dic(macro) for macro in data.get('macros', [])]
     return cls(
       id = data['id'],
       description = data.get('description', 'No description provided'),
       path = data['path'],
       host = data['host'],
       port = data['port'],
-      #commands = commands
+      startTimeout = data.get('startTimeout', 30.0),
+      commands = commands,
+      macros = macros
     )
 
+  def get_command(self, command_id: str) -> CanOeCommandModel | None:
+    '''Get command definition by id (command name, e.g. Read_info)
+    Args:
+      command_id (str): Command name
+    Returns:
+      CanOeCommandModel | None: Definition if found, otherwise None
+    '''
+    for command in self.commands:
+      if command.id == command_id:
+        return command
+    return None
+
+  def get_macro(self, macro_id: str) -> CanOeMacroModel | None:
+    '''Get macro by id
+    Args:
+      macro_id (str): Macro name
+    Returns:
+      CanOeMacroModel | None: Macro if found, otherwise None
+    '''
+    for macro in self.macros:
+      if macro.id == macro_id:
+        return macro
+    return None
@@ -2,15 +2,15 @@ from dataclasses import dataclass
 from typing import List, Dict, Any
 
 
-@dataclass
+@dataclass(frozen=True)
 class CanOeCommandModel:
   """CanOe Command model
   """
   id: str
   description: str
-  parameter: list[str]
+  parameter: tuple[str, ...] # Argument names, usable as {name} in responses
   responseOk: str
-  responseNok: list[str]
+  responseNok: tuple[str, ...]
   responseTimeout: float = 5.0
   
   @classmethod
@@ -18,9 +18,9 @@ class CanOeCommandModel:
     """Create CanOeCommandModel from dictionary"""
     return cls(
       id = data['id'],
-      description = data['description'],
-      parameter = data['parameter'],
+      description = data.get('description', 'No description provided'),
+      parameter = tuple(data.get('parameter', [])),
       responseOk = data['responseOk'],
-      responseNok = data['responseNok'],
+      responseNok = tuple(data.get('responseNok', [])),
       responseTimeout = data.get('responseTimeout', 5.0)
     )
\ No newline at end of file
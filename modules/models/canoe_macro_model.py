@@ -0,0 +1,45 @@
+from dataclasses import dataclass
+from typing import Dict, Any
+
+'''
+  description: DCU macro model for CanOeService (config.json > canOe > cfgs > macros)
+'''
+
+@dataclass(frozen=True)
+class CanOeMacroStepModel:
+  """One DCU command of a macro
+  """
+  command: str # e.g. 'Window_control UP'
+  timeout: float | None = None # Seconds, by default the command responseTimeout
+  abortOnNok: bool = True # Stop the macro on a NOK response
+
+  @classmethod
+  def from_dic(cls, data: Dict[str, Any] | str) -> 'CanOeMacroStepModel':
+    """Create CanOeMacroStepModel from dictionary or command text
+    """
+    if isinstance(data, str):
+      return cls(command=data)
+
+    return cls(
+      command = data['command'],
+      timeout = data.get('timeout'),
+      abortOnNok = data.get('abortOnNok', True)
+    )
+
+@dataclass(frozen=True)
+class CanOeMacroModel:
+  """Named sequence of DCU commands
+  """
+  id: str
+  description: str
+  steps: tuple[CanOeMacroStepModel, ...]
+
+  @classmethod
+  def from_dic(cls, data: Dict[str, Any]) -> 'CanOeMacroModel':
+    """Create CanOeMacroModel from dictionary
+    """
+    return cls(
+      id = data['id'],
+      description = data.get('description', 'No description provided'),
+      steps = tuple(CanOeMacroStepModel.from_dic(step) for step in data.get('steps', []))
+    )
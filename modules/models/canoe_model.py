@@ -1,6 +1,7 @@
 from dataclasses import dataclass
 from typing import List, Dict, Any
 from .canoe_cfg_model import CanOeCfgModel
+from .simulator_model import SimulatorModel
 
 '''
   author: cyanezf YF-Controls
@@ -16,6 +17,12 @@ class CanOeModel:
   path: str
   exe: str
   cfgs: list[CanOeCfgModel]
+  backend: str = 'com' # com | sim
+  simulator: SimulatorModel | None = None
+  processVerifyInterval: float = 5.0 # Max seconds between process table scans (new instances launched outside the service)
+  closeMode: str = 'hard' # Mode of "close" without argument: hard (kill CANoe) | soft (stop measurement)
+  softCloseUnload: bool = False # Soft close also unloads the cfg
+  closeWaitTimeout: float = 2.0 # Seconds a hard close waits for a start in progress before closing CANoe anyway
 
   @classmethod
   def from_dic(cls, data: Dict[str, Any]) -> 'CanOeModel':
@@ -25,7 +32,13 @@ class CanOeModel:
     return cls(
       path = data['path'],
       exe = data['exe'],
-      cfgs = cfgs
+      cfgs = cfgs,
+      backend = data.get('backend', 'com'),
+      simulator = SimulatorModel.from_dic(data.get('simulator')),
+      processVerifyInterval = data.get('processVerifyInterval', 5.0),
+      closeMode = data.get('closeMode', 'hard'),
+      softCloseUnload = data.get('softCloseUnload', False),
+      closeWaitTimeout = data.get('closeWaitTimeout', 2.0)
     )
   
   def get_cfg_id_by_path(self, path: str) -> Dict[str, None]:
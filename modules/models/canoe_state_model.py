@@ -0,0 +1,41 @@
+from dataclasses import dataclass
+
+'''
+  description: CANoe application state model for CanOeService
+'''
+
+@dataclass(frozen=True)
+class CanoeState:
+  """Snapshot of the CANoe application state
+  """
+  process_count: int
+  pid: int | None
+  cfg_path: str | None
+  cfg_id: str | None
+  measurement_running: bool
+  timestamp: float
+
+  def status_response(self, canoe_exe: str) -> str:
+    '''Response of the status command for this state
+    Returns:
+      str: 0000,{cfg_id} {cfg_file} measurement running\n
+      7000,{canoe_exe} closed\n
+      7001,No cfg file loaded\n
+      7002,{cfg_id} {cfg_file} waiting to start measurement\n
+      8000,Too many open {canoe_exe} instances
+    '''
+    if self.process_count < 1:
+      return f'7000,{canoe_exe} closed'
+
+    if self.process_count > 1:
+      return f'8000,Too many open {canoe_exe} instances'
+
+    if self.cfg_path is None:
+      return f'7001,No cfg file loaded'
+
+    cfg_id = self.cfg_id if self.cfg_id is not None else '???'
+
+    if self.measurement_running:
+      return f'0000,{cfg_id} {self.cfg_path} measurement running'
+
+    return f'7002,{cfg_id} {self.cfg_path} waiting to start measurement'
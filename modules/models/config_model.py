@@ -6,6 +6,7 @@ from pathlib import Path
 from .service_model import ServiceModel
 from .canoe_model import CanOeModel
 from .log_model import LogModel
+from .warmup_model import WarmupModel
 
 '''
   author: cyanezf YF-Controls
@@ -25,6 +26,7 @@ class ConfigModel:
   service: ServiceModel
   canOe: CanOeModel
   log: LogModel
+  warmup: WarmupModel = field(default_factory=WarmupModel)
   
   @classmethod
   def from_dic(cls, data: Dict[str, Any]) -> 'ConfigModel':
@@ -37,7 +39,8 @@ class ConfigModel:
       author = data['author'],
       service = ServiceModel.from_dic(data['service']),
       canOe = CanOeModel.from_dic(data['canOe']),
-      log = LogModel.from_dic(data['log'])
+      log = LogModel.from_dic(data['log']),
+      warmup = WarmupModel.from_dic(data.get('warmup'))
     )
 
   @classmethod
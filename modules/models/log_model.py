@@ -1,5 +1,6 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Dict, Any
+from .request_log_model import RequestLogModel
 
 
 '''
@@ -20,6 +21,9 @@ class LogModel:
   maxSize: int
   maxFiles: int
   format: str
+  queueSize: int = 10000 # Records waiting to be written by the log thread, 0 = write in the caller thread
+  queueBlockLevel: str = 'WARNING' # Queue full: lower levels are dropped, this level or higher wait
+  requestLog: RequestLogModel = field(default_factory=RequestLogModel) # Structured log, one JSON line per command
 
   @classmethod
   def from_dic(cls, data: Dict[str, Any]) -> 'LogModel':
@@ -32,7 +36,10 @@ class LogModel:
       filePath = data.get('filePath', r"c:\CanOeProxy.log"),
       maxSize = data.get('maxSize', 10485760),# 10 MB
       maxFiles = data.get('maxFiles', 20),
-      format = data.get('format', "%(asctime)s [%(levelname)-8s] %(message)-80s [%(name)s , %(funcName)s , %(lineno)d]")
+      format = data.get('format', "%(asctime)s [%(levelname)-8s] %(message)-80s [%(name)s , %(funcName)s , %(lineno)d]"),
+      queueSize = data.get('queueSize', 10000),
+      queueBlockLevel = data.get('queueBlockLevel', 'WARNING'),
+      requestLog = RequestLogModel.from_dic(data.get('requestLog'))
     )
     
     
\ No newline at end of file
@@ -0,0 +1,31 @@
+from dataclasses import dataclass
+from typing import Dict, Any
+
+'''
+  description: Structured request log model for CanOeService (config.json > log > requestLog)
+'''
+
+@dataclass
+class RequestLogModel:
+  """Request log model class, one JSON line per command
+  """
+  enabled: bool = False
+  filePath: str = r'C:\CANoeProxyService\logs\requests.jsonl'
+  maxSize: int = 10485760 # 10 MB
+  maxFiles: int = 5
+  batchSize: int = 100 # Max records per write
+  flushInterval: float = 1.0 # Max seconds a record waits to be written
+
+  @classmethod
+  def from_dic(cls, data: Dict[str, Any] | None) -> 'RequestLogModel':
+    """Create RequestLogModel from dictionary, disabled if missing
+    """
+    data = data or {}
+    return cls(
+      enabled = data.get('enabled', False),
+      filePath = data.get('filePath', r'C:\CANoeProxyService\logs\requests.jsonl'),
+      maxSize = data.get('maxSize', 10485760),
+      maxFiles = data.get('maxFiles', 5),
+      batchSize = data.get('batchSize', 100),
+      flushInterval = data.get('flushInterval', 1.0)
+    )
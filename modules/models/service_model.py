@@ -17,6 +17,16 @@ class ServiceModel:
   description: str
   host: str
   port: int
+  mode: str = 'threaded' # threaded | asyncio
+  workers: int = 4 # Executor size for blocking work in asyncio mode
+  serialWorkers: int = 16 # Executor size for start/close in asyncio mode, they wait for each other
+  frameTimeout: float = 0.05 # Idle time (s) to accept a command without terminator, 0 = end of packet
+  statusInterval: float = 1.0 # Refresh period (s) of the CANoe state snapshot, 0 = live read on every status
+  maxJobs: int = 100 # Async jobs kept, finished jobs are evicted oldest first
+  dcuTimeout: float = 5.0 # Seconds to wait the CAPL server response of a DCU command
+  dcuDrain: float = 0.2 # Quiet time (s) that ends a CAPL server response
+  dcuCacheTtl: float = 300.0 # Seconds a Read_info response is cached, 0 = no cache
+  metricsPort: int = 0 # Local HTTP port of the Prometheus metrics (127.0.0.1), 0 = disabled
 
   @classmethod
   def from_dic(cls, data: Dict[str, Any]) -> 'ServiceModel':
@@ -27,5 +37,15 @@ class ServiceModel:
       displayName = data['displayName'],
       description = data['description'],
       host = data['host'],
-      port = data['port']
-    )
\ No newline at end of file
+      port = data['port'],
+      mode = data.get('mode', 'threaded'),
+      workers = data.get('workers', 4),
+      serialWorkers = data.get('serialWorkers', 16),
+      frameTimeout = data.get('frameTimeout', 0.05),
+      statusInterval = data.get('statusInterval', 1.0),
+      maxJobs = data.get('maxJobs', 100),
+      dcuTimeout = data.get('dcuTimeout', 5.0),
+      dcuDrain = data.get('dcuDrain', 0.2),
+      dcuCacheTtl = data.get('dcuCacheTtl', 300.0),
+      metricsPort = data.get('metricsPort', 0)
+    )
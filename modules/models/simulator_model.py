@@ -0,0 +1,83 @@
+from dataclasses import dataclass, field
+import random
+from typing import Dict, Any
+
+'''
+  description: CANoe simulator model for CanOeService
+'''
+
+@dataclass
+class LatencyModel:
+  """Latency distribution of one simulated operation (seconds)
+  """
+  mean: float = 0.0
+  stddev: float = 0.0
+  min: float = 0.0
+  max: float | None = None
+  samples: list[float] = field(default_factory=list) # Recorded latencies, used instead of mean/stddev
+
+  @classmethod
+  def from_dic(cls, data: Dict[str, Any] | float | int | None) -> 'LatencyModel':
+    """Create LatencyModel from dictionary, a number is a fixed latency
+    """
+    if data is None:
+      return cls()
+
+    if isinstance(data, (int, float)):
+      return cls(mean = float(data))
+
+    return cls(
+      mean = data.get('mean', 0.0),
+      stddev = data.get('stddev', 0.0),
+      min = data.get('min', 0.0),
+      max = data.get('max', None),
+      samples = data.get('samples', [])
+    )
+
+  def sample(self, rng: random.Random) -> float:
+    """Get one latency value
+    """
+    if self.samples:
+      value = rng.choice(self.samples)
+    elif self.stddev > 0:
+      value = rng.gauss(self.mean, self.stddev)
+    else:
+      value = self.mean
+
+    value = max(self.min, value)
+    return min(self.max, value) if self.max is not None else value
+
+@dataclass
+class SimulatorModel:
+  """Simulated CANoe latencies and failure injection
+  """
+  launch: LatencyModel # Process launch and license/driver init
+  open: LatencyModel # Cfg file open
+  start: LatencyModel # Measurement start
+  stop: LatencyModel # Measurement stop
+  close: LatencyModel # Process termination
+  state: LatencyModel # Process scan + COM state read
+  openFailureRate: float = 0.0
+  startFailureRate: float = 0.0
+  closeFailureRate: float = 0.0
+  timeScale: float = 1.0 # Multiplier of all latencies, e.g. 0.01 for CI
+  seed: int | None = None
+
+  @classmethod
+  def from_dic(cls, data: Dict[str, Any] | None) -> 'SimulatorModel':
+    """Create SimulatorModel from dictionary, defaults are typical bench values
+    """
+    data = data or {}
+    return cls(
+      launch = LatencyModel.from_dic(data.get('launch', {'mean': 4.0, 'stddev': 0.5, 'min': 2.0})),
+      open = LatencyModel.from_dic(data.get('open', {'mean': 3.0, 'stddev': 0.5, 'min': 1.0})),
+      start = LatencyModel.from_dic(data.get('start', {'mean': 1.0, 'stddev': 0.2, 'min': 0.3})),
+      stop = LatencyModel.from_dic(data.get('stop', {'mean': 0.5, 'stddev': 0.1, 'min': 0.1})),
+      close = LatencyModel.from_dic(data.get('close', {'mean': 0.5, 'stddev': 0.1, 'min': 0.1})),
+      state = LatencyModel.from_dic(data.get('state', {'mean': 0.02, 'stddev': 0.005, 'min': 0.005})),
+      openFailureRate = data.get('openFailureRate', 0.0),
+      startFailureRate = data.get('startFailureRate', 0.0),
+      closeFailureRate = data.get('closeFailureRate', 0.0),
+      timeScale = data.get('timeScale', 1.0),
+      seed = data.get('seed', None)
+    )
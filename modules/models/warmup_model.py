@@ -0,0 +1,25 @@
+from dataclasses import dataclass
+from typing import Dict, Any
+
+'''
+  description: Warm standby model for CanOeService (config.json > warmup)
+'''
+
+@dataclass
+class WarmupModel:
+  """Warmup model class, CANoe is launched and the default cfg loaded when the service starts
+  """
+  enabled: bool = False
+  cfgId: str = '' # Default cfg_id
+  startMeasurement: bool = True # True starts the measurement, False only loads the cfg
+
+  @classmethod
+  def from_dic(cls, data: Dict[str, Any] | None) -> 'WarmupModel':
+    """Create WarmupModel from dictionary, disabled if missing
+    """
+    data = data or {}
+    return cls(
+      enabled = data.get('enabled', False),
+      cfgId = data.get('cfgId', ''),
+      startMeasurement = data.get('startMeasurement', True)
+    )
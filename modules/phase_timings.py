@@ -0,0 +1,71 @@
+import threading
+from collections import deque
+
+from .request_context import PhaseTrace
+
+'''
+  description: Rolling statistics of the start phases of every cfg.
+  start_cfg traces the phases of start_measurement (stop, open, start...) and adds the
+  trace here, the last "window" durations of every phase are kept per cfg_id and
+  summarized by the "timings {cfg_id}" command. Live state reads (status) add their
+  state check phases (state_processes, state_app...) to the cfg loaded.
+'''
+
+# State check phases (backend read_state and vector_canoe state helpers)
+STATE_PHASES = {'state_processes', 'state_app', 'state_cfg', 'state_measurement'}
+
+# Phases of a start without work (cfg already running), not kept: they would hide switch times
+NOOP_PHASES = {'read_state', 'total'} | STATE_PHASES
+
+##############################################################
+# Class to keep phase durations per cfg
+##############################################################
+class PhaseTimings:
+  """Last durations of every phase, per cfg_id
+  """
+
+  def __init__(self, window: int = 50):
+    """Constructor
+    Args:
+      window (int): Durations kept per phase
+    """
+    self.window = window
+    self.samples: dict[str, dict[str, deque[float]]] = {} # cfg_id: {phase: durations (s)}
+    self._lock = threading.Lock()
+
+  def add(self, cfg_id: str, trace: PhaseTrace, force: bool = False) -> bool:
+    """Add the phases of one start (or state check)
+    Args:
+      cfg_id (str): Cfg started (or loaded)
+      trace (PhaseTrace): Phases traced while starting
+      force (bool): Keep a trace with only no-op phases (state checks)
+    Returns:
+      bool: False if ignored (cfg already running)
+    """
+    if not trace.spans or (not force and all(span.name in NOOP_PHASES for span in trace.spans)):
+      return False
+
+    with self._lock:
+      phases = self.samples.setdefault(cfg_id, {})
+      for span in trace.spans:
+        phases.setdefault(span.name, deque(maxlen=self.window)).append(span.seconds)
+    return True
+
+  def summary(self, cfg_id: str) -> str:
+    """One line per cfg: every phase with count, mean, p50, p95 and max (ms)
+    """
+    with self._lock:
+      phases = {name: sorted(durations) for name, durations in self.samples.get(cfg_id, {}).items()}
+
+    if not phases:
+      return f'{cfg_id} no samples'
+
+    parts = [cfg_id]
+    for name, durations in phases.items():
+      count = len(durations)
+      mean = sum(durations) / count
+      p50 = durations[(count - 1) // 2]
+      p95 = durations[min(count - 1, int(count * 0.95))]
+      parts.append(f'{name}:n={count},avg={mean * 1000:.1f}ms,p50={p50 * 1000:.1f}ms,p95={p95 * 1000:.1f}ms,max={durations[-1] * 1000:.1f}ms')
+
+    return ' '.join(parts)
@@ -0,0 +1,179 @@
+import itertools
+import string
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+'''
+  description: Context of the command being executed (request id, timings, backend calls).
+  execute_command opens one RequestContext per command, backend code reports its calls
+  with backend_call() and they are attached to the current request:
+
+    with backend_call('psutil', 'get_running_processes'):
+      pids = get_running_processes(exe)
+
+  Call observers (metrics) are notified of every backend call, with or without request.
+
+  Long operations (start_measurement) mark their phases with phase(), spans are kept
+  when the caller opened a trace:
+
+    with trace_phases() as trace:
+      backend.start_measurement(cfg)
+    print(trace.spans)
+'''
+
+# Backend call kinds
+CALL_COM = 'com'
+CALL_PSUTIL = 'psutil'
+CALL_UPSTREAM = 'upstream'
+CALL_SIM = 'sim'
+
+@dataclass
+class BackendCall:
+  """One backend call of a request
+  """
+  kind: str # com | psutil | upstream | sim
+  name: str # Function or command, e.g. start_measurement
+  seconds: float
+
+@dataclass
+class PhaseSpan:
+  """One phase of a traced operation
+  """
+  name: str # e.g. stop, open_wait, start
+  offset: float # Seconds from the start of the trace
+  seconds: float
+
+@dataclass
+class PhaseTrace:
+  """Phases of one operation, in the order they finished
+  """
+  started: float = field(default_factory=time.perf_counter)
+  spans: list[PhaseSpan] = field(default_factory=list)
+
+@dataclass
+class RequestContext:
+  """One command received from a client
+  """
+  id: int
+  client_id: str
+  command: str
+  args: list[str]
+  received: float # perf_counter when the command was framed
+  started: float = field(default_factory=time.perf_counter)
+  finished: float | None = None
+  response: str | None = None
+  calls: list[BackendCall] = field(default_factory=list)
+  spans: list[PhaseSpan] = field(default_factory=list)
+  processes: Any = None # Process table snapshot shared by the calls of the request (process_util.request_snapshot)
+
+  @property
+  def wait(self) -> float:
+    """Seconds between framing and execution (pipelined commands, executor queue)
+    """
+    return max(0.0, self.started - self.received)
+
+  @property
+  def elapsed(self) -> float:
+    """Execution seconds
+    """
+    return (self.finished or time.perf_counter()) - self.started
+
+  @property
+  def code(self) -> str | None:
+    """Response code (0000, 8FFF...), None for raw CAPL responses
+    """
+    if self.response and len(self.response) > 4 and self.response[4] == ',' and all(c in string.hexdigits for c in self.response[:4]):
+      return self.response[:4]
+    return None
+
+current_request: ContextVar[RequestContext | None] = ContextVar('current_request', default=None)
+current_trace: ContextVar[PhaseTrace | None] = ContextVar('current_trace', default=None)
+_ids = itertools.count(1)
+_observers: list[Callable[[BackendCall], None]] = []
+
+def new_request(client_id: str, command: str, args: list[str], received: float | None = None) -> RequestContext:
+  """Create the context of a command and make it current in this thread
+  Args:
+    client_id (str): Client id
+    command (str): Command name
+    args (list[str]): Arguments
+    received (float | None): perf_counter when the command was framed, by default now
+  Returns:
+    RequestContext: New context
+  """
+  request = RequestContext(next(_ids), client_id, command, args, received or time.perf_counter())
+  current_request.set(request)
+  return request
+
+def end_request(request: RequestContext, response: str | None):
+  """Finish the context of a command, the thread has no current request afterwards
+  """
+  request.finished = time.perf_counter()
+  request.response = response
+  current_request.set(None)
+
+def add_call_observer(observer: Callable[[BackendCall], None]):
+  """Call observer(call) after every backend call, until remove_call_observer(observer)
+  """
+  _observers.append(observer)
+
+def remove_call_observer(observer: Callable[[BackendCall], None]):
+  """Stop calling an observer added with add_call_observer (e.g. server stopped)
+  """
+  try:
+    _observers.remove(observer)
+  except ValueError:
+    pass
+
+@contextmanager
+def backend_call(kind: str, name: str):
+  """Measure a backend call and attach it to the current request
+  Args:
+    kind (str): CALL_COM | CALL_PSUTIL | CALL_UPSTREAM | CALL_SIM
+    name (str): Function or command name
+  """
+  start = time.perf_counter()
+  try:
+    yield
+  finally:
+    call = BackendCall(kind, name, time.perf_counter() - start)
+    request = current_request.get()
+
+    if request is not None:
+      request.calls.append(call)
+
+    for observer in _observers:
+      observer(call)
+
+@contextmanager
+def trace_phases():
+  """Open a trace, phase() spans of this context are added to it
+  Yields:
+    PhaseTrace: Trace of the operation
+  """
+  trace = PhaseTrace()
+  token = current_trace.set(trace)
+  try:
+    yield trace
+  finally:
+    current_trace.reset(token)
+
+@contextmanager
+def phase(name: str):
+  """Measure one phase of the traced operation, nothing to do without trace
+  Args:
+    name (str): Phase name
+  """
+  trace = current_trace.get()
+  if trace is None:
+    yield
+    return
+
+  start = time.perf_counter()
+  try:
+    yield
+  finally:
+    trace.spans.append(PhaseSpan(name, start - trace.started, time.perf_counter() - start))
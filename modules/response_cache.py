@@ -0,0 +1,114 @@
+import threading
+import time
+import logging
+from concurrent.futures import Future
+from typing import Any, Callable, Hashable
+
+'''
+  description: TTL cache of slow DCU responses (Read_info), keyed by (cfg_id, dcu_type).
+  Concurrent identical requests are served by one upstream call. Entries are flushed
+  when the CANoe state changes (measurement restart, cfg change), on start/close and
+  with the "cache flush" command, and invalidated one by one (target change).
+'''
+
+##############################################################
+# Class to cache responses with time to live
+##############################################################
+class ResponseCache:
+  """TTL cache with single-flight loads
+  """
+
+  def __init__(self, ttl: float = 300.0):
+    """Constructor
+    Args:
+      ttl (float): Seconds an entry is valid, 0 = cache disabled
+    """
+    self.ttl = ttl
+    self.logger = logging.getLogger(self.__class__.__name__)
+    self.hits = 0 # Served from cache
+    self.misses = 0 # Loaded from upstream
+    self.joined = 0 # Served by a load in flight
+    self.entries: dict[Hashable, tuple[float, Any]] = {} # key: (expiry, value)
+    self._inflight: dict[Hashable, Future] = {}
+    self._lock = threading.Lock()
+
+  def get_or_load(self, key: Hashable, load: Callable[[], Any], keep: Callable[[Any], bool] = lambda value: True,
+                  refresh: bool = False) -> Any:
+    """Cached value of key, or load it (once for every concurrent request)
+    Args:
+      key (Hashable): Entry key, first item is the cfg_id, e.g. ('MMA', 'DMFL_MMA')
+      load (Callable): Upstream request
+      keep (Callable): keep(value) is True if value can be cached (e.g. OK responses)
+      refresh (bool): Load even if cached, a load in flight is joined
+    Returns:
+      Any: Value
+    """
+    if self.ttl <= 0:
+      self.misses += 1
+      return load()
+
+    with self._lock:
+      entry = self.entries.get(key)
+
+      if not refresh and entry is not None and entry[0] > time.monotonic():
+        self.hits += 1
+        return entry[1]
+
+      future = self._inflight.get(key)
+      owner = future is None
+
+      if owner:
+        future = Future()
+        self._inflight[key] = future
+        self.misses += 1
+      else:
+        self.joined += 1
+
+    if not owner:
+      return future.result()
+
+    try:
+      value = load()
+      future.set_result(value)
+
+      with self._lock:
+        if keep(value) and self._inflight.get(key) is future: # Not flushed while loading
+          self.entries[key] = (time.monotonic() + self.ttl, value)
+
+      return value
+
+    except BaseException as e:
+      future.set_exception(e)
+      raise
+
+    finally:
+      with self._lock:
+        if self._inflight.get(key) is future:
+          del self._inflight[key]
+
+  def invalidate(self, key: Hashable) -> bool:
+    """Remove the entry of key, a load in flight is not cached
+    Returns:
+      bool: True if an entry was removed
+    """
+    with self._lock:
+      self._inflight.pop(key, None)
+      return self.entries.pop(key, None) is not None
+
+  def flush(self, cfg_id: str | None = None) -> int:
+    """Remove entries of cfg_id, or every entry
+    Returns:
+      int: Entries removed
+    """
+    with self._lock:
+      keys = [key for key in self.entries if cfg_id is None or key[0] == cfg_id]
+      for key in keys:
+        del self.entries[key]
+
+      # Loads in flight are not cached
+      for key in [key for key in self._inflight if cfg_id is None or key[0] == cfg_id]:
+        del self._inflight[key]
+
+    if keys:
+      self.logger.debug(f'Flushed {len(keys)} entries (cfg: {cfg_id or "all"})')
+    return len(keys)
@@ -0,0 +1,93 @@
+import re
+from functools import lru_cache
+
+from .models.canoe_command_model import CanOeCommandModel
+
+'''
+  description: Match CAPL server responses against the command definitions of a cfg
+  (config.json > canOe > cfgs > commands). Patterns are literal text with {name}
+  placeholders, as written in the README:
+
+    "parameter" : ["action"],
+    "responseOk" : "Action_type {action} {dcu_type} OK",
+    "responseNok" : ["Set_target ERROR", "ZenzefiError"]
+
+  A placeholder listed in parameter matches the argument sent with the command, a bound
+  placeholder (e.g. {dcu_type}, DCU selected with Read_info) matches its bound value and
+  any other placeholder matches one word. A response that matches responseOk only with
+  another value of a bound placeholder (other door) is NOK.
+'''
+
+# Response outcomes
+RESPONSE_OK = 'ok'
+RESPONSE_NOK = 'nok'
+
+_PLACEHOLDER = re.compile(r'\{(\w+)\}')
+
+def compile_pattern(pattern: str, values: dict[str, str]) -> re.Pattern:
+  """Regular expression of a response pattern
+  Args:
+    pattern (str): Literal text with {name} placeholders
+    values (dict[str, str]): Value of the placeholders bound to command arguments
+  Returns:
+    re.Pattern: Compiled expression
+  """
+  parts = []
+  position = 0
+
+  for placeholder in _PLACEHOLDER.finditer(pattern):
+    parts.append(re.escape(pattern[position:placeholder.start()]))
+    name = placeholder.group(1)
+    parts.append(re.escape(values[name]) if name in values else r'[^\s,]+')
+    position = placeholder.end()
+
+  parts.append(re.escape(pattern[position:]))
+  return re.compile(''.join(parts))
+
+##############################################################
+# Class to classify responses of one command
+##############################################################
+class ResponseMatcher:
+  """OK/NOK patterns of one command, bound to its arguments
+  """
+
+  def __init__(self, command: CanOeCommandModel, args: tuple[str, ...], bound: tuple[tuple[str, str], ...] = ()):
+    """Constructor
+    Args:
+      command (CanOeCommandModel): Command definition
+      args (tuple[str, ...]): Arguments sent with the command
+      bound (tuple[tuple[str, str], ...]): (name, value) of placeholders not sent with the command
+    """
+    arguments = dict(zip(command.parameter, args))
+    values = {**dict(bound), **arguments}
+    self.command = command
+    self.ok = compile_pattern(command.responseOk, values)
+    self.nok = [compile_pattern(pattern, values) for pattern in command.responseNok]
+
+    # responseOk with any value of the bound placeholders: OK of another target
+    bound_names = {name for name, _ in bound} - set(arguments)
+    used = {placeholder.group(1) for placeholder in _PLACEHOLDER.finditer(command.responseOk)}
+    self.other = compile_pattern(command.responseOk, arguments) if bound_names & used else None
+
+  def match(self, text: str) -> str | None:
+    """Outcome of a (partial) response
+    Returns:
+      str | None: RESPONSE_NOK, RESPONSE_OK or None if nothing matches yet
+    """
+    for pattern in self.nok:
+      if pattern.search(text):
+        return RESPONSE_NOK
+
+    if self.ok.search(text):
+      return RESPONSE_OK
+
+    if self.other is not None and self.other.search(text):
+      return RESPONSE_NOK
+
+    return None
+
+@lru_cache(maxsize=256)
+def get_matcher(command: CanOeCommandModel, args: tuple[str, ...], bound: tuple[tuple[str, str], ...] = ()) -> ResponseMatcher:
+  """Compiled matcher, cached by command definition, arguments and bound values
+  """
+  return ResponseMatcher(command, args, bound)
@@ -0,0 +1,107 @@
+import json
+import os
+import queue
+import threading
+import time
+import logging
+
+'''
+  description: Buffered JSON Lines writer. Records are queued by the caller and written
+  in batches by a background thread (one write per batch), the file is rotated by size
+  like logging.handlers.RotatingFileHandler (file.1, file.2...).
+'''
+
+##############################################################
+# Class to write JSON records in background
+##############################################################
+class JsonlWriter:
+  """Batched JSONL file writer with size rotation
+  """
+
+  def __init__(self, file_path: str, max_size: int = 10485760, max_files: int = 5,
+               batch_size: int = 100, flush_interval: float = 1.0, queue_size: int = 10000):
+    """Constructor
+    Args:
+      file_path (str): Output file
+      max_size (int): Bytes before rotation, 0 = no rotation
+      max_files (int): Rotated files kept
+      batch_size (int): Max records per write
+      flush_interval (float): Max seconds a record waits in the buffer
+      queue_size (int): Max records waiting, newer records are dropped when full
+    """
+    self.file_path = file_path
+    self.max_size = max_size
+    self.max_files = max_files
+    self.batch_size = batch_size
+    self.flush_interval = flush_interval
+    self.logger = logging.getLogger(self.__class__.__name__)
+    self.written = 0 # Records written
+    self.dropped = 0 # Records lost because the queue was full
+    self._queue: 'queue.Queue[dict | None]' = queue.Queue(maxsize=queue_size)
+    self._thread = threading.Thread(target=self._run, name=self.__class__.__name__, daemon=True)
+    self._thread.start()
+
+  def write(self, record: dict):
+    """Queue one record, never blocks
+    """
+    try:
+      self._queue.put_nowait(record)
+    except queue.Full:
+      self.dropped += 1
+
+  def close(self, timeout: float = 5.0):
+    """Write pending records and stop the writer thread
+    """
+    self._queue.put(None)
+    self._thread.join(timeout)
+
+  def _rotate(self):
+    for index in range(self.max_files - 1, 0, -1):
+      source = f'{self.file_path}.{index}'
+      if os.path.exists(source):
+        os.replace(source, f'{self.file_path}.{index + 1}')
+
+    if self.max_files > 0:
+      os.replace(self.file_path, f'{self.file_path}.1')
+    else:
+      os.remove(self.file_path)
+
+  def _flush(self, batch: list[dict]):
+    data = ''.join(json.dumps(record, ensure_ascii=False) + '\n' for record in batch)
+
+    try:
+      if self.max_size > 0 and os.path.exists(self.file_path) and os.path.getsize(self.file_path) + len(data) > self.max_size:
+        self._rotate()
+
+      with open(self.file_path, 'a', encoding='utf-8') as f:
+        f.write(data)
+      self.written += len(batch)
+
+    except OSError as e:
+      self.logger.error(f'Error writing {self.file_path}: {e}')
+
+  def _run(self):
+    running = True
+
+    while running:
+      record = self._queue.get()
+      batch = []
+      deadline = time.monotonic() + self.flush_interval
+
+      # Buffer until batch_size records or flush_interval seconds after the first one
+      while record is not None:
+        batch.append(record)
+        remaining = deadline - time.monotonic()
+
+        if len(batch) >= self.batch_size or remaining <= 0:
+          break
+
+        try:
+          record = self._queue.get(timeout=remaining)
+        except queue.Empty:
+          break
+
+      running = record is not None
+
+      if batch:
+        self._flush(batch)
@@ -0,0 +1,167 @@
+import re
+from typing import Iterator
+
+'''
+File: line_framer.py
+Description: Incremental line framer for text commands received over a TCP stream.
+  Accepts CR, LF, CRLF and NUL as terminators, several pipelined commands per packet
+  and commands split across packets. Data is received straight into a reusable buffer
+  (recv_into) and lines are decoded from memoryview slices, without intermediate copies.
+  Until the first terminator is received every packet is one command (PLCs that send
+  commands without terminator), line framing starts with the first terminator.
+'''
+
+# Any command terminator
+TERMINATOR_PATTERN = re.compile(rb'[\r\n\x00]')
+
+CR = 0x0D
+LF = 0x0A
+
+class FrameTooLongError(ValueError):
+  """Buffer full (max_size) without a terminator, the partial command is dropped
+  """
+
+##############################################################
+# Class to split a TCP stream in command lines
+##############################################################
+class LineFramer:
+  """Incremental line framer over a reusable bytearray
+  """
+
+  def __init__(self, size: int = 4096, max_size: int = 65536, encoding: str = 'utf-8', framed: bool = False):
+    """Constructor
+    Args:
+      size (int): Initial buffer size in bytes
+      max_size (int): Max length of one command, longer data is returned as a command (recv_into)
+      encoding (str): Encoding of the commands
+      framed (bool): Line framing from the start, False = every packet is one command until the first terminator
+    """
+    self.buffer = bytearray(size)
+    self.view = memoryview(self.buffer)
+    self.max_size = max_size
+    self.encoding = encoding
+    self.start = 0 # First byte not consumed
+    self.end = 0 # First free byte
+    self.skip_lf = False # Last line ended with CR at the end of a packet, LF may come next
+    self.framed = framed # A terminator was received, commands are lines
+
+  @property
+  def pending(self) -> bool:
+    """True if there is a partial (not terminated) command in the buffer
+    """
+    return self.end > self.start
+
+  def writable(self) -> memoryview:
+    """Get the free part of the buffer to receive data into (socket.recv_into)
+    Returns:
+      memoryview: Writable view, call commit(n) with the received bytes
+    """
+    # Reset when everything is consumed
+    if self.start == self.end:
+      self.start = self.end = 0
+
+    # No free space at the end: move partial command to the beginning
+    if self.end == len(self.buffer) and self.start > 0:
+      size = self.end - self.start
+      self.buffer[0:size] = self.view[self.start:self.end]
+      self.start, self.end = 0, size
+
+    # Still full: grow buffer
+    if self.end == len(self.buffer) and len(self.buffer) < self.max_size:
+      self.view.release()
+      self.buffer.extend(bytes(min(len(self.buffer), self.max_size - len(self.buffer))))
+      self.view = memoryview(self.buffer)
+
+    return self.view[self.end:]
+
+  def commit(self, size: int):
+    """Commit bytes written in the view returned by writable()
+    Args:
+      size (int): Number of bytes received
+    """
+    self.end += size
+
+  def feed(self, data: bytes):
+    """Copy data into the buffer, used when data is not received with recv_into
+    Args:
+      data (bytes): Received data
+    Raises:
+      FrameTooLongError: Buffer full without terminator, the partial command is dropped
+      BufferError: Buffer full of complete commands, read frames() before feeding more data
+    """
+    data = memoryview(data)
+    while data:
+      view = self.writable()
+
+      # Full at max_size: no space can be freed here
+      if not view:
+        view.release()
+        if TERMINATOR_PATTERN.search(self.buffer, self.start, self.end) is not None:
+          raise BufferError('LineFramer buffer full, read frames() before feeding more data')
+        self.start = self.end = 0
+        raise FrameTooLongError(f'Command longer than {self.max_size} bytes without terminator')
+
+      size = min(len(view), len(data))
+      view[:size] = data[:size]
+      view.release()
+      self.commit(size)
+      data = data[size:]
+
+  def frames(self) -> Iterator[tuple[str, str]]:
+    """Iterate complete commands in the buffer, in arrival order
+    Returns:
+      Iterator[tuple[str, str]]: (command, terminator) pairs, empty lines are skipped
+    """
+    # Packet mode: no terminator received yet, the whole packet is one command
+    if not self.framed and self.start < self.end:
+      if TERMINATOR_PATTERN.search(self.buffer, self.start, self.end) is None:
+        yield self.flush(), ''
+        return
+      self.framed = True
+
+    while self.start < self.end:
+
+      # LF of a CRLF split across packets
+      if self.skip_lf:
+        self.skip_lf = False
+        if self.buffer[self.start] == LF:
+          self.start += 1
+          continue
+
+      match = TERMINATOR_PATTERN.search(self.buffer, self.start, self.end)
+
+      if match is None:
+        # Buffer full with no terminator, return it as a command
+        if self.start == 0 and self.end == len(self.buffer) == self.max_size:
+          yield self.flush(), ''
+        return
+
+      index = match.start()
+      terminator = self.buffer[index:index + 1].decode('ascii')
+      consumed = index + 1
+
+      if self.buffer[index] == CR:
+        if consumed < self.end:
+          if self.buffer[consumed] == LF:
+            terminator = '\r\n'
+            consumed += 1
+        else:
+          self.skip_lf = True
+
+      line = str(self.view[self.start:index], self.encoding, 'replace')
+      self.start = consumed
+
+      if line:
+        yield line, terminator
+
+  def flush(self) -> str:
+    """Get the partial command in the buffer and clear it
+    Returns:
+      str: Partial command, empty if there is nothing pending
+    """
+    line = str(self.view[self.start:self.end], self.encoding, 'replace')
+    self.start = self.end = 0
+    return line
+
+  def __iter__(self) -> Iterator[tuple[str, str]]:
+    return self.frames()
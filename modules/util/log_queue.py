@@ -0,0 +1,56 @@
+import logging
+import logging.handlers
+import queue
+
+'''
+  description: Non-blocking logging. Records are put in a bounded queue and written
+  to file/console by a QueueListener thread, out of the client threads.
+  When the queue is full, records below block_level are dropped and records of
+  block_level or higher wait for space (errors are never lost).
+'''
+
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+  """QueueHandler with a full queue policy
+  """
+
+  def __init__(self, log_queue: queue.Queue, block_level: int = logging.WARNING, block_timeout: float = 5.0):
+    """Constructor
+    Args:
+      log_queue (queue.Queue): Bounded queue read by the listener
+      block_level (int): Records of this level or higher wait for space, lower levels are dropped
+      block_timeout (float): Max seconds to wait for space, then the record is dropped
+    """
+    super().__init__(log_queue)
+    self.block_level = block_level
+    self.block_timeout = block_timeout
+    self.dropped = 0 # Records lost because the queue was full
+
+  def enqueue(self, record: logging.LogRecord):
+    try:
+      self.queue.put_nowait(record)
+    except queue.Full:
+      if record.levelno < self.block_level:
+        self.dropped += 1
+        return
+
+      try:
+        self.queue.put(record, timeout=self.block_timeout)
+      except queue.Full:
+        self.dropped += 1
+
+def start_queue_logging(handlers: list[logging.Handler], size: int, block_level: int) -> tuple[BoundedQueueHandler, logging.handlers.QueueListener]:
+  """Queue handler to attach to the logger and started listener writing to handlers
+  Args:
+    handlers (list[logging.Handler]): Final handlers (file, console), with their formatter
+    size (int): Max records in queue
+    block_level (int): See BoundedQueueHandler
+  Returns:
+    tuple[BoundedQueueHandler, QueueListener]: Stop the listener to flush pending records
+  """
+  log_queue = queue.Queue(maxsize=size)
+  handler = BoundedQueueHandler(log_queue, block_level)
+  handler.setFormatter(logging.Formatter('%(message)s')) # Final format is done by the listener handlers
+
+  listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+  listener.start()
+  return handler, listener
@@ -1,59 +1,155 @@
 import psutil
 import subprocess
-import servicemanager
+import threading
 import time
+from dataclasses import dataclass, field
+from typing import Iterable
+
+from ..request_context import current_request
+
+try:
+  import servicemanager
+except ImportError: # Not Windows: process functions only (benchmarks, simulator)
+  servicemanager = None
 
 '''
 This module provides utility functions for process management, including checking if an application is running, listing applications, closing applications, and starting new processes.
 It uses the psutil library for process management and subprocess for starting new processes.
 It is designed to work with Windows systems, particularly for applications like CANoe.
+The process table is scanned once per snapshot (take_snapshot). count_running_processes,
+get_running_processes and terminate_processes scan on every call unless a snapshot is passed.
+The calls of one command share the snapshot of its request (request_snapshot), dropped when
+processes are launched or killed.
 '''
 
+@dataclass(frozen=True)
+class ProcessInfo:
+  """Process of a snapshot
+  """
+  pid: int
+  name: str
+  create_time: float | None
+  status: str | None
+  rss: int | None # Resident memory (bytes), None if access denied
+  process: psutil.Process = field(compare=False, repr=False) # is_running() checks PID and create time
+
+@dataclass
+class ProcessSnapshot:
+  """Processes indexed by name (lower case), taken with one process table scan
+  """
+  names: frozenset[str] | None # Names indexed, None = every process
+  processes: dict[str, list[ProcessInfo]]
+  taken: float = field(default_factory=time.monotonic)
+
+  def get(self, name: str) -> list[ProcessInfo]:
+    """Processes named name (case insensitive)
+    """
+    return self.processes.get(name.lower(), [])
+
+  def pids(self, name: str) -> list[int]:
+    """PIDs of the processes named name
+    """
+    return [info.pid for info in self.get(name)]
+
+  def count(self, name: str) -> int:
+    """Number of processes named name
+    """
+    return len(self.get(name))
+
+  def covers(self, names: frozenset[str] | None) -> bool:
+    """True if every name (lower case) is indexed
+    """
+    return self.names is None or (names is not None and names <= self.names)
+
 ##############################################################
 ##############################################################
-def count_running_processes(name: str) -> int:
+def take_snapshot(names: Iterable[str] | None = None) -> ProcessSnapshot:
+  '''Scan the process table once and index the processes by name.
+  Create time, status and memory are read only for the indexed processes.
+  Args:
+    names (Iterable[str] | None): Names to index (e.g., ['CANoe64.exe', 'RuntimeKernel.exe']), None = every process.
+  Returns:
+    ProcessSnapshot: Processes by name.
+  Raises:
+    psutil.Error: Process table not available.
+  '''
+  wanted = frozenset(name.lower() for name in names) if names is not None else None
+  processes: dict[str, list[ProcessInfo]] = {}
+
+  for process in psutil.process_iter(['name']):
+    name = process.info['name']
+    if not name or (wanted is not None and name.lower() not in wanted):
+      continue
+
+    try:
+      info = process.as_dict(['create_time', 'status', 'memory_info'], ad_value=None)
+    except (psutil.NoSuchProcess, psutil.ZombieProcess):
+      continue
+
+    memory = info['memory_info']
+    processes.setdefault(name.lower(), []).append(ProcessInfo(
+      process.pid, name, info['create_time'], info['status'], memory.rss if memory else None, process))
+
+  return ProcessSnapshot(wanted, processes)
+
+##############################################################
+##############################################################
+def request_snapshot(names: Iterable[str]) -> ProcessSnapshot:
+  '''Snapshot of the current request: taken by its first call, reused by the others.
+  Outside a request every call takes a new snapshot.
+  Args:
+    names (Iterable[str]): Names needed.
+  Returns:
+    ProcessSnapshot: Processes by name.
+  Raises:
+    psutil.Error: Process table not available.
+  '''
+  request = current_request.get()
+  wanted = frozenset(name.lower() for name in names)
+
+  if request is not None and request.processes is not None and request.processes.covers(wanted):
+    return request.processes
+
+  snapshot = take_snapshot(wanted)
+  if request is not None:
+    request.processes = snapshot
+  return snapshot
+
+##############################################################
+##############################################################
+def invalidate_request_snapshot() -> None:
+  '''Next request_snapshot() of the current request scans the process table (processes launched or killed)'''
+  request = current_request.get()
+  if request is not None:
+    request.processes = None
+
+##############################################################
+##############################################################
+def count_running_processes(name: str, snapshot: ProcessSnapshot | None = None) -> int:
   '''Count how many instances of a process are running by its name.
   Args:
     name (str): Name of the application to check (e.g., 'notepad.exe', 'chrome.exe').
+    snapshot (ProcessSnapshot | None): Snapshot to read (e.g., request_snapshot()), by default a new scan.
   Returns:
     int: Number of instances of the application running, -1 if error.
   '''
-  
-  i = 0
-  # Iterate processes
   try:
-    for process in psutil.process_iter(['pid', 'name']):
-      if process.info['name'].lower() == name.lower():
-        i += 1
+    return (snapshot or take_snapshot([name])).count(name)
   except psutil.Error as e:
     return -1
-  # Return count
-  return i
 
 ##############################################################
 ##############################################################
-def get_running_processes(name: str) -> list[int] | None:
+def get_running_processes(name: str, snapshot: ProcessSnapshot | None = None) -> list[int] | None:
   '''Check if an application is running by its name.
   Args:
     name (str): Name of the application to check (e.g., 'notepad.exe', 'chrome.exe').
+    snapshot (ProcessSnapshot | None): Snapshot to read (e.g., request_snapshot()), by default a new scan.
   Returns:
     list[int]|None: List of process IDs (PIDs) if the application is running, otherwise None.
   '''
-  # Initialize empty list for PIDs
-  pids = []
-  
   try:
-    # Iterate through all processes
-    for proc in psutil.process_iter(['pid', 'name']):
-      try:
-        # Check if the process name matches and append PID
-        if name.lower() == proc.info['name'].lower():
-          pids.append(proc.info['pid'])
-          
-      # Handle exceptions for processes that may have terminated or are inaccessible        
-      except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-        continue
-
+    pids = (snapshot or take_snapshot([name])).pids(name)
   except Exception as e:
     # Log the exception if needed
     return None
@@ -89,84 +185,200 @@ def print_running_processes(find: str = '') -> None:
 
 ##############################################################
 ##############################################################
-def kill_process(name: str, timeout: float = 5.0) -> bool:
-  '''Kill a process by its name.
+def is_alive(process: psutil.Process) -> bool:
+  '''True if the process (same PID and create time) is still running and not a zombie'''
+  try:
+    return process.is_running() and process.status() != psutil.STATUS_ZOMBIE
+  except psutil.NoSuchProcess:
+    return False
+  except psutil.AccessDenied:
+    return True
+
+@dataclass
+class KillReport:
+  """Result of terminating processes
+  """
+  found: int = 0 # Running when called
+  terminated: int = 0 # Ended after terminate()
+  killed: int = 0 # Ended after kill()
+  survivors: list[int] = field(default_factory=list) # PIDs still running
+
+  @property
+  def ok(self) -> bool:
+    """True if no process is left
+    """
+    return not self.survivors
+
+  def __str__(self) -> str:
+    return f'{self.found} found, {self.terminated} terminated, {self.killed} killed, {len(self.survivors)} running'
+
+##############################################################
+##############################################################
+def terminate_all(processes: list[psutil.Process], timeout: float = 5.0, kill_wait: float = 1.0) -> KillReport:
+  '''Terminate processes at once, kill the survivors, everything within timeout seconds.
+  terminate() is sent to every process, then one wait (psutil.wait_procs) until
+  timeout - kill_wait, kill() to the survivors and one wait until timeout.
   Args:
-    name (str): Name of the process to kill (e.g., 'notepad.exe', 'chrome.exe').
-    timeout (float): Time in seconds to wait for the process to terminate gracefully before forcefully killing it.
+    processes (list[psutil.Process]): Processes to end, processes already ended are ignored.
+    timeout (float): Seconds for the whole operation.
+    kill_wait (float): Seconds of timeout kept to wait the killed processes.
   Returns:
-    bool: True if the process was successfully killed, False if it is still running.
+    KillReport: Terminated, killed and surviving processes.
   '''
+  deadline = time.monotonic() + timeout
+  alive = [process for process in processes if is_alive(process)]
+  report = KillReport(found=len(alive))
 
-  # Kill process by name
-  for process in psutil.process_iter(['pid', 'name']):
+  # Graceful: terminate every process, then one wait
+  for process in alive:
     try:
-      # Check if the process name matches
-      # and terminate it
-      if process.info['name'] and name.lower() in process.info['name'].lower():
-        process.terminate()  # Try terminate
-        try:
-          process.wait(timeout=timeout)  # Wait for the process to terminate
-        except psutil.TimeoutExpired:
-          process.kill()  # Force kill if it didn't terminate
+      process.terminate()
     except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
       continue
-  
-  # Check if the process is still running
-  i = count_running_processes(name)
-  return i == 0
+
+  gone, alive = psutil.wait_procs(alive, timeout=max(0.0, deadline - time.monotonic() - kill_wait))
+  report.terminated = len(gone)
+
+  # Force: kill the survivors, then one wait
+  for process in alive:
+    try:
+      process.kill()
+    except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+      continue
+
+  if alive:
+    gone, alive = psutil.wait_procs(alive, timeout=max(0.0, deadline - time.monotonic()))
+    report.killed = len(gone)
+
+  # Verify
+  report.survivors = [process.pid for process in alive if is_alive(process)]
+  return report
 
 ##############################################################
 ##############################################################
-def kill_process_with_retry(name: str, timeout: float= 0.5, attempts: int= 3) -> bool:
+def terminate_processes(name: str, timeout: float = 5.0, kill_wait: float = 1.0, snapshot: ProcessSnapshot | None = None) -> KillReport:
+  '''Terminate every process named name, see terminate_all().
+  Args:
+    name (str): Name of the process to kill (e.g., 'notepad.exe', 'chrome.exe').
+    timeout (float): Seconds for the whole operation.
+    kill_wait (float): Seconds of timeout kept to wait the killed processes.
+    snapshot (ProcessSnapshot | None): Processes to kill, by default a new snapshot (a stale one could miss new instances).
+  Returns:
+    KillReport: Terminated, killed and surviving processes, survivors = [-1] if the process table is not available.
+  '''
+  try:
+    processes = [info.process for info in (snapshot or take_snapshot([name])).get(name)]
+  except psutil.Error:
+    return KillReport(survivors=[-1])
+
+  try:
+    return terminate_all(processes, timeout, kill_wait)
+  finally:
+    invalidate_request_snapshot()
+
+##############################################################
+##############################################################
+def kill_process(name: str, timeout: float = 5.0, snapshot: ProcessSnapshot | None = None) -> bool:
+  '''Kill a process by its name, every instance at once (see terminate_processes()).
+  Args:
+    name (str): Name of the process to kill (e.g., 'notepad.exe', 'chrome.exe').
+    timeout (float): Time in seconds to terminate gracefully and forcefully kill every instance.
+    snapshot (ProcessSnapshot | None): Processes to kill, by default a new snapshot (a stale one could miss new instances).
+  Returns:
+    bool: True if the process was successfully killed, False if it is still running.
+  '''
+  return terminate_processes(name, timeout, snapshot=snapshot).ok
+
+##############################################################
+##############################################################
+def kill_process_with_retry(name: str, timeout: float= 0.5, attempts: int= 3, snapshot: ProcessSnapshot | None = None) -> bool:
   '''Kill a process by its name with retry attempts.
   Args:
     name (str): Name of the process to kill (e.g., 'notepad.exe', 'chrome.exe').
-    timeout (float): Time in seconds to wait between attempts to kill the process.
+    timeout (float): Max time in seconds to wait after terminate and after kill in every attempt.
     attempts (int): Number of attempts to kill the process.
+    snapshot (ProcessSnapshot | None): Processes to kill, by default a new snapshot (a stale one could miss new instances).
   Returns:
     bool: True if the process was successfully killed, False if it is still running after all attempts.
   '''
-  
-  # Kill attempts
+  try:
+    processes = [info.process for info in (snapshot or take_snapshot([name])).get(name)]
+  except psutil.Error:
+    return False
+
+  # Kill attempts, waits end as soon as the processes are gone
   for attempt in range(1, attempts + 1):
+    alive = [process for process in processes if is_alive(process)]
+    if not alive:
+      break
+    terminate_all(alive, 2 * timeout, kill_wait=timeout)
     
-    # Look for process to terminate
-    found = False
-    for process in psutil.process_iter(['pid', 'name']):
-      try:
-        if process.info['name'] and name.lower() in process.info['name'].lower():
-          found = True
-          process.terminate()
-          
-      except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-        continue
-    
-    # Process found
-    if not found:
-      return True
-    
-    # Wait time to kill
-    if timeout > 0.0:
-      time.sleep(timeout)
-    
-    # Look for process to kill
-    for process in psutil.process_iter(['pid', 'name']):
-      try:
-        if process.info['name'].lower() == name.lower():
-          p = psutil.Process(process.info['pid'])
-          p.kill() # Force to kill
-      
-      except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-        continue
-    
-    # Wait time to kill
-    if timeout > 0.0:
-      time.sleep(timeout)
-    
-  # Check if the process is still running
-  return any(process.info['name'].lower() == name.lower() for process in psutil.process_iter(['name']))
+  # Check if the processes are still running, no new scan
+  invalidate_request_snapshot()
+  return not any(is_alive(process) for process in processes)
     
+##############################################################
+# Class to track the processes of one executable
+##############################################################
+class ProcessTracker:
+  """PIDs of one executable: found with one process table scan, then checked by PID.
+  A tracked PID is alive while psutil.Process.is_running() is True (same PID and
+  create time, a reused PID is not taken as the same process) and it is not a zombie.
+  The table is scanned again when a tracked PID disappears, when no PID is tracked
+  (nothing to check, an instance may have been launched), every verify_interval seconds
+  (new instances launched outside the service) and after invalidate().
+  """
+
+  def __init__(self, name: str, verify_interval: float = 5.0):
+    """Constructor
+    Args:
+      name (str): Name of the executable (e.g., 'CANoe64.exe')
+      verify_interval (float): Max seconds between process table scans, 0 = scan on every call
+    """
+    self.name = name
+    self.verify_interval = verify_interval
+    self.scans = 0 # Process table scans
+    self.checks = 0 # Calls answered with PID checks only
+    self._processes: dict[int, psutil.Process] = {} # pid: process (create time cached by psutil)
+    self._scanned: float | None = None # monotonic time of the last scan
+    self._lock = threading.Lock()
+
+  def invalidate(self):
+    """Scan on next call, e.g. after launching or killing the executable
+    """
+    self._scanned = None
+    invalidate_request_snapshot()
+
+  def pids(self) -> list[int]:
+    """PIDs of the running instances
+    Returns:
+      list[int]: PIDs, empty if not running
+    """
+    with self._lock:
+      now = time.monotonic()
+
+      if self._scanned is None or now - self._scanned >= self.verify_interval or not self._alive():
+        self._scan()
+        self._scanned = now
+      else:
+        self.checks += 1
+
+      return list(self._processes)
+
+  def _alive(self) -> bool:
+    '''True if every tracked process is still running, False if none is tracked (unknown)'''
+    return bool(self._processes) and all(is_alive(process) for process in self._processes.values())
+
+  def _scan(self):
+    '''Snapshot of the request, shared with its other callers (count, kill)'''
+    self.scans += 1
+    try:
+      snapshot = request_snapshot([self.name])
+    except psutil.Error:
+      self._processes = {}
+      return
+    self._processes = {info.pid: info.process for info in snapshot.get(self.name) if info.status != psutil.STATUS_ZOMBIE}
+
 ##############################################################
 ##############################################################
 def start_process(path: str, show_gui: bool= True, delay: float= 1.0) -> int | None:
@@ -185,5 +397,6 @@ def start_process(path: str, show_gui: bool= True, delay: float= 1.0) -> int | N
     return process.pid
   
   except Exception as e:
-    servicemanager.LogErrorMsg(f'Error to start app: {e}')
+    if servicemanager is not None:
+      servicemanager.LogErrorMsg(f'Error to start app: {e}')
     return None
@@ -1,13 +1,31 @@
-from py_canoe import CANoe, wait
-from time import sleep
-import win32com.client
-import pythoncom
+from time import sleep, monotonic
 import gc
 import os
 import logging
 from contextlib import contextmanager
+from typing import Callable
 from .util.process_util import count_running_processes, kill_process
+from .canoe_session import CanoeSession, ComEvents
+from .request_context import phase
 
+try:
+  from py_canoe import CANoe, wait
+  import win32com.client
+  import pythoncom
+except ImportError: # Not Windows: only the *_with_app functions, with an injected application (tests)
+  CANoe = wait = None
+  win32com = pythoncom = None
+
+# COM errors caught by the functions with their own connection
+COM_ERRORS = (pythoncom.com_error,) if pythoncom is not None else ()
+
+# Event sinks and waits of the functions called without session
+COM_EVENTS = ComEvents()
+
+# Deadlines (s) of the COM session calls: a state read, and the margin over the wait
+# budget of start/stop for the COM calls themselves (dispatch, Open, Start)
+STATE_CALL_TIMEOUT = 5.0
+CALL_TIMEOUT_MARGIN = 15.0
 
 @contextmanager
 def canoe_application_context():
@@ -43,7 +61,7 @@ def some_cfg_loaded(canoe_exe: str) -> str | None:
   #   return None
   
   try:
-    with canoe_application_context() as app:
+    with phase('state_cfg'), canoe_application_context() as app:
       # Verificar si hay una configuración cargada
       name = app.Configuration.Name
       full_name = app.Configuration.FullName
@@ -51,7 +69,7 @@ def some_cfg_loaded(canoe_exe: str) -> str | None:
       # Devolver el path completo solo si hay un nombre de configuración
       return full_name if name else None
           
-  except pythoncom.com_error as e:
+  except COM_ERRORS as e:
     # Error específico de COM
     #print(f"COM Error al acceder a CANoe: {e}")
     return None
@@ -66,7 +84,7 @@ def some_measurement_running_optimized(canoe_exe: str) -> str | None:
   Combines both configuration check and measurement check in a single COM connection.'''
   
   try:
-    with canoe_application_context() as app:
+    with phase('state_measurement'), canoe_application_context() as app:
       # Verificar si hay configuración cargada
       config_name = app.Configuration.Name
       config_full_name = app.Configuration.FullName
@@ -78,7 +96,7 @@ def some_measurement_running_optimized(canoe_exe: str) -> str | None:
       is_running = app.Measurement.Running
       return config_full_name if is_running else None
         
-  except pythoncom.com_error as e:
+  except COM_ERRORS as e:
     #print(f"COM Error: {e}")
     return None
   
@@ -86,6 +104,46 @@ def some_measurement_running_optimized(canoe_exe: str) -> str | None:
     #print(f"Error: {e}")
     return None
 
+def read_application_state(app) -> tuple[str | None, bool]:
+  '''Read loaded configuration and measurement state from a CANoe application object.
+  COM errors are raised to the caller.
+  Args:
+    app: CANoe.Application object.
+    
+  Returns:
+    tuple[str | None, bool]: (full path of the loaded configuration or None, True if measurement is running)'''
+  
+  config_name = app.Configuration.Name
+  config_full_name = app.Configuration.FullName
+  
+  if not config_name:
+    return None, False
+  
+  return config_full_name, bool(app.Measurement.Running)
+
+def read_measurement_state(canoe_exe: str, session: CanoeSession | None = None) -> tuple[str | None, bool]:
+  '''Read loaded configuration and measurement state in a single COM connection (phase state_app).
+  Args:
+    canoe_exe: The name of the CANoe executable.
+    session: Persistent COM session, None to open a temporary connection.
+    
+  Returns:
+    tuple[str | None, bool]: (full path of the loaded configuration or None, True if measurement is running)'''
+  
+  try:
+    with phase('state_app'):
+      if session is not None:
+        return session.call(read_application_state, timeout=STATE_CALL_TIMEOUT)
+      
+      with canoe_application_context() as app:
+        return read_application_state(app)
+        
+  except COM_ERRORS as e:
+    return None, False
+  
+  except Exception as e:
+    return None, False
+
 def is_measurement_running(canoe_exe: str) -> bool:
   '''Check if measurement is running
   Args:
@@ -95,11 +153,11 @@ def is_measurement_running(canoe_exe: str) -> bool:
     bool: True if the measurement is running, False otherwise.'''
   
   try:
-    with canoe_application_context() as app:
+    with phase('state_measurement'), canoe_application_context() as app:
        
       return app.Measurement.Running
         
-  except pythoncom.com_error as e:
+  except COM_ERRORS as e:
     #print(f"COM Error: {e}")
     return False
   
@@ -209,77 +267,278 @@ def start_measurement2(cfg_id: str, cfg_path: str, canoe_exe: str, wit_ui: bool
   # Done
   return f'0000,{cfg_id} {cfg_path} measurement running'
 
-def start_measurement(cfg_id: str, cfg_path: str, canoe_exe: str, with_ui: bool = False) -> str:
+class MeasurementEvents:
+  """COM event sink of CANoe Measurement, flags are read by the waits
+  """
+  started = False
+  stopped = False
+  
+  def OnInit(self):
+    pass
+  
+  def OnStart(self):
+    self.started = True
+  
+  def OnStop(self):
+    self.stopped = True
+  
+  def OnExit(self):
+    pass
+
+class ApplicationEvents:
+  """COM event sink of CANoe Application, the configuration loaded is read by the open wait
+  """
+  opened: str | None = None # Full name of the last configuration opened
+
+  def OnOpen(self, fullname):
+    self.opened = fullname
+
+  def OnQuit(self):
+    pass
+
+  def OnSystemVariablesDefinitionChanged(self):
+    pass
+
+def attach_measurement_events(meas, events: ComEvents | None = None) -> MeasurementEvents | None:
+  '''Connect a MeasurementEvents sink to the Measurement object.
+  Args:
+    meas: CANoe Measurement object.
+    events: Event adapter (session.events), by default COM_EVENTS.
+  Returns:
+    MeasurementEvents | None: Event sink, None if events are not available (polling only)'''
+  return (events or COM_EVENTS).attach(meas, MeasurementEvents)
+
+def attach_application_events(app, events: ComEvents | None = None) -> ApplicationEvents | None:
+  '''Connect an ApplicationEvents sink (configuration opened) to the Application object.
+  Args:
+    app: CANoe Application object.
+    events: Event adapter (session.events), by default COM_EVENTS.
+  Returns:
+    ApplicationEvents | None: Event sink, None if events are not available (polling only)'''
+  return (events or COM_EVENTS).attach(app, ApplicationEvents)
+
+def detach_events(sink, events: ComEvents | None = None) -> None:
+  '''Disconnect an event sink created with attach_*_events()'''
+  (events or COM_EVENTS).detach(sink)
+
+def wait_for(condition, deadline: float, poll_min: float = 0.05, poll_max: float = 0.5, events: ComEvents | None = None) -> bool:
+  '''Wait until condition() is True or deadline (monotonic) expires, see ComEvents.wait().
+  Args:
+    condition: Function returning True when done.
+    deadline: monotonic() time limit.
+    poll_min: First polling interval in seconds.
+    poll_max: Max polling interval in seconds.
+    events: Event adapter (session.events), by default COM_EVENTS.
+  Returns:
+    bool: True if condition was met before deadline.'''
+  return (events or COM_EVENTS).wait(condition, deadline, poll_min, poll_max)
+
+def start_measurement(cfg_id: str, cfg_path: str, canoe_exe: str, with_ui: bool = False, session: CanoeSession | None = None, timeout: float = 30.0, progress: Callable[[str], None] | None = None, start: bool = True) -> str:
   """
   Start measurement in Vector CANoe using COM API
   Args:
     cfg_id (str): Cfg ID
     cfg_path (str): Cfg file path
     with_ui (bool): True use GUI, otherwise hidden
+    session (CanoeSession | None): Persistent COM session, None to open a temporary connection
+    timeout (float): Wait budget in seconds for stop, open and start
+    progress (Callable[[str], None] | None): Called with the phase: stopping, loading, starting
+    start (bool): False only loads the cfg (warmup)
 
   Returns:
     str: 0000,{cfg_id} {cfg_path} measurement running\n
+    0000,{cfg_id} {cfg_path} loaded (start = False)\n
     8110,{cfg_id} Impossible to start measurement, file: {cfg_path}\n
     8111,{cfg_id} Some error when opening file {cfg_path}
   """
   logger = logging.getLogger('start_measurement')
   
   try:
+    if session is not None:
+      return session.call(start_measurement_with_app, cfg_id, cfg_path, with_ui, timeout, progress, start,
+                          events=session.events, timeout=timeout + CALL_TIMEOUT_MARGIN)
+    
     with canoe_application_context() as app:
-      
-      logger.debug('Get meas and cfg')
-      meas = app.Measurement
-      cfg = app.Configuration
+      return start_measurement_with_app(app, cfg_id, cfg_path, with_ui, timeout, progress, start)
+                    
+  except COM_ERRORS as e:
+    logger.error(f"COM Error: {e}")
+    return f'8111,{cfg_id} Some error when opening file {cfg_path}'
+  
+  except Exception as e:
+    logger.error(f"Error: {e}")
+    return f'8111,{cfg_id} Some error when opening file {cfg_path}'
 
-      target_cfg = os.path.abspath(cfg_path).lower()
-      current_cfg = (cfg.FullName or "").lower()
-      logger.debug(f'target: {target_cfg}, current: {current_cfg}')
-      
-      # Case 1: it's already running
-      if meas.Running and current_cfg == target_cfg:
-        logger.debug('Case 1: It is already running')
-        return f'0000,{cfg_id} {cfg_path} measurement running'
-      
-      # Case 2: Other config is running, stop it!
-      if meas.Running and current_cfg != target_cfg:
-        logger.debug(f"⚠️ Measurement is running with: {cfg.FullName}, stopping")
+def start_measurement_with_app(app, cfg_id: str, cfg_path: str, with_ui: bool = False, timeout: float = 30.0, progress: Callable[[str], None] | None = None, start: bool = True, events: ComEvents | None = None) -> str:
+  """
+  Start measurement with a CANoe application object, COM errors are raised to the caller.
+  Completion of stop/start is detected with Measurement events and the open with the Application
+  OnOpen event, polling with backoff as fallback, so it returns as soon as the measurement is running.
+  Phases are traced (request_context.phase): read_state, attach_events, stop, stop_wait,
+  open, open_wait, start, start_wait, detach_events.
+  Args:
+    app: CANoe.Application object
+    cfg_id (str): Cfg ID
+    cfg_path (str): Cfg file path
+    with_ui (bool): True use GUI, otherwise hidden
+    timeout (float): Wait budget in seconds for stop, open and start
+    progress (Callable[[str], None] | None): Called with the phase: stopping, loading, starting
+    start (bool): False only loads the cfg (warmup)
+    events (ComEvents | None): Event adapter of the session, by default COM_EVENTS
+
+  Returns:
+    str: 0000,{cfg_id} {cfg_path} measurement running\n
+    0000,{cfg_id} {cfg_path} loaded (start = False)\n
+    8110,{cfg_id} Impossible to start measurement, file: {cfg_path}\n
+    8111,{cfg_id} Some error when opening file {cfg_path}
+  """
+  logger = logging.getLogger('start_measurement')
+  deadline = monotonic() + timeout
+  progress = progress or (lambda phase: None)
+  
+  logger.debug('Get meas and cfg')
+  with phase('read_state'):
+    meas = app.Measurement
+    cfg = app.Configuration
+
+    target_cfg = os.path.abspath(cfg_path).lower()
+    current_cfg = (cfg.FullName or "").lower()
+    running = meas.Running
+  logger.debug(f'target: {target_cfg}, current: {current_cfg}')
+  
+  # Case 1: it's already running
+  if running and current_cfg == target_cfg:
+    logger.debug('Case 1: It is already running')
+    return f'0000,{cfg_id} {cfg_path} measurement running'
+  
+  with phase('attach_events'):
+    sink = attach_measurement_events(meas, events)
+    app_sink = attach_application_events(app, events)
+  try:
+    # Case 2: Other config is running, stop it!
+    if running and current_cfg != target_cfg:
+      logger.debug(f"⚠️ Measurement is running with: {cfg.FullName}, stopping")
+      progress('stopping')
+      with phase('stop'):
         meas.Stop()
-        sleep(1.0)
-        logger.debug('Measurment stop!')
+      
+      with phase('stop_wait'):
+        stopped = wait_for(lambda: (sink is not None and sink.stopped) or not meas.Running, deadline, events=events)
+      if not stopped:
+        logger.error('Measurement did not stop')
+        return f'8110,{cfg_id} Impossible to start measurement, file: {cfg_path}'
+      logger.debug('Measurment stop!')
 
-      # Case 3: Load new cfg file
-      if current_cfg != target_cfg:
-        logger.debug(f"🔄 Load new cfg: {cfg_path}")
+    # Case 3: Load new cfg file
+    if current_cfg != target_cfg:
+      logger.debug(f"🔄 Load new cfg: {cfg_path}")
+      progress('loading')
+      with phase('open'):
         app.Visible = with_ui
         app.Open(cfg_path)
-        
-        sleep(2)
-        logger.debug('Loaded')
-                  
-      # Start measurement
-      if not meas.Running:
-        logger.debug('Start measurment.')
+      
+      with phase('open_wait'):
+        opened = lambda: app_sink is not None and (app_sink.opened or "").lower() == target_cfg
+        loaded = wait_for(lambda: opened() or (app.Configuration.FullName or "").lower() == target_cfg, deadline, events=events)
+      if not loaded:
+        logger.error(f'Cfg not loaded: {cfg_path}')
+        return f'8111,{cfg_id} Some error when opening file {cfg_path}'
+      logger.debug('Loaded')
+    
+    # Only load (warmup)
+    if not start:
+      return f'0000,{cfg_id} {cfg_path} loaded'
+                
+    # Start measurement
+    if not meas.Running:
+      logger.debug('Start measurment.')
+      progress('starting')
+      with phase('start'):
         meas.Start()
+      
+      # Waiting measurment running
+      with phase('start_wait'):
+        started = wait_for(lambda: (sink is not None and sink.started) or meas.Running, deadline, events=events)
+      if started:
+        return f'0000,{cfg_id} {cfg_path} measurement running'
         
-        # Waiting measurment running
-        for _ in range(20):
-          logger.debug('Waiting measurement')
-          
-          if meas.Running:
-            return f'0000,{cfg_id} {cfg_path} measurement running'
-          sleep(0.5)
-          
-        # Impossible to start measurement
-        logger.error("\n⛔ No se pudo arrancar la medición.")
-        return f'8110,{cfg_id} Impossible to start measurement, file: {cfg_path}'
+      # Impossible to start measurement
+      logger.error("\n⛔ No se pudo arrancar la medición.")
+      return f'8110,{cfg_id} Impossible to start measurement, file: {cfg_path}'
 
-      
-      return f'0000,{cfg_id} {cfg_path} measurement running'
+    return f'0000,{cfg_id} {cfg_path} measurement running'
+  
+  finally:
+    with phase('detach_events'):
+      detach_events(sink, events)
+      detach_events(app_sink, events)
+
+def stop_measurement(canoe_exe: str, session: CanoeSession | None = None, unload: bool = False, timeout: float = 10.0) -> bool:
+  """
+  Stop measurement in Vector CANoe using COM API (soft close), CANoe keeps running
+  Args:
+    canoe_exe (str): The name of the CANoe executable
+    session (CanoeSession | None): Persistent COM session, None to open a temporary connection
+    unload (bool): True also unloads the cfg (new empty configuration, changes not saved)
+    timeout (float): Wait budget in seconds for stop and unload
+
+  Returns:
+    bool: True if the measurement is stopped (and the cfg unloaded)
+  """
+  logger = logging.getLogger('stop_measurement')
+  
+  try:
+    if session is not None:
+      return session.call(stop_measurement_with_app, unload, timeout, events=session.events, timeout=timeout + CALL_TIMEOUT_MARGIN)
+    
+    with canoe_application_context() as app:
+      return stop_measurement_with_app(app, unload, timeout)
                     
-  except pythoncom.com_error as e:
+  except COM_ERRORS as e:
     logger.error(f"COM Error: {e}")
-    return f'8111,{cfg_id} Some error when opening file {cfg_path}'
+    return False
   
   except Exception as e:
     logger.error(f"Error: {e}")
-    return f'8111,{cfg_id} Some error when opening file {cfg_path}'
+    return False
+
+def stop_measurement_with_app(app, unload: bool = False, timeout: float = 10.0, events: ComEvents | None = None) -> bool:
+  """
+  Stop measurement with a CANoe application object, COM errors are raised to the caller.
+  Args:
+    app: CANoe.Application object
+    unload (bool): True also unloads the cfg (new empty configuration, changes not saved)
+    timeout (float): Wait budget in seconds for stop and unload
+    events (ComEvents | None): Event adapter of the session, by default COM_EVENTS
+
+  Returns:
+    bool: True if the measurement is stopped (and the cfg unloaded)
+  """
+  logger = logging.getLogger('stop_measurement')
+  deadline = monotonic() + timeout
+  meas = app.Measurement
+  
+  if meas.Running:
+    logger.debug('Stop measurement')
+    sink = attach_measurement_events(meas, events)
+    try:
+      meas.Stop()
+      
+      if not wait_for(lambda: (sink is not None and sink.stopped) or not meas.Running, deadline, events=events):
+        logger.error('Measurement did not stop')
+        return False
+    finally:
+      detach_events(sink, events)
+  
+  # Unload cfg: new empty configuration
+  current_cfg = app.Configuration.FullName or ""
+  if unload and current_cfg:
+    logger.debug(f'Unload cfg: {current_cfg}')
+    app.New(False)
+    
+    if not wait_for(lambda: (app.Configuration.FullName or "") != current_cfg, deadline, events=events):
+      logger.error(f'Cfg not unloaded: {current_cfg}')
+      return False
+  
+  return True
+
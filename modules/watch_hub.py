@@ -0,0 +1,206 @@
+import queue
+import threading
+import time
+import logging
+from collections import deque
+from typing import Callable
+
+from .models.canoe_state_model import CanoeState
+
+'''
+  description: Push of CANoe state changes to watching clients (watch command).
+  The state monitor publishes every state change once, the hub thread queues the
+  status line to every subscriber and repeats it as heartbeat when requested.
+  Every subscriber has a bounded queue (oldest lines dropped) and its own sender
+  thread, a client that does not read blocks only its own pushes. Lines are queued
+  from subscribe() but sent after activate(), once the watch response is sent.
+'''
+
+##############################################################
+# Class to send pushed lines to one client
+##############################################################
+class WatchSubscriber:
+  """Client in streaming mode, lines sent one at a time by its own thread
+  """
+
+  def __init__(self, client_id: str, send: Callable[[str], None], heartbeat: float = 0.0, max_pending: int = 16):
+    """Constructor
+    Args:
+      client_id (str): Client id, used in log messages
+      send (Callable[[str], None]): Thread-safe send of one line, blocks until sent
+      heartbeat (float): Seconds, 0 = only changes
+      max_pending (int): Lines kept while the client does not read, oldest dropped
+    """
+    self.client_id = client_id
+    self.send = send
+    self.heartbeat = heartbeat
+    self.last_sent = time.monotonic()
+    self.sent = 0 # Lines sent
+    self.dropped = 0 # Lines dropped, queue full
+    self.closed = False
+    self.pending: deque[str] = deque(maxlen=max_pending)
+    self._condition = threading.Condition()
+    self._thread: threading.Thread | None = None
+
+  def offer(self, line: str):
+    """Queue a line, never blocks
+    """
+    with self._condition:
+      if len(self.pending) == self.pending.maxlen:
+        self.dropped += 1
+      self.pending.append(line)
+      self._condition.notify()
+
+  def activate(self, on_error: Callable[['WatchSubscriber', Exception], None]):
+    """Start sending queued lines (once)
+    """
+    with self._condition:
+      if self._thread is not None or self.closed:
+        return
+      self._thread = threading.Thread(target=self._run, args=(on_error,), name=f'Watch[{self.client_id}]', daemon=True)
+      self._thread.start()
+
+  def close(self):
+    """Stop sender thread, pending lines are dropped
+    """
+    with self._condition:
+      self.closed = True
+      self._condition.notify()
+
+  def _run(self, on_error: Callable[['WatchSubscriber', Exception], None]):
+    while True:
+      with self._condition:
+        while not self.pending and not self.closed:
+          self._condition.wait()
+        if self.closed:
+          return
+        line = self.pending.popleft()
+
+      try:
+        self.send(line)
+        self.last_sent = time.monotonic()
+        self.sent += 1
+      except Exception as e:
+        on_error(self, e)
+        return
+
+##############################################################
+# Class to push state changes to subscribers
+##############################################################
+class WatchHub:
+  """Fan-out of state changes to watching clients
+  """
+
+  def __init__(self, canoe_exe: str, terminator: str = '\r\n', tick: float = 0.25, max_pending: int = 16):
+    """Constructor
+    Args:
+      canoe_exe (str): CANoe executable name, used in status lines
+      terminator (str): Line terminator of pushed lines
+      tick (float): Resolution in seconds of heartbeats
+      max_pending (int): Lines queued per subscriber, oldest dropped
+    """
+    self.canoe_exe = canoe_exe
+    self.terminator = terminator
+    self.tick = tick
+    self.max_pending = max_pending
+    self.logger = logging.getLogger(self.__class__.__name__)
+    self.subscribers: dict[str, WatchSubscriber] = {}
+    self.last_line: str | None = None
+    self._queue: 'queue.Queue[str | None]' = queue.Queue()
+    self._lock = threading.Lock()
+    self._thread: threading.Thread | None = None
+
+  @property
+  def pushed(self) -> int:
+    """Lines sent to the current subscribers
+    """
+    return sum(subscriber.sent for subscriber in list(self.subscribers.values()))
+
+  def subscribe(self, client_id: str, send: Callable[[str], None], heartbeat: float = 0.0):
+    """Add (or update) a subscriber, lines are queued until activate()
+    """
+    subscriber = WatchSubscriber(client_id, send, heartbeat, self.max_pending)
+
+    with self._lock:
+      previous = self.subscribers.get(client_id)
+      self.subscribers[client_id] = subscriber
+
+      if self._thread is None:
+        self._thread = threading.Thread(target=self._run, name=self.__class__.__name__, daemon=True)
+        self._thread.start()
+
+    if previous is not None:
+      previous.close()
+
+  def activate(self, client_id: str):
+    """Start pushing to client_id, called once its watch response is sent (no-op if not subscribed)
+    """
+    subscriber = self.subscribers.get(client_id)
+    if subscriber is not None:
+      subscriber.activate(self._send_error)
+
+  def unsubscribe(self, client_id: str) -> bool:
+    """Remove subscriber
+    Returns:
+      bool: True if it was subscribed
+    """
+    with self._lock:
+      subscriber = self.subscribers.pop(client_id, None)
+
+    if subscriber is None:
+      return False
+
+    subscriber.close()
+    return True
+
+  def publish(self, state: CanoeState):
+    """State changed (called by the state monitor)
+    """
+    line = state.status_response(self.canoe_exe)
+    self.last_line = line
+
+    # Without subscribers it is not a change for anyone: the next watch response sends it
+    with self._lock:
+      if not self.subscribers:
+        return
+    self._queue.put(line)
+
+  def stop(self):
+    """Stop hub thread and every sender
+    """
+    self._queue.put(None)
+
+    with self._lock:
+      subscribers = list(self.subscribers.values())
+    for subscriber in subscribers:
+      subscriber.close()
+
+  def _send_error(self, subscriber: WatchSubscriber, error: Exception):
+    self.logger.debug(f'Client[{subscriber.client_id}] watch send error: {error}')
+
+    with self._lock:
+      if self.subscribers.get(subscriber.client_id) is subscriber:
+        del self.subscribers[subscriber.client_id]
+
+  def _run(self):
+    while True:
+      try:
+        line = self._queue.get(timeout=self.tick)
+        if line is None:
+          break
+      except queue.Empty:
+        line = None
+
+      with self._lock:
+        subscribers = list(self.subscribers.values())
+
+      now = time.monotonic()
+      for subscriber in subscribers:
+        # State change
+        if line is not None:
+          subscriber.offer(line + self.terminator)
+
+        # Heartbeat: repeat last state
+        elif subscriber.heartbeat > 0 and self.last_line and now - subscriber.last_sent >= subscriber.heartbeat:
+          subscriber.last_sent = now
+          subscriber.offer(self.last_line + self.terminator)
@@ -0,0 +1,141 @@
+import json
+import os
+import socket
+import sys
+import threading
+import time
+
+import pytest
+
+# Tests import the service modules (modules.*) from the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Manual scripts, they drive a real CANoe (py_canoe, win32com) when imported
+collect_ignore = ['test_canoe_close.py', 'test_canoe_open.py', 'test_canoe_open2.py', 'test_raw_canoe.py']
+
+def sim_config(tmp_path, mode: str = 'threaded', service: dict | None = None, cfg: dict | None = None,
+               canoe: dict | None = None, warmup: dict | None = None) -> str:
+  '''Write a config.json with the simulator backend, listening on a free local port'''
+  config = {
+    'version': '1.0.0',
+    'description': 'Test configuration',
+    'author': 'test',
+    'service': {
+      'name': 'CanOeProxyTest', 'displayName': 'CANoe Proxy Test', 'description': 'Test',
+      'host': '127.0.0.1', 'port': 0, 'mode': mode, 'statusInterval': 0.05, **(service or {}),
+    },
+    'canOe': {
+      'path': 'CANoe64.exe', 'exe': 'CANoe64.exe', 'backend': 'sim',
+      'simulator': {'timeScale': 0.001, 'seed': 1},
+      'cfgs': [{'id': 'MMA', 'path': r'C:\cfg\MMA.cfg', 'host': '127.0.0.1', 'port': 4242, **(cfg or {})}],
+      **(canoe or {}),
+    },
+    'warmup': warmup or {},
+    'log': {'level': 'WARNING', 'printToConsole': False, 'filePath': str(tmp_path / 'service.log')},
+  }
+  path = tmp_path / 'config.json'
+  path.write_text(json.dumps(config))
+  return str(path)
+
+@pytest.fixture
+def run_server(tmp_path):
+  '''Start a CANoeProxyTcpServer (sim backend) in a thread, returns (server, port)'''
+  from canoe_proxy_tcp_server import CANoeProxyTcpServer
+  servers = []
+
+  def _run(mode: str = 'threaded', **kwargs):
+    server = CANoeProxyTcpServer(sim_config(tmp_path, mode, **kwargs))
+    servers.append(server)
+    threading.Thread(target=server.start, daemon=True).start()
+
+    deadline = time.monotonic() + 5.0
+    while time.monotonic() < deadline:
+      if server.isRunning and (mode != 'asyncio' or server.async_server is not None):
+        break
+      time.sleep(0.01)
+    return server, server.server_socket.getsockname()[1]
+
+  yield _run
+
+  for server in servers:
+    server.stop()
+
+@pytest.fixture
+def connect():
+  '''Open a PLC connection to port, returns send(command) -> response line'''
+  connections = []
+
+  def _connect(port: int):
+    connection = socket.create_connection(('127.0.0.1', port), timeout=10.0)
+    lines = connection.makefile('rb')
+    connections.append(connection)
+
+    def send(command: str) -> str:
+      connection.sendall((command + '\n').encode('utf-8'))
+      return lines.readline().decode('utf-8').strip()
+
+    return send
+
+  yield _connect
+
+  for connection in connections:
+    connection.close()
+
+class FakeCapl:
+  """CAPL Server_Socket.can stand-in: Read_info activates the DCU, other commands act on it
+  """
+
+  def __init__(self):
+    self.received: list[str] = [] # Commands in arrival order
+    self.active: str | None = None # DCU activated by Read_info
+    self.reply = None # reply(command) -> str | None, overrides the default response (None = no response)
+    self.connections: list[socket.socket] = []
+    self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    self.sock.bind(('127.0.0.1', 0))
+    self.sock.listen(4)
+    self.port = self.sock.getsockname()[1]
+    threading.Thread(target=self._accept, daemon=True).start()
+
+  def respond(self, command: str) -> str | None:
+    name, _, arg = command.partition(' ')
+    if name == 'Read_info':
+      self.active = arg
+      return f'SW01,HW02,SN{len(self.received)}'
+    if name in ('Window_control', 'DLK_IOControl'):
+      if self.active is None:
+        return 'Set_target ERROR Target not conected'
+      return f'{"Action_type" if name == "Window_control" else name} {arg} {self.active} OK'
+    return 'Set_target ERROR Invalid Command'
+
+  def _accept(self):
+    while True:
+      try:
+        conn, _ = self.sock.accept()
+      except OSError:
+        return
+      self.connections.append(conn)
+      threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+  def _serve(self, conn: socket.socket):
+    with conn:
+      while data := conn.recv(4096):
+        command = data.decode('utf-8').strip()
+        self.received.append(command)
+        text = self.reply(command) if self.reply else self.respond(command)
+        if text is not None:
+          conn.sendall(text.encode('utf-8'))
+
+  def drop(self):
+    '''Drop the clients, like Server_Socket.can when the measurement restarts'''
+    for conn in self.connections:
+      conn.shutdown(socket.SHUT_RDWR)
+    self.connections.clear()
+
+  def close(self):
+    self.sock.close()
+
+@pytest.fixture
+def capl():
+  server = FakeCapl()
+  yield server
+  server.close()
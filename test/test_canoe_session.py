@@ -0,0 +1,148 @@
+import contextvars
+import threading
+
+import pytest
+
+from modules.canoe_session import DISCONNECT_HRESULTS, CanoeSession
+
+RPC_E_DISCONNECTED = -2147417848
+DISP_E_EXCEPTION = -2147352567
+
+class FakeComError(Exception):
+  def __init__(self, hresult: int):
+    super().__init__(hresult, 'fake COM error')
+    self.hresult = hresult
+
+class FakeApplication:
+  """CANoe.Application stand-in, counts Open calls
+  """
+
+  def __init__(self, calls: list):
+    self.calls = calls
+    self.stale = False
+
+  def Open(self, path: str):
+    if self.stale:
+      raise FakeComError(RPC_E_DISCONNECTED)
+    self.calls.append(path)
+
+@pytest.fixture
+def calls():
+  return []
+
+@pytest.fixture
+def apps(calls):
+  return []
+
+@pytest.fixture
+def session(calls, apps):
+  def factory():
+    app = FakeApplication(calls)
+    apps.append(app)
+    return app
+
+  session = CanoeSession(app_factory=factory, disconnect_errors=(FakeComError,))
+  yield session
+  session.stop()
+
+def test_application_is_reused(session, apps):
+  session.call(lambda app: app.Open('a.cfg'))
+  session.call(lambda app: app.Open('b.cfg'))
+  assert len(apps) == 1
+  assert session.connects == 1
+
+def test_lost_connection_reconnects_then_retries_once(session, apps, calls):
+  session.call(lambda app: app.Open('a.cfg'))
+  apps[0].stale = True # CANoe restarted
+
+  session.call(lambda app: app.Open('b.cfg'))
+  assert calls == ['a.cfg', 'b.cfg']
+  assert session.connects == 2
+
+def test_other_com_errors_are_not_retried(session, calls):
+  def open_failing(app):
+    app.Open('a.cfg')
+    raise FakeComError(DISP_E_EXCEPTION) # Error raised by CANoe after running the call
+
+  with pytest.raises(FakeComError):
+    session.call(open_failing)
+  assert calls == ['a.cfg']
+  assert session.connects == 1
+
+def test_lost_connection_twice_is_raised(session, apps):
+  def always_lost(app):
+    raise FakeComError(RPC_E_DISCONNECTED)
+
+  with pytest.raises(FakeComError):
+    session.call(always_lost)
+  assert session.connects == 2
+
+def test_jobs_run_in_session_thread_with_caller_context(session):
+  variable = contextvars.ContextVar('variable', default=None)
+  variable.set('request-1')
+  result = session.call(lambda app: (threading.current_thread().name, variable.get()))
+  assert result == ('CanoeSession', 'request-1')
+
+def test_nested_call_runs_directly(session):
+  assert session.call(lambda app: session.call(lambda inner: inner is app)) is True
+
+def test_reset_creates_new_application(session, apps):
+  session.call(lambda app: None)
+  session.reset()
+  session.call(lambda app: None)
+  assert len(apps) == 2
+
+def test_disconnect_hresults():
+  assert RPC_E_DISCONNECTED in DISCONNECT_HRESULTS
+  assert DISP_E_EXCEPTION not in DISCONNECT_HRESULTS
+
+def test_hung_call_replaces_session_thread(session, apps):
+  started, release = threading.Event(), threading.Event()
+  hung = session.call(lambda app: threading.current_thread())
+
+  def modal_dialog(app):
+    started.set()
+    release.wait(5.0) # CANoe blocked, e.g. by a modal dialog
+
+  errors = []
+  def caller():
+    try:
+      session.call(modal_dialog, timeout=0.5)
+    except TimeoutError as e:
+      errors.append(e)
+
+  thread = threading.Thread(target=caller)
+  thread.start()
+  assert started.wait(1.0)
+  queued = session.submit(lambda app: (threading.current_thread(), app))
+  thread.join(2.0)
+  assert len(errors) == 1 and session.restarts == 1
+
+  # Job queued before the restart runs in a new thread with its own application object
+  new_thread, app = queued.result(1.0)
+  assert new_thread is not hung and new_thread.name == 'CanoeSession'
+  assert app is apps[1] and session.connects == 2
+  release.set()
+
+def test_queued_call_timeout_does_not_restart(session):
+  release = threading.Event()
+  running = session.submit(lambda app: release.wait(5.0))
+
+  with pytest.raises(TimeoutError):
+    session.call(lambda app: None, timeout=0.1) # Never started: cancelled
+  assert session.restarts == 0
+
+  release.set()
+  assert running.result(1.0) is True
+  assert session.call(lambda app: 'ok') == 'ok'
+
+def test_default_deadline():
+  session = CanoeSession(app_factory=lambda: None, disconnect_errors=(), call_timeout=0.1)
+  release = threading.Event()
+  try:
+    with pytest.raises(TimeoutError):
+      session.call(lambda app: release.wait(5.0))
+    assert session.restarts == 1
+  finally:
+    release.set()
+    session.stop()
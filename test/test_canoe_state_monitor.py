@@ -0,0 +1,127 @@
+import threading
+import time
+
+from modules.canoe_state_monitor import CanoeStateMonitor
+from modules.models.canoe_state_model import CanoeState
+
+class Backend:
+  """read_state stand-in, reads can be held to interleave threads
+  """
+
+  def __init__(self):
+    self.count = 0 # Processes running
+    self.reads = 0
+    self.reading = threading.Event()
+    self.release = threading.Event()
+    self.release.set()
+
+  def read_state(self) -> CanoeState:
+    self.reads += 1
+    count = self.count
+    self.reading.set()
+    self.release.wait(2.0)
+    return CanoeState(count, None, None, None, False, time.time())
+
+def test_snapshot_is_cached_until_invalidated():
+  backend = Backend()
+  monitor = CanoeStateMonitor(backend.read_state, interval=60.0)
+  assert monitor.snapshot().process_count == 0
+  backend.count = 1
+  assert monitor.snapshot().process_count == 0
+  monitor.invalidate()
+  assert monitor.snapshot().process_count == 1
+  assert backend.reads == 2
+
+def test_reader_during_refresh_waits_for_new_state():
+  # Stale-flag race: a reader must not get the previous state while another thread refreshes
+  backend = Backend()
+  monitor = CanoeStateMonitor(backend.read_state, interval=60.0)
+  monitor.snapshot()
+
+  backend.count = 1
+  monitor.invalidate()
+  backend.reading.clear()
+  backend.release.clear()
+  refresher = threading.Thread(target=monitor.snapshot)
+  refresher.start()
+  assert backend.reading.wait(2.0)
+
+  results = []
+  reader = threading.Thread(target=lambda: results.append(monitor.snapshot().process_count))
+  reader.start()
+  time.sleep(0.05)
+  assert results == []
+
+  backend.release.set()
+  refresher.join()
+  reader.join()
+  assert results == [1]
+
+def test_invalidate_during_read_keeps_snapshot_stale():
+  backend = Backend()
+  monitor = CanoeStateMonitor(backend.read_state, interval=60.0)
+  backend.reading.clear()
+  backend.release.clear()
+  refresher = threading.Thread(target=monitor.refresh)
+  refresher.start()
+  assert backend.reading.wait(2.0)
+
+  backend.count = 2
+  monitor.invalidate() # State changed while reading
+  backend.release.set()
+  refresher.join()
+
+  assert monitor.stale
+  assert monitor.snapshot().process_count == 2
+
+def test_listeners_called_on_changes_only():
+  backend = Backend()
+  monitor = CanoeStateMonitor(backend.read_state, interval=0)
+  states = []
+  monitor.add_listener(states.append)
+  monitor.snapshot()
+  monitor.snapshot()
+  backend.count = 1
+  monitor.snapshot()
+  assert [state.process_count for state in states] == [0, 1]
+
+def test_slow_listener_does_not_block_reads():
+  backend = Backend()
+  monitor = CanoeStateMonitor(backend.read_state, interval=60.0)
+  release = threading.Event()
+  monitor.add_listener(lambda state: release.wait(2.0))
+
+  notifying = threading.Thread(target=monitor.refresh)
+  notifying.start()
+  time.sleep(0.05)
+
+  # Snapshot published before the listener runs, the lock is not held while notifying
+  assert monitor.snapshot().process_count == 0
+  backend.count = 1
+  monitor.invalidate()
+  other = threading.Thread(target=monitor.refresh)
+  other.start()
+  time.sleep(0.05)
+  assert monitor.state.process_count == 1
+
+  release.set()
+  notifying.join()
+  other.join()
+
+def test_older_read_is_not_published():
+  backend = Backend()
+  monitor = CanoeStateMonitor(backend.read_state, interval=60.0)
+  backend.reading.clear()
+  backend.release.clear()
+  slow = threading.Thread(target=monitor.refresh) # Reads count 0, held
+  slow.start()
+  assert backend.reading.wait(2.0)
+
+  backend.count = 1
+  fast = CanoeState(1, None, None, None, False, time.time())
+  monitor.read_state = lambda: fast
+  assert monitor.refresh() is fast
+
+  backend.release.set()
+  slow.join()
+  assert monitor.state is fast
@@ -0,0 +1,161 @@
+import threading
+import time
+
+import pytest
+
+from modules.capl_proxy import CaplProxy, UpstreamError
+from modules.models.canoe_cfg_model import CanOeCfgModel
+from modules.response_matcher import RESPONSE_NOK, RESPONSE_OK
+
+COMMANDS = [
+  {'id': 'Read_info', 'parameter': ['dcu_type'], 'responseOk': '{sw},{hw},{sn}', 'responseNok': ['ZenzefiError', 'Set_target ERROR'], 'responseTimeout': 1.0},
+  {'id': 'Window_control', 'parameter': ['action'], 'responseOk': 'Action_type {action} {dcu_type} OK', 'responseNok': ['Set_target ERROR'], 'responseTimeout': 1.0},
+]
+
+@pytest.fixture
+def cfg(capl):
+  return CanOeCfgModel.from_dic({'id': 'MMA', 'path': r'C:\cfg\MMA.cfg', 'host': '0.0.0.0', 'port': capl.port, 'commands': COMMANDS})
+
+@pytest.fixture
+def proxy():
+  proxy = CaplProxy(None, timeout=1.0, drain=0.05)
+  yield proxy
+  proxy.stop()
+
+def test_matching_response_sets_outcome(proxy, cfg, capl):
+  response = proxy.request(cfg, 'Read_info DMFL_MMA')
+  assert response.outcome == RESPONSE_OK
+  assert proxy.request(cfg, 'Window_control UP').text == 'Action_type UP DMFL_MMA OK'
+
+  capl.active = None
+  response = proxy.request(cfg, 'Window_control UP')
+  assert response.text == 'Set_target ERROR Target not conected'
+  assert response.outcome == RESPONSE_NOK
+
+def test_undefined_command_has_no_outcome(proxy, cfg, capl):
+  response = proxy.request(cfg, 'DLK_IOControl LOCK')
+  assert response.text == 'Set_target ERROR Target not conected'
+  assert response.outcome is None
+
+def test_requests_share_one_connection(proxy, cfg, capl):
+  for door in ('DMFL_MMA', 'DMFR_MMA', 'DMFL_MMA'):
+    proxy.request(cfg, f'Read_info {door}')
+  assert capl.received == ['Read_info DMFL_MMA', 'Read_info DMFR_MMA', 'Read_info DMFL_MMA']
+  assert proxy.link(cfg).connects == 1
+  assert proxy.link(cfg).requests == 3
+
+def test_every_client_gets_its_own_response(proxy, cfg, capl):
+  capl.reply = lambda command: f'{command} OK'
+  responses = {}
+
+  def client(index: int):
+    responses[index] = proxy.request(cfg, f'Window_control UP{index}').text
+
+  threads = [threading.Thread(target=client, args=(index,)) for index in range(8)]
+  for thread in threads:
+    thread.start()
+  for thread in threads:
+    thread.join()
+
+  assert responses == {index: f'Window_control UP{index} OK' for index in range(8)}
+  assert proxy.link(cfg).connects == 1
+
+def test_unmatched_response_ends_after_drain(proxy, cfg, capl):
+  capl.reply = lambda command: 'Unexpected text'
+  started = time.monotonic()
+  response = proxy.request(cfg, 'Window_control UP', timeout=2.0)
+  assert response.text == 'Unexpected text'
+  assert response.outcome is None
+  assert time.monotonic() - started < 1.0
+
+def test_no_response_times_out(proxy, cfg, capl):
+  capl.reply = lambda command: None
+  with pytest.raises(TimeoutError):
+    proxy.request(cfg, 'Window_control UP', timeout=0.2)
+
+def test_dropped_idle_connection_is_reconnected(proxy, cfg, capl):
+  proxy.request(cfg, 'Read_info DMFL_MMA')
+  capl.drop()
+  time.sleep(0.05)
+
+  # Nothing written on the dropped connection: sent once on the new one
+  assert proxy.request(cfg, 'Read_info DMFL_MMA').outcome == RESPONSE_OK
+  assert capl.received == ['Read_info DMFL_MMA'] * 2
+  assert proxy.link(cfg).connects == 2
+
+def test_command_is_not_sent_again_after_connection_lost(proxy, cfg, capl):
+  proxy.request(cfg, 'Read_info DMFL_MMA')
+
+  def drop(command):
+    capl.drop() # Connection lost after the command was received
+  capl.reply = drop
+
+  with pytest.raises(UpstreamError):
+    proxy.request(cfg, 'Window_control UP')
+  assert capl.received == ['Read_info DMFL_MMA', 'Window_control UP']
+
+def test_read_info_selects_target(proxy, cfg, capl):
+  changes = []
+  proxy.add_target_listener(lambda cfg_id, previous, target: changes.append((cfg_id, previous, target)))
+
+  response = proxy.request(cfg, 'Read_info DMFL_MMA')
+  assert response.outcome == RESPONSE_OK
+  assert proxy.link(cfg).target == 'DMFL_MMA'
+  assert changes == [('MMA', None, 'DMFL_MMA')]
+
+  assert proxy.request(cfg, 'Window_control UP').text == 'Action_type UP DMFL_MMA OK'
+  assert proxy.request(cfg, 'Window_control UP').outcome == RESPONSE_OK
+
+def test_response_of_other_door_is_nok(proxy, cfg, capl):
+  proxy.request(cfg, 'Read_info DMFL_MMA')
+  capl.active = 'DMRR_MMA' # Door changed by a client outside the service
+
+  response = proxy.request(cfg, 'Window_control UP')
+  assert response.text == 'Action_type UP DMRR_MMA OK'
+  assert response.outcome == RESPONSE_NOK
+  assert proxy.link(cfg).target is None
+
+def test_unknown_target_accepts_any_door(proxy, cfg, capl):
+  capl.active = 'DMRR_MMA'
+  assert proxy.request(cfg, 'Window_control UP').outcome == RESPONSE_OK
+
+def test_target_reset_on_error_reconnect_or_restart(proxy, cfg, capl):
+  proxy.request(cfg, 'Read_info DMFL_MMA')
+  capl.reply = lambda command: 'Set_target ZenzefiError'
+  assert proxy.request(cfg, 'Read_info DMFR_MMA').outcome == RESPONSE_NOK
+  assert proxy.link(cfg).target is None
+
+  capl.reply = None
+  proxy.request(cfg, 'Read_info DMFL_MMA')
+  proxy.reset_targets() # Measurement restarted
+  assert proxy.link(cfg).target is None
+
+  proxy.request(cfg, 'Read_info DMFL_MMA')
+  capl.drop()
+  time.sleep(0.05)
+  proxy.request(cfg, 'Window_control UP') # Sent on a new CAPL client
+  assert proxy.link(cfg).target is None
+
+def test_redundant_selection_is_not_sent(proxy, cfg, capl):
+  first = proxy.request(cfg, 'Read_info DMFL_MMA')
+  second = proxy.request(cfg, 'Read_info DMFL_MMA')
+  assert second == first and second.outcome == RESPONSE_OK
+  assert capl.received == ['Read_info DMFL_MMA']
+  assert (proxy.link(cfg).requests, proxy.link(cfg).saved) == (1, 1)
+
+  # Other door, then back: both selections are sent
+  proxy.request(cfg, 'Read_info DMFR_MMA')
+  proxy.request(cfg, 'Read_info DMFL_MMA')
+  assert len(capl.received) == 3
+
+def test_selection_sent_again_after_reset_or_error(proxy, cfg, capl):
+  proxy.request(cfg, 'Read_info DMFL_MMA')
+  proxy.reset_targets() # Measurement restarted
+  proxy.request(cfg, 'Read_info DMFL_MMA')
+
+  capl.active = None
+  assert proxy.request(cfg, 'Window_control UP').outcome == RESPONSE_NOK
+  proxy.request(cfg, 'Read_info DMFL_MMA')
+
+  assert capl.received.count('Read_info DMFL_MMA') == 3
+  assert proxy.link(cfg).saved == 0
@@ -0,0 +1,58 @@
+import pytest
+
+from modules.command_registry import (
+  RESPONSE_MISSING_PARAMETERS, RESPONSE_TOO_MANY_PARAMETERS, CommandRegistry, registry
+)
+
+@pytest.fixture
+def commands():
+  commands = CommandRegistry()
+
+  @commands.command('start', usage='start {cfg_id}', min_args=1, max_args=2)
+  def cmd_start(server, client_id, args):
+    return f'0000,{client_id} {" ".join(args)}'
+
+  return commands
+
+def test_arity_is_checked_before_handler(commands):
+  spec = commands.get('start')
+  assert spec.execute(None, 'plc', []) == RESPONSE_MISSING_PARAMETERS
+  assert spec.execute(None, 'plc', ['MMA', 'async', 'x']) == RESPONSE_TOO_MANY_PARAMETERS
+  assert spec.execute(None, 'plc', ['MMA', 'async']) == '0000,plc MMA async'
+
+def test_duplicate_command_is_rejected(commands):
+  with pytest.raises(ValueError):
+    commands.register('start', lambda server, client_id, args: '')
+
+def test_help_text_in_registration_order(commands):
+  commands.register('close', lambda server, client_id, args: '')
+  assert commands.help_text() == 'start {cfg_id}, close'
+  assert commands.get('unknown') is None
+
+def test_blocking_declaration(commands):
+  commands.register('help', lambda server, client_id, args: '', blocking=False)
+  commands.register('status', lambda server, client_id, args: '', blocking=lambda server, args: bool(args))
+  commands.register('close', lambda server, client_id, args: '', serialized=True)
+
+  assert commands.get('start').blocks(None, ['MMA']) and not commands.get('start').serialized
+  assert commands.get('close').serialized
+  assert not commands.get('help').blocks(None, [])
+  assert not commands.get('status').blocks(None, [])
+  assert commands.get('status').blocks(None, ['fresh'])
+
+def test_service_commands_through_server(run_server, connect):
+  # Command modules register in the default registry when the server is imported
+  server, port = run_server()
+  send = connect(port)
+
+  assert send('help') == f'0000,Available commands: {registry.help_text()}'
+  assert send('foo') == '8FFF,Unknown command'
+  assert send('start') == '8100,Missing parameters'
+  assert send('start XYZ') == '8102,Unknown cfg_id: XYZ'
+  assert send('status too many') == '8101,Too many parameters'
+  assert send('status foo') == '8101,Too many parameters'
+  assert send('status') == '7000,CANoe64.exe closed'
+  assert send('status fresh') == '7000,CANoe64.exe closed'
+  assert send('start MMA') == r'0000,MMA C:\cfg\MMA.cfg measurement running'
+  assert send('status fresh') == r'0000,MMA C:\cfg\MMA.cfg measurement running'
+  assert send('close') == '0000,CANoe64.exe closed!'
@@ -0,0 +1,53 @@
+import pytest
+
+COMMANDS = [
+  {'id': 'Read_info', 'parameter': ['dcu_type'], 'responseOk': '{sw},{hw},{sn}', 'responseNok': ['ZenzefiError', 'Set_target ERROR'], 'responseTimeout': 1.0},
+  {'id': 'Window_control', 'parameter': ['action'], 'responseOk': 'Action_type {action} {dcu_type} OK', 'responseNok': ['Set_target ERROR'], 'responseTimeout': 1.0},
+]
+
+@pytest.fixture
+def send(run_server, connect, capl):
+  _, port = run_server(cfg={'port': capl.port, 'commands': COMMANDS})
+  return connect(port)
+
+def test_dcu_commands_need_a_running_cfg(send, capl):
+  assert send('Read_info DMFL_MMA') == '8500,No cfg running'
+  assert capl.received == []
+
+def test_dcu_commands_forwarded_to_capl(send, capl):
+  assert send('start MMA').startswith('0000')
+
+  assert send('Read_info DMFL_MMA') == 'SW01,HW02,SN1'
+  assert send('Window_control UP') == 'Action_type UP DMFL_MMA OK'
+  assert capl.received == ['Read_info DMFL_MMA', 'Window_control UP']
+
+def test_read_info_cached_while_dcu_selected(send, capl):
+  assert send('start MMA').startswith('0000')
+
+  first = send('Read_info DMFL_MMA')
+  assert send('Read_info DMFL_MMA') == first
+  assert capl.received == ['Read_info DMFL_MMA']
+
+def test_read_info_of_other_dcu_goes_upstream(send, capl):
+  assert send('start MMA').startswith('0000')
+
+  front_left = send('Read_info DMFL_MMA')
+  send('Read_info DMFR_MMA')
+
+  # DMFL_MMA is not selected anymore: Read_info must activate it again
+  assert send('Read_info DMFL_MMA') != front_left
+  assert capl.received == ['Read_info DMFL_MMA', 'Read_info DMFR_MMA', 'Read_info DMFL_MMA']
+  assert send('Window_control UP') == 'Action_type UP DMFL_MMA OK'
+
+def test_upstream_reports_links(send, capl):
+  assert send('upstream') == '0000,No upstream connections'
+  assert send('start MMA').startswith('0000')
+
+  send('Read_info DMFL_MMA')
+  send('Window_control UP')
+  assert send('upstream') == '0000,MMA connected target=DMFL_MMA requests=2 saved=0 queued=0'
+
+def test_set_target_is_not_a_service_command(send, capl):
+  assert send('start MMA').startswith('0000')
+  assert send('Set_target DMFL_MMA').startswith('8FFF')
+  assert capl.received == []
@@ -0,0 +1,134 @@
+import threading
+import time
+
+import pytest
+
+from modules.execution_coordinator import ExecutionCoordinator
+
+def test_identical_requests_join_operation_in_flight():
+  coordinator = ExecutionCoordinator()
+  started, release = threading.Event(), threading.Event()
+  calls = []
+
+  def start():
+    calls.append(1)
+    started.set()
+    release.wait(2.0)
+    return '0000,MMA'
+
+  owner = threading.Thread(target=lambda: coordinator.run('start:MMA', start))
+  owner.start()
+  assert started.wait(2.0)
+  assert coordinator.in_flight('start:MMA')
+
+  joiner = []
+  threads = [threading.Thread(target=lambda: joiner.append(coordinator.run('start:MMA', start))) for _ in range(3)]
+  for thread in threads:
+    thread.start()
+  time.sleep(0.05)
+  release.set()
+  owner.join()
+  for thread in threads:
+    thread.join()
+
+  assert joiner == ['0000,MMA'] * 3
+  assert len(calls) == 1
+  assert (coordinator.executed, coordinator.joined) == (1, 3)
+  assert not coordinator.in_flight('start:MMA')
+
+def test_different_keys_run_one_at_a_time():
+  coordinator = ExecutionCoordinator()
+  running = []
+  overlap = []
+
+  def operation(name: str):
+    running.append(name)
+    overlap.append(len(running))
+    time.sleep(0.02)
+    running.remove(name)
+    return name
+
+  threads = [threading.Thread(target=coordinator.run, args=(key, operation, key)) for key in ('start:A', 'start:B', 'close')]
+  for thread in threads:
+    thread.start()
+  for thread in threads:
+    thread.join()
+
+  assert max(overlap) == 1
+  assert coordinator.executed == 3
+
+def test_errors_are_raised_to_every_requester():
+  coordinator = ExecutionCoordinator()
+  started, release = threading.Event(), threading.Event()
+
+  def failing():
+    started.set()
+    release.wait(2.0)
+    raise RuntimeError('open failed')
+
+  errors = []
+
+  def request():
+    try:
+      coordinator.run('start:MMA', failing)
+    except RuntimeError as e:
+      errors.append(str(e))
+
+  owner = threading.Thread(target=request)
+  owner.start()
+  assert started.wait(2.0)
+  joiner = threading.Thread(target=request)
+  joiner.start()
+  time.sleep(0.05)
+  release.set()
+  owner.join()
+  joiner.join()
+
+  assert errors == ['open failed'] * 2
+
+  # Key released after the failure: next request runs again
+  with pytest.raises(RuntimeError):
+    coordinator.run('start:MMA', failing)
+  assert coordinator.executed == 2
+
+def test_preempt_does_not_wait_for_hung_operation():
+  coordinator = ExecutionCoordinator()
+  started, release = threading.Event(), threading.Event()
+
+  def hung_start():
+    started.set()
+    release.wait(5.0)
+    return '8111,MMA'
+
+  owner = threading.Thread(target=lambda: coordinator.run('start:MMA', hung_start))
+  owner.start()
+  assert started.wait(2.0)
+
+  begin = time.monotonic()
+  assert coordinator.preempt('close', lambda: 'closed', wait=0.1) == 'closed'
+  assert time.monotonic() - begin < 1.0
+  assert coordinator.preempted == 1
+
+  release.set()
+  owner.join()
+
+  # Lock not taken by the preempting operation: later operations still run
+  assert coordinator.preempt('close', lambda: 'closed', wait=0.1) == 'closed'
+  assert coordinator.preempted == 1
+
+def test_close_during_stuck_start(run_server, connect):
+  # Open blocked (e.g. CANoe dialog): the close does not wait for the start
+  server, port = run_server(canoe={'closeWaitTimeout': 0.2, 'simulator': {'timeScale': 1.0, 'seed': 1, 'launch': 0, 'open': 1.5}})
+  starts = []
+  starter = threading.Thread(target=lambda: starts.append(connect(port)('start MMA')))
+  starter.start()
+  time.sleep(0.2)
+
+  begin = time.monotonic()
+  assert connect(port)('close') == '0000,CANoe64.exe closed!'
+  assert time.monotonic() - begin < 1.0
+  assert server.coordinator.preempted == 1
+  assert server.backend.read_state().process_count == 0
+
+  starter.join()
+  assert starts == [r'8111,MMA Some error when opening file C:\cfg\MMA.cfg']
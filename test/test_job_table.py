@@ -0,0 +1,83 @@
+import threading
+import time
+
+from modules.job_table import JOB_FAILED, JOB_LOADED, JOB_LOADING, JOB_RUNNING, JOB_STARTING, JobTable
+
+def wait_done(job, timeout: float = 2.0):
+  deadline = time.monotonic() + timeout
+  while not job.done and time.monotonic() < deadline:
+    time.sleep(0.01)
+  return job
+
+def test_job_reports_progress_and_final_state():
+  jobs = JobTable()
+  phases = []
+  loading, starting, release = threading.Event(), threading.Event(), threading.Event()
+
+  def start(progress):
+    progress('loading')
+    loading.set()
+    release.wait(2.0)
+    progress('starting')
+    phases.append(job.state)
+    return '0000,MMA C:\\cfg\\MMA.cfg measurement running'
+
+  job = jobs.submit('start MMA', start)
+  assert loading.wait(2.0)
+  assert job.state == JOB_LOADING
+  release.set()
+
+  assert wait_done(job).state == JOB_RUNNING
+  assert phases == [JOB_STARTING]
+  assert job.code == '0000'
+  assert jobs.get(job.id) is job
+  jobs.shutdown()
+
+def test_load_only_job_is_loaded():
+  jobs = JobTable()
+  job = jobs.submit('warmup MMA', lambda progress: '0000,MMA C:\\cfg\\MMA.cfg loaded')
+  assert wait_done(job).state == JOB_LOADED and job.code == '0000'
+  jobs.shutdown()
+
+def test_error_response_or_exception_fails_job():
+  jobs = JobTable()
+  nok = jobs.submit('start MMA', lambda progress: '8110,MMA Impossible to start measurement')
+
+  def crash(progress):
+    raise RuntimeError('COM error')
+
+  crashed = jobs.submit('start MMA', crash)
+  assert wait_done(nok).state == JOB_FAILED and nok.code == '8110'
+  assert wait_done(crashed).state == JOB_FAILED and crashed.code is None
+  jobs.shutdown()
+
+def test_table_full_of_unfinished_jobs_rejects_new_ones():
+  jobs = JobTable(max_jobs=2)
+  release = threading.Event()
+  blocked = [jobs.submit('start MMA', lambda progress: release.wait(2.0) and '0000,MMA') for _ in range(2)]
+  assert jobs.submit('start MMA', lambda progress: '0000,MMA') is None
+
+  release.set()
+  for job in blocked:
+    wait_done(job)
+
+  # Oldest finished job evicted
+  job = jobs.submit('start 223', lambda progress: '0000,223')
+  assert job is not None
+  assert list(jobs.jobs) == [blocked[1].id, job.id]
+  jobs.shutdown()
+
+def test_async_start_polled_with_job_command(run_server, connect):
+  server, port = run_server()
+  send = connect(port)
+
+  response = send('start MMA async')
+  assert response.startswith('0000,1 ')
+
+  deadline = time.monotonic() + 5.0
+  while 'running' not in (state := send('job 1')) and time.monotonic() < deadline:
+    time.sleep(0.02)
+  assert state.startswith('0000,1 running') and state.endswith(' 0000')
+
+  assert send('job 99') == '8301,Unknown job: 99'
+  assert send('start MMA later') == '8101,Too many parameters'
@@ -0,0 +1,62 @@
+import pytest
+
+from modules.util.line_framer import FrameTooLongError, LineFramer
+
+def receive(framer: LineFramer, data: bytes) -> list[tuple[str, str]]:
+  '''Receive one packet as the threaded server does (recv_into)'''
+  view = framer.writable()
+  view[:len(data)] = data
+  view.release()
+  framer.commit(len(data))
+  return list(framer.frames())
+
+def test_packet_without_terminator_is_one_command():
+  framer = LineFramer()
+  assert receive(framer, b'status') == [('status', '')]
+  assert receive(framer, b'start MMA') == [('start MMA', '')]
+  assert not framer.framed
+  assert not framer.pending
+
+def test_line_framing_starts_with_first_terminator():
+  framer = LineFramer()
+  assert receive(framer, b'status') == [('status', '')]
+  assert receive(framer, b'status\r\nstart MMA\nsta') == [('status', '\r\n'), ('start MMA', '\n')]
+  assert framer.framed
+  assert framer.pending
+  assert receive(framer, b'tus\x00') == [('status', '\x00')]
+
+def test_crlf_split_across_packets():
+  framer = LineFramer(framed=True)
+  assert receive(framer, b'status\r') == [('status', '\r')]
+  assert receive(framer, b'\nclose\r\n') == [('close', '\r\n')]
+
+def test_empty_lines_are_skipped():
+  framer = LineFramer(framed=True)
+  assert receive(framer, b'\r\n\r\nstatus\n\n') == [('status', '\n')]
+
+def test_buffer_grows_for_long_commands():
+  framer = LineFramer(size=8, max_size=64, framed=True)
+  framer.feed(b'x' * 30 + b'\n')
+  assert list(framer.frames()) == [('x' * 30, '\n')]
+
+def test_full_buffer_is_returned_as_command_with_recv_into():
+  framer = LineFramer(size=8, max_size=16, framed=True)
+  assert receive(framer, b'a' * 8) == []
+  assert receive(framer, b'b' * 8) == [('a' * 8 + 'b' * 8, '')]
+  assert not framer.pending
+
+def test_feed_at_capacity_drops_frame_without_hanging():
+  framer = LineFramer(size=8, max_size=16, framed=True)
+  with pytest.raises(FrameTooLongError):
+    framer.feed(b'x' * 40)
+  assert not framer.pending
+
+  # Framer still usable
+  framer.feed(b'status\n')
+  assert list(framer.frames()) == [('status', '\n')]
+
+def test_feed_at_capacity_with_unread_frames():
+  framer = LineFramer(size=8, max_size=16, framed=True)
+  with pytest.raises(BufferError):
+    framer.feed(b'a\n' * 10)
+  assert list(framer.frames()) == [('a', '\n')] * 8
@@ -0,0 +1,49 @@
+import logging
+import queue
+
+from modules.util.log_queue import BoundedQueueHandler, start_queue_logging
+
+class ListHandler(logging.Handler):
+  def __init__(self):
+    super().__init__()
+    self.messages: list[str] = []
+
+  def emit(self, record: logging.LogRecord):
+    self.messages.append(self.format(record))
+
+def make_record(level: int, message: str) -> logging.LogRecord:
+  return logging.LogRecord('test', level, __file__, 1, message, None, None)
+
+def test_full_queue_drops_records_below_block_level():
+  handler = BoundedQueueHandler(queue.Queue(maxsize=1), block_level=logging.WARNING)
+  handler.emit(make_record(logging.INFO, 'first'))
+  handler.emit(make_record(logging.INFO, 'second'))
+
+  assert handler.dropped == 1
+  assert handler.queue.qsize() == 1
+
+def test_full_queue_blocks_errors_until_timeout():
+  handler = BoundedQueueHandler(queue.Queue(maxsize=1), block_level=logging.WARNING, block_timeout=0.05)
+  handler.emit(make_record(logging.INFO, 'first'))
+  handler.emit(make_record(logging.ERROR, 'error'))
+
+  assert handler.dropped == 1 # Nobody reads the queue: the error waited block_timeout
+
+def test_listener_writes_records_in_order():
+  target = ListHandler()
+  target.setFormatter(logging.Formatter('%(levelname)s %(message)s'))
+  handler, listener = start_queue_logging([target], size=100, block_level=logging.WARNING)
+
+  logger = logging.getLogger('test_log_queue')
+  logger.propagate = False
+  logger.setLevel(logging.DEBUG)
+  logger.addHandler(handler)
+  try:
+    logger.info('one')
+    logger.error('two %s', 'args')
+  finally:
+    logger.removeHandler(handler)
+    listener.stop() # Flushes pending records
+
+  assert target.messages == ['INFO one', 'ERROR two args']
+  assert handler.dropped == 0
@@ -0,0 +1,86 @@
+import threading
+import time
+
+import pytest
+
+from modules.command_registry import RESPONSE_MISSING_PARAMETERS
+
+COMMANDS = [
+  {'id': 'Read_info', 'parameter': ['dcu_type'], 'responseOk': '{sw},{hw},{sn}', 'responseNok': ['ZenzefiError', 'Set_target ERROR'], 'responseTimeout': 1.0},
+  {'id': 'Window_control', 'parameter': ['action'], 'responseOk': 'Action_type {action} {dcu_type} OK', 'responseNok': ['Set_target ERROR'], 'responseTimeout': 1.0},
+]
+
+MACROS = [
+  {'id': 'rear_left_up', 'steps': ['Read_info DMRL_MMA', 'Window_control UP']},
+  {'id': 'up_unselected', 'steps': ['Window_control UP', 'Window_control STOP']},
+  {'id': 'up_anyway', 'steps': [{'command': 'Window_control UP', 'abortOnNok': False}, 'Read_info DMRL_MMA']},
+]
+
+@pytest.fixture
+def server(run_server, capl):
+  return run_server(cfg={'port': capl.port, 'commands': COMMANDS, 'macros': MACROS})
+
+@pytest.fixture
+def send(server, connect):
+  send = connect(server[1])
+  assert send('start MMA').startswith('0000')
+  return send
+
+def test_macro_runs_every_step(send, capl):
+  assert send('macro rear_left_up') == '0000,rear_left_up 2/2|SW01,HW02,SN1|Action_type UP DMRL_MMA OK'
+  assert capl.received == ['Read_info DMRL_MMA', 'Window_control UP']
+
+def test_macro_aborts_on_nok(send, capl):
+  assert send('macro up_unselected') == '8510,up_unselected aborted at step 1/2|Set_target ERROR Target not conected'
+  assert capl.received == ['Window_control UP']
+
+def test_macro_step_without_abort_continues(send, capl):
+  assert send('macro up_anyway') == '0000,up_anyway 2/2|Set_target ERROR Target not conected|SW01,HW02,SN2'
+
+def test_unknown_macro(send, capl):
+  assert send('macro nope') == '8512,MMA Unknown macro: nope'
+  assert capl.received == []
+
+def test_macro_without_running_cfg(server, connect, capl):
+  send = connect(server[1])
+  assert send('macro rear_left_up') == '8500,No cfg running'
+  assert send('batch Read_info DMRL_MMA') == '8500,No cfg running'
+
+def test_batch_splits_steps(send, capl):
+  assert send('batch Read_info DMFL_MMA; Window_control DOWN') == '0000,batch 2/2|SW01,HW02,SN1|Action_type DOWN DMFL_MMA OK'
+  assert capl.received == ['Read_info DMFL_MMA', 'Window_control DOWN']
+
+def test_batch_rejects_service_commands_before_sending(send, capl):
+  assert send('batch Read_info DMFL_MMA; close') == '8511,Invalid batch step: close'
+  assert capl.received == []
+
+def test_batch_without_steps(send):
+  assert send('batch ;') == RESPONSE_MISSING_PARAMETERS
+
+def test_macro_steps_are_not_interleaved(server, connect, capl):
+  macro_client, other_client = connect(server[1]), connect(server[1])
+  assert macro_client('start MMA').startswith('0000')
+
+  def slow(command: str) -> str:
+    time.sleep(0.02) # Other requests queue up while a step is answered
+    return capl.respond(command)
+  capl.reply = slow
+
+  stop = threading.Event()
+  def select_front_left():
+    while not stop.is_set():
+      other_client('Read_info DMFL_MMA')
+  thread = threading.Thread(target=select_front_left)
+  thread.start()
+
+  try:
+    for _ in range(5):
+      assert macro_client('macro rear_left_up').endswith('|Action_type UP DMRL_MMA OK')
+  finally:
+    stop.set()
+    thread.join()
+
+  # Every Window_control right after the Read_info of its macro
+  for index, command in enumerate(capl.received):
+    if command == 'Window_control UP':
+      assert capl.received[index - 1] == 'Read_info DMRL_MMA'
@@ -0,0 +1,105 @@
+import math
+import urllib.error
+import urllib.request
+
+import pytest
+
+from modules.metrics import Histogram, Metrics, MetricsHttpServer
+from modules.request_context import BackendCall, CALL_COM, CALL_PSUTIL, CALL_SIM, _observers, backend_call, end_request, new_request
+
+def finished_request(command: str, response: str | None):
+  request = new_request('c1', command, [])
+  end_request(request, response)
+  return request
+
+def test_histogram_quantile_interpolates_inside_bucket():
+  histogram = Histogram(buckets=(1.0, 2.0))
+  assert histogram.quantile(0.5) is None
+
+  for seconds in (1.5, 1.5, 1.5, 1.5):
+    histogram.observe(seconds)
+  assert histogram.quantile(0.5) == pytest.approx(1.5)
+  assert histogram.quantile(1.0) == pytest.approx(2.0)
+
+  histogram.observe(10.0) # +Inf bucket: highest finite bound
+  assert histogram.quantile(1.0) == 2.0
+  assert histogram.cumulative() == [('1.0', 0), ('2.0', 4), ('+Inf', 5)]
+  assert histogram.sum == pytest.approx(16.0)
+
+def test_requests_counted_by_command_and_code():
+  metrics = Metrics()
+  metrics.observe_request(finished_request('start', '0000,MMA running'), 'start')
+  metrics.observe_request(finished_request('start', '8102,Unknown cfg_id: X'), 'start')
+  metrics.observe_request(finished_request('Read_info', 'SW01,HW02,SN1'), 'Read_info')
+
+  assert metrics.requests == {('start', '0000'): 1, ('start', '8102'): 1, ('Read_info', 'raw'): 1}
+  assert metrics.latency['start'].count == 2
+
+def test_summary_has_gauges_commands_and_call_kinds():
+  metrics = Metrics()
+  metrics.add_gauge('active_clients', lambda: 2)
+  metrics.add_gauge('broken', lambda: 1 / 0)
+  metrics.observe_request(finished_request('status', '7000,closed'), 'status')
+  metrics.observe_call(BackendCall(CALL_COM, 'Open', 0.002))
+  metrics.observe_call(BackendCall(CALL_COM, 'Start', 0.002))
+  metrics.observe_call(BackendCall(CALL_PSUTIL, 'get_running_processes', 0.001))
+
+  parts = metrics.summary().split(' ')
+  assert parts[:2] == ['active_clients=2', 'broken=nan']
+  assert parts[2].startswith('status:n=1,p50=')
+  assert parts[3].startswith('com:n=2,p50=') and parts[4].startswith('psutil:n=1,p50=')
+
+def test_prometheus_exposition():
+  metrics = Metrics()
+  metrics.add_gauge('active_clients', lambda: 1)
+  metrics.observe_request(finished_request('status', '7000,closed'), 'status')
+  metrics.observe_call(BackendCall(CALL_COM, 'Open', 0.002))
+
+  text = metrics.prometheus()
+  assert 'canoe_proxy_requests_total{command="status",code="7000"} 1\n' in text
+  assert 'canoe_proxy_request_seconds_bucket{command="status",le="+Inf"} 1\n' in text
+  assert 'canoe_proxy_backend_call_seconds_count{kind="com",name="Open"} 1\n' in text
+  assert text.endswith('canoe_proxy_active_clients 1\n')
+  assert not any(math.isnan(float(line.rsplit(' ', 1)[1])) for line in text.splitlines() if not line.startswith('#'))
+
+def test_http_endpoint():
+  metrics = Metrics()
+  metrics.add_gauge('active_clients', lambda: 3)
+  http = MetricsHttpServer(metrics, 0)
+  http.start()
+  port = http.httpd.server_address[1]
+
+  try:
+    with urllib.request.urlopen(f'http://127.0.0.1:{port}/metrics', timeout=5.0) as response:
+      assert response.headers['Content-Type'].startswith('text/plain')
+      assert 'canoe_proxy_active_clients 3' in response.read().decode('utf-8')
+
+    with pytest.raises(urllib.error.HTTPError) as error:
+      urllib.request.urlopen(f'http://127.0.0.1:{port}/other', timeout=5.0)
+    assert error.value.code == 404
+  finally:
+    http.stop()
+
+def test_metrics_command(run_server, connect):
+  _, port = run_server()
+  send = connect(port)
+  send('status')
+
+  response = send('metrics')
+  assert response.startswith('0000,')
+  assert 'status:n=1,' in response
+  assert send('metrics now').startswith('8101')
+
+def test_stopped_server_removes_call_observer(run_server):
+  first, _ = run_server()
+  second, _ = run_server()
+  assert _observers.count(first.metrics.observe_call) == 1
+
+  first.stop()
+  assert first.metrics.observe_call not in _observers
+
+  # Calls are counted once, by the running server only
+  with backend_call(CALL_SIM, 'probe'):
+    pass
+  assert (CALL_SIM, 'probe') not in first.metrics.calls
+  assert second.metrics.calls[(CALL_SIM, 'probe')].count == 1
@@ -0,0 +1,63 @@
+from modules.phase_timings import PhaseTimings
+from modules.request_context import PhaseSpan, PhaseTrace
+
+def make_trace(**phases: float) -> PhaseTrace:
+  return PhaseTrace(spans=[PhaseSpan(name, 0.0, seconds) for name, seconds in phases.items()])
+
+def test_starts_without_work_are_ignored():
+  timings = PhaseTimings()
+  assert not timings.add('MMA', make_trace(read_state=0.001, total=0.002))
+  assert timings.summary('MMA') == 'MMA no samples'
+
+def test_state_checks_are_kept_when_forced():
+  timings = PhaseTimings()
+  trace = make_trace(state_processes=0.001, state_app=0.002)
+  assert not timings.add('MMA', trace)
+  assert timings.add('MMA', trace, force=True)
+  assert timings.summary('MMA').startswith('MMA state_processes:n=1,')
+  assert not timings.add('MMA', make_trace(), force=True)
+
+def test_summary_per_phase():
+  timings = PhaseTimings()
+  for seconds in (0.1, 0.2, 0.3, 0.4):
+    assert timings.add('MMA', make_trace(open=seconds, start=0.05))
+
+  assert timings.summary('MMA') == (
+    'MMA open:n=4,avg=250.0ms,p50=200.0ms,p95=400.0ms,max=400.0ms'
+    ' start:n=4,avg=50.0ms,p50=50.0ms,p95=50.0ms,max=50.0ms'
+  )
+  assert timings.summary('MMB') == 'MMB no samples'
+
+def test_window_keeps_last_durations():
+  timings = PhaseTimings(window=2)
+  for seconds in (1.0, 0.1, 0.2):
+    timings.add('MMA', make_trace(open=seconds))
+
+  assert timings.summary('MMA') == 'MMA open:n=2,avg=150.0ms,p50=100.0ms,p95=200.0ms,max=200.0ms'
+
+def test_timings_command(run_server, connect):
+  _, port = run_server()
+  send = connect(port)
+
+  assert send('timings MMA') == '0000,MMA no samples'
+  assert send('start MMA').startswith('0000')
+  assert send('start MMA').startswith('0000') # Already running: not kept
+
+  response = send('timings MMA')
+  assert response.startswith('0000,MMA ')
+  phases = {part.split(':')[0]: part for part in response[len('0000,MMA '):].split(' ')}
+  assert set(phases) == {'launch', 'read_state', 'open', 'start', 'total'}
+  assert all(':n=1,' in part for part in phases.values())
+
+  assert send('timings XYZ') == '8102,Unknown cfg_id: XYZ'
+
+def test_status_traces_state_checks(run_server, connect):
+  _, port = run_server()
+  send = connect(port)
+
+  send('status fresh') # No cfg loaded: not kept
+  assert send('start MMA').startswith('0000')
+  assert send('status fresh').startswith('0000')
+
+  response = send('timings MMA')
+  assert 'state_processes:n=1,' in response and 'state_app:n=1,' in response
@@ -0,0 +1,126 @@
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+import psutil
+import pytest
+
+from modules.request_context import end_request, new_request
+from modules.util.process_util import (
+  ProcessTracker, count_running_processes, get_running_processes, request_snapshot, take_snapshot, terminate_processes
+)
+
+pytestmark = pytest.mark.skipif(sys.platform == 'win32' or shutil.which('sleep') is None, reason='needs a sleep executable')
+
+NAME = 'tgt_proc.exe'
+
+@pytest.fixture
+def target_path(tmp_path):
+  path = os.path.join(tmp_path, NAME)
+  shutil.copy(shutil.which('sleep'), path)
+  return path
+
+@pytest.fixture
+def spawn(target_path):
+  '''Start target processes, running with NAME when returned'''
+  processes = []
+
+  def _spawn() -> subprocess.Popen:
+    process = subprocess.Popen([target_path, '60'])
+    processes.append(process)
+    deadline = time.monotonic() + 5.0
+    while psutil.Process(process.pid).name() != NAME and time.monotonic() < deadline:
+      time.sleep(0.01)
+    return process
+
+  yield _spawn
+
+  for process in processes:
+    process.kill()
+    process.wait()
+
+def test_get_running_processes_scans_on_every_call(spawn):
+  assert get_running_processes(NAME) is None
+  process = spawn()
+  assert get_running_processes(NAME) == [process.pid]
+  assert count_running_processes(NAME) == 1
+
+def test_request_snapshot_is_shared_within_request(spawn):
+  request = new_request('c1', 'close', [])
+  try:
+    snapshot = request_snapshot([NAME])
+    spawn()
+    # Calls of the same request read the snapshot of the request
+    assert request_snapshot([NAME]) is snapshot
+    assert count_running_processes(NAME, snapshot=request_snapshot([NAME])) == 0
+    assert count_running_processes(NAME) == 1
+
+    # Processes launched: the next call of the request scans again
+    ProcessTracker(NAME).invalidate()
+    assert request_snapshot([NAME]).count(NAME) == 1
+  finally:
+    end_request(request, None)
+
+  # Outside a request: never shared
+  assert request_snapshot([NAME]) is not request_snapshot([NAME])
+
+def test_snapshot_indexes_requested_names_only(spawn):
+  process = spawn()
+  snapshot = take_snapshot([NAME.upper()])
+  assert snapshot.pids(NAME) == [process.pid]
+  assert snapshot.count('other.exe') == 0
+  assert not snapshot.covers(frozenset(['other.exe']))
+
+def test_tracker_checks_pids_and_detects_restart(spawn):
+  process = spawn()
+  tracker = ProcessTracker(NAME, verify_interval=60.0)
+  assert tracker.pids() == [process.pid]
+  assert tracker.pids() == [process.pid]
+  assert (tracker.scans, tracker.checks) == (1, 1)
+
+  process.kill()
+  process.wait()
+  restarted = spawn()
+  assert tracker.pids() == [restarted.pid]
+  assert tracker.scans == 2
+
+def test_tracker_invalidate_finds_new_instance(spawn):
+  process = spawn()
+  tracker = ProcessTracker(NAME, verify_interval=60.0)
+  assert tracker.pids() == [process.pid]
+  other = spawn()
+  assert tracker.pids() == [process.pid]
+  tracker.invalidate()
+  assert sorted(tracker.pids()) == sorted([process.pid, other.pid])
+
+def test_tracker_without_pids_scans_again(spawn):
+  tracker = ProcessTracker(NAME, verify_interval=60.0)
+  assert tracker.pids() == []
+  process = spawn() # Launched without invalidate(): nothing tracked means unknown
+  assert tracker.pids() == [process.pid]
+  assert (tracker.scans, tracker.checks) == (2, 0)
+
+def test_tracker_ignores_zombies(spawn):
+  process = spawn()
+  tracker = ProcessTracker(NAME, verify_interval=60.0)
+  assert tracker.pids() == [process.pid]
+
+  process.kill() # Not waited: zombie until reaped
+  deadline = time.monotonic() + 5.0
+  while psutil.Process(process.pid).status() != psutil.STATUS_ZOMBIE and time.monotonic() < deadline:
+    time.sleep(0.01)
+
+  assert tracker.pids() == []
+  tracker.invalidate()
+  assert tracker.pids() == []
+
+def test_terminate_processes_ends_every_instance(spawn):
+  spawn()
+  spawn()
+  report = terminate_processes(NAME, timeout=3.0)
+  assert report.ok
+  assert report.found == 2
+  assert report.terminated + report.killed == 2
+  assert get_running_processes(NAME) is None
@@ -0,0 +1,83 @@
+import json
+import threading
+
+from modules.request_context import CALL_SIM, backend_call, current_request, end_request, new_request, phase, trace_phases
+from modules.util.jsonl_writer import JsonlWriter
+
+def test_backend_calls_are_attached_to_current_request():
+  request = new_request('c1', 'start', ['MMA'])
+  with backend_call(CALL_SIM, 'start_measurement'):
+    pass
+  end_request(request, '0000,MMA running')
+
+  assert [(call.kind, call.name) for call in request.calls] == [(CALL_SIM, 'start_measurement')]
+  assert request.code == '0000'
+  assert request.finished is not None
+  assert current_request.get() is None
+
+def test_requests_are_per_thread():
+  request = new_request('c1', 'status', [])
+  seen = []
+
+  def other():
+    seen.append(current_request.get())
+    with backend_call(CALL_SIM, 'read_state'): # No request: nothing attached
+      pass
+
+  thread = threading.Thread(target=other)
+  thread.start()
+  thread.join()
+  end_request(request, None)
+
+  assert seen == [None]
+  assert request.calls == []
+  assert request.code is None
+
+def test_raw_responses_have_no_code():
+  request = new_request('c1', 'Read_info', ['DMFL_MMA'])
+  end_request(request, 'SW01,HW02,SN1')
+  assert request.code is None
+
+def test_phases_are_kept_only_inside_a_trace():
+  with phase('open'): # No trace: ignored
+    pass
+
+  with trace_phases() as trace:
+    with phase('open'):
+      pass
+    with phase('start'):
+      pass
+
+  assert [span.name for span in trace.spans] == ['open', 'start']
+  assert trace.spans[1].offset >= trace.spans[0].offset
+
+def test_jsonl_writer_writes_batches(tmp_path):
+  path = tmp_path / 'requests.jsonl'
+  writer = JsonlWriter(str(path), batch_size=2, flush_interval=10.0)
+  for index in range(3):
+    writer.write({'id': index, 'text': 'ñ'})
+  writer.close()
+
+  lines = path.read_text(encoding='utf-8').splitlines()
+  assert [json.loads(line) for line in lines] == [{'id': index, 'text': 'ñ'} for index in range(3)]
+  assert writer.written == 3
+
+def test_jsonl_writer_rotates_by_size(tmp_path):
+  path = tmp_path / 'requests.jsonl'
+  writer = JsonlWriter(str(path), max_size=30, max_files=2, batch_size=1)
+  for index in range(4):
+    writer.write({'id': index, 'pad': 'x' * 10}) # One record per file
+  writer.close()
+
+  assert json.loads(path.read_text())['id'] == 3
+  assert json.loads((tmp_path / 'requests.jsonl.1').read_text())['id'] == 2
+  assert json.loads((tmp_path / 'requests.jsonl.2').read_text())['id'] == 1
+  assert not (tmp_path / 'requests.jsonl.3').exists()
+
+def test_jsonl_writer_drops_when_queue_full(tmp_path):
+  writer = JsonlWriter(str(tmp_path / 'requests.jsonl'), queue_size=1)
+  writer.close() # Nobody reads the queue anymore
+  writer.write({'id': 1})
+  writer.write({'id': 2})
+
+  assert writer.dropped == 1
@@ -0,0 +1,78 @@
+import threading
+import time
+
+from modules.response_cache import ResponseCache
+
+def test_hit_within_ttl():
+  cache = ResponseCache(ttl=60.0)
+  assert cache.get_or_load(('MMA', 'A'), lambda: 1) == 1
+  assert cache.get_or_load(('MMA', 'A'), lambda: 2) == 1
+  assert (cache.hits, cache.misses) == (1, 1)
+
+def test_expired_entry_is_loaded_again():
+  cache = ResponseCache(ttl=0.01)
+  cache.get_or_load('key', lambda: 1)
+  time.sleep(0.02)
+  assert cache.get_or_load('key', lambda: 2) == 2
+
+def test_disabled_cache_always_loads():
+  cache = ResponseCache(ttl=0)
+  cache.get_or_load('key', lambda: 1)
+  assert cache.get_or_load('key', lambda: 2) == 2
+  assert not cache.entries
+
+def test_keep_filters_values():
+  cache = ResponseCache(ttl=60.0)
+  cache.get_or_load('key', lambda: 'nok', keep=lambda value: value == 'ok')
+  assert cache.get_or_load('key', lambda: 'ok', keep=lambda value: value == 'ok') == 'ok'
+  assert cache.get_or_load('key', lambda: 'other') == 'ok'
+
+def test_refresh_loads_and_replaces_entry():
+  cache = ResponseCache(ttl=60.0)
+  cache.get_or_load('key', lambda: 1)
+  assert cache.get_or_load('key', lambda: 2, refresh=True) == 2
+  assert cache.get_or_load('key', lambda: 3) == 2
+
+def test_concurrent_requests_share_one_load():
+  cache = ResponseCache(ttl=60.0)
+  started, release = threading.Event(), threading.Event()
+  calls = []
+
+  def load():
+    calls.append(1)
+    started.set()
+    release.wait(2.0)
+    return 'value'
+
+  results = []
+  owner = threading.Thread(target=lambda: results.append(cache.get_or_load('key', load)))
+  owner.start()
+  started.wait(2.0)
+  joiner = threading.Thread(target=lambda: results.append(cache.get_or_load('key', load, refresh=True)))
+  joiner.start()
+  time.sleep(0.05)
+  release.set()
+  owner.join()
+  joiner.join()
+
+  assert results == ['value', 'value']
+  assert len(calls) == 1
+  assert cache.joined == 1
+
+def test_invalidate_during_load_is_not_cached():
+  cache = ResponseCache(ttl=60.0)
+
+  def load():
+    cache.invalidate('key')
+    return 1
+
+  assert cache.get_or_load('key', load) == 1
+  assert 'key' not in cache.entries
+
+def test_flush_by_cfg():
+  cache = ResponseCache(ttl=60.0)
+  cache.get_or_load(('MMA', 'A'), lambda: 1)
+  cache.get_or_load(('223', 'B'), lambda: 2)
+  assert cache.flush('MMA') == 1
+  assert list(cache.entries) == [('223', 'B')]
+  assert cache.flush() == 1
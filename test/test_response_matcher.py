@@ -0,0 +1,44 @@
+from modules.models.canoe_command_model import CanOeCommandModel
+from modules.response_matcher import RESPONSE_NOK, RESPONSE_OK, ResponseMatcher, compile_pattern, get_matcher
+
+READ_INFO = CanOeCommandModel.from_dic({
+  'id': 'Read_info', 'parameter': ['dcu_type'], 'responseOk': '{sw},{hw},{sn}',
+  'responseNok': ['ZenzefiError', 'Set_target ERROR'],
+})
+WINDOW_CONTROL = CanOeCommandModel.from_dic({
+  'id': 'Window_control', 'parameter': ['action'], 'responseOk': 'Action_type {action} {dcu_type} OK',
+  'responseNok': ['Set_target ERROR'],
+})
+
+def test_compile_pattern_escapes_literal_text():
+  pattern = compile_pattern('a.b {x} (c)', {'x': 'v+1'})
+  assert pattern.search('a.b v+1 (c)')
+  assert not pattern.search('axb v+1 (c)')
+  assert not pattern.search('a.b vv1 (c)')
+
+def test_unbound_placeholder_matches_one_word():
+  matcher = ResponseMatcher(READ_INFO, ('DMFL_MMA',))
+  assert matcher.match('SW01,HW02,SN03') == RESPONSE_OK
+  assert matcher.match('SW01,HW02') is None
+  assert matcher.match('Set_target ZenzefiError') == RESPONSE_NOK
+
+def test_parameter_binds_sent_argument():
+  matcher = ResponseMatcher(WINDOW_CONTROL, ('UP',))
+  assert matcher.match('Action_type UP DMFL_MMA OK') == RESPONSE_OK
+  assert matcher.match('Action_type DOWN DMFL_MMA OK') is None
+  assert matcher.match('Set_target ERROR Target not conected') == RESPONSE_NOK
+
+def test_bound_target_classes_other_door_as_nok():
+  matcher = ResponseMatcher(WINDOW_CONTROL, ('UP',), (('dcu_type', 'DMFL_MMA'),))
+  assert matcher.match('Action_type UP DMFL_MMA OK') == RESPONSE_OK
+  assert matcher.match('Action_type UP DMRR_MMA OK') == RESPONSE_NOK
+  assert matcher.match('Action_type UP') is None
+
+def test_parameter_wins_over_bound_value():
+  matcher = ResponseMatcher(READ_INFO, ('DMFL_MMA',), (('dcu_type', 'DMRR_MMA'),))
+  assert matcher.other is None
+  assert matcher.match('SW01,HW02,SN03') == RESPONSE_OK
+
+def test_get_matcher_is_cached_per_binding():
+  assert get_matcher(WINDOW_CONTROL, ('UP',)) is get_matcher(WINDOW_CONTROL, ('UP',))
+  assert get_matcher(WINDOW_CONTROL, ('UP',), (('dcu_type', 'A'),)) is not get_matcher(WINDOW_CONTROL, ('UP',))
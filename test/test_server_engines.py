@@ -0,0 +1,101 @@
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+ENGINES = ['threaded', 'asyncio']
+
+# Simulated CANoe: only the launch takes time (1 s)
+SLOW_LAUNCH = {'simulator': {'timeScale': 1.0, 'seed': 1, 'launch': 1.0, 'open': 0, 'start': 0, 'stop': 0, 'close': 0, 'state': 0}}
+
+def ask(port: int, command: str) -> tuple[str, float]:
+  '''Send one command on a new connection, returns (response, seconds)'''
+  with socket.create_connection(('127.0.0.1', port), timeout=10.0) as connection:
+    started = time.monotonic()
+    connection.sendall((command + '\n').encode('utf-8'))
+    line = connection.makefile('rb').readline().decode('utf-8').strip()
+    return line, time.monotonic() - started
+
+@pytest.mark.parametrize('mode', ENGINES)
+def test_same_responses_in_both_engines(mode, run_server, connect):
+  _, port = run_server(mode)
+  send = connect(port)
+
+  assert send('help').startswith('0000,Available commands: status, start {cfg_id}, close [soft|hard], help')
+  assert send('foo') == '8FFF,Unknown command'
+  assert send('start') == '8100,Missing parameters'
+  assert send('status') == '7000,CANoe64.exe closed'
+
+@pytest.mark.parametrize('mode', ENGINES)
+def test_pipelined_commands_answered_in_order(mode, run_server):
+  _, port = run_server(mode)
+
+  with socket.create_connection(('127.0.0.1', port), timeout=5.0) as connection:
+    connection.sendall(b'help\nfoo\nstatus fresh now\nstatus\n')
+    lines = connection.makefile('rb')
+    responses = [lines.readline().decode('utf-8').strip() for _ in range(4)]
+
+  assert responses[0].startswith('0000,Available commands: ')
+  assert responses[1:] == ['8FFF,Unknown command', '8101,Too many parameters', '7000,CANoe64.exe closed']
+
+@pytest.mark.parametrize('mode', ENGINES)
+def test_many_clients(mode, run_server):
+  server, port = run_server(mode)
+
+  def client(_):
+    with socket.create_connection(('127.0.0.1', port), timeout=10.0) as connection:
+      lines = connection.makefile('rb')
+      responses = []
+      for _ in range(5):
+        connection.sendall(b'status\n')
+        responses.append(lines.readline())
+      return responses
+
+  with ThreadPoolExecutor(max_workers=50) as pool:
+    results = list(pool.map(client, range(50)))
+  assert all(responses == [b'7000,CANoe64.exe closed\n'] * 5 for responses in results)
+
+  # Disconnected clients are removed
+  deadline = time.monotonic() + 5.0
+  while server.clients and time.monotonic() < deadline:
+    time.sleep(0.01)
+  assert server.clients == {}
+
+@pytest.mark.parametrize('mode', ENGINES)
+def test_waiting_starts_do_not_starve_other_commands(mode, run_server):
+  _, port = run_server(mode, service={'workers': 1}, canoe=SLOW_LAUNCH)
+
+  # Four PLCs start the same cfg while CANoe is launched
+  with ThreadPoolExecutor(max_workers=4) as pool:
+    starts = [pool.submit(ask, port, 'start MMA') for _ in range(4)]
+    time.sleep(0.2)
+
+    status, seconds = ask(port, 'status')
+    assert status == '7000,CANoe64.exe closed'
+    assert seconds < 0.5
+
+    # Blocking command (live read): worker not held by the starts
+    status, seconds = ask(port, 'status fresh')
+    assert status.startswith(('7000', '7001'))
+    assert seconds < 0.5
+
+    responses = [start.result()[0] for start in starts]
+  assert all(response.startswith('0000,MMA') for response in responses)
+
+def test_blocking_and_serialized_commands_use_executors(run_server):
+  server, _ = run_server('asyncio')
+
+  assert server.select_executor('help') is None
+  assert server.select_executor('foo') is None
+  assert server.select_executor('') is None
+  assert server.select_executor('status fresh') is server.executor
+  assert server.select_executor('start MMA') is server.serial_executor
+  assert server.select_executor('close') is server.serial_executor
+
+  # Snapshot status: on the loop only while the snapshot is current
+  server.monitor.stop()
+  server.monitor.refresh()
+  assert server.select_executor('status') is None
+  server.monitor.invalidate()
+  assert server.select_executor('status') is server.executor
@@ -0,0 +1,50 @@
+import socket
+import time
+
+import pytest
+
+def receive(client: socket.socket, done, timeout: float = 2.0) -> bytes:
+  '''Read until done(data) or timeout'''
+  client.settimeout(timeout)
+  data = b''
+  deadline = time.monotonic() + timeout
+  while not done(data) and time.monotonic() < deadline:
+    chunk = client.recv(4096)
+    if not chunk:
+      break
+    data += chunk
+  return data
+
+UNKNOWN = b'8FFF,Unknown command'
+
+@pytest.fixture(params=['threaded', 'asyncio'])
+def client(request, run_server):
+  server, port = run_server(request.param, service={'frameTimeout': 0.5})
+  connection = socket.create_connection(('127.0.0.1', port))
+  yield connection
+  connection.close()
+
+def test_packet_without_terminator_answered_at_once(client):
+  # frameTimeout (0.5 s) is not waited until the connection sends a terminator
+  started = time.monotonic()
+  client.sendall(b'foo')
+  assert receive(client, lambda data: data == UNKNOWN) == UNKNOWN
+  assert time.monotonic() - started < 0.4
+
+  client.sendall(b'foo bar')
+  assert receive(client, lambda data: data == UNKNOWN) == UNKNOWN
+
+def test_line_framing_after_first_terminator(client):
+  client.sendall(b'foo\r\nbar\nba')
+  expected = UNKNOWN + b'\r\n' + UNKNOWN + b'\n'
+  assert receive(client, lambda data: len(data) >= len(expected)) == expected
+
+  # Partial command completed by the next packet
+  client.sendall(b'z\x00')
+  assert receive(client, lambda data: data.endswith(b'\x00')) == UNKNOWN + b'\x00'
+
+  # Framed connection: a command without terminator waits frameTimeout
+  started = time.monotonic()
+  client.sendall(b'foo')
+  assert receive(client, lambda data: data == UNKNOWN) == UNKNOWN
+  assert time.monotonic() - started >= 0.4
@@ -0,0 +1,123 @@
+import random
+
+import pytest
+
+from modules.backends.sim_backend import SimCanoeBackend
+from modules.models.canoe_model import CanOeModel
+from modules.models.simulator_model import LatencyModel, SimulatorModel
+from modules.request_context import trace_phases
+
+def canoe_model(simulator: dict | None = None, start_timeout: float = 30.0) -> CanOeModel:
+  return CanOeModel.from_dic({
+    'path': 'CANoe64.exe', 'exe': 'CANoe64.exe', 'backend': 'sim',
+    'simulator': {'timeScale': 0.0, 'seed': 1, **(simulator or {})},
+    'cfgs': [
+      {'id': 'MMA', 'path': r'C:\cfg\MMA.cfg', 'host': '127.0.0.1', 'port': 4242, 'startTimeout': start_timeout},
+      {'id': 'MMB', 'path': r'C:\cfg\MMB.cfg', 'host': '127.0.0.1', 'port': 4243, 'startTimeout': start_timeout},
+    ],
+  })
+
+@pytest.fixture
+def canoe():
+  return canoe_model()
+
+@pytest.fixture
+def backend(canoe):
+  return SimCanoeBackend(canoe)
+
+def test_latency_model_clamps_and_replays_samples():
+  rng = random.Random(1)
+  assert LatencyModel.from_dic(2).sample(rng) == 2.0
+  assert LatencyModel.from_dic({'mean': 5.0, 'max': 1.0}).sample(rng) == 1.0
+  assert LatencyModel.from_dic({'mean': -1.0, 'min': 0.5}).sample(rng) == 0.5
+  assert LatencyModel.from_dic({'samples': [0.25]}).sample(rng) == 0.25
+
+def test_simulator_defaults():
+  sim = SimulatorModel.from_dic(None)
+  assert sim.timeScale == 1.0
+  assert sim.launch.mean == 4.0
+  assert sim.openFailureRate == 0.0
+
+def test_start_launches_opens_and_starts(backend, canoe):
+  mma = canoe.get_cfg_by_id('MMA')
+
+  with trace_phases() as trace:
+    response = backend.start_measurement(mma)
+  assert response == r'0000,MMA C:\cfg\MMA.cfg measurement running'
+  assert [span.name for span in trace.spans] == ['launch', 'read_state', 'open', 'start']
+
+  state = backend.read_state()
+  assert state.process_count == 1
+  assert state.cfg_id == 'MMA'
+  assert state.measurement_running
+
+def test_start_of_running_cfg_does_nothing(backend, canoe):
+  mma = canoe.get_cfg_by_id('MMA')
+  backend.start_measurement(mma)
+  steps = []
+
+  with trace_phases() as trace:
+    assert backend.start_measurement(mma, progress=steps.append).startswith('0000,MMA')
+  assert [span.name for span in trace.spans] == ['read_state']
+  assert steps == []
+
+def test_switch_stops_other_cfg(backend, canoe):
+  backend.start_measurement(canoe.get_cfg_by_id('MMA'))
+  steps = []
+
+  assert backend.start_measurement(canoe.get_cfg_by_id('MMB'), progress=steps.append).startswith('0000,MMB')
+  assert steps == ['stopping', 'loading', 'starting']
+  assert backend.read_state().cfg_id == 'MMB'
+
+def test_load_only(backend, canoe):
+  assert backend.start_measurement(canoe.get_cfg_by_id('MMA'), start=False) == r'0000,MMA C:\cfg\MMA.cfg loaded'
+  state = backend.read_state()
+  assert state.cfg_id == 'MMA'
+  assert not state.measurement_running
+
+def test_injected_failures(backend, canoe):
+  mma = canoe.get_cfg_by_id('MMA')
+
+  backend.inject_failure('open')
+  assert backend.start_measurement(mma).startswith('8111,MMA')
+
+  backend.inject_failure('start')
+  assert backend.start_measurement(mma).startswith('8110,MMA')
+  assert backend.start_measurement(mma).startswith('0000,MMA')
+
+  backend.inject_failure('close')
+  assert not backend.close()
+  assert backend.close()
+  assert backend.read_state().process_count == 0
+
+def test_start_timeout_shares_budget():
+  canoe = canoe_model({'timeScale': 1.0, 'launch': 0, 'open': 0.2, 'start': 0.2}, start_timeout=0.3)
+  backend = SimCanoeBackend(canoe)
+  assert backend.start_measurement(canoe.get_cfg_by_id('MMA')).startswith('8110,MMA')
+
+def test_many_instances_hide_state(backend, canoe):
+  backend.start_measurement(canoe.get_cfg_by_id('MMA'))
+  backend.spawn_instance()
+
+  state = backend.read_state()
+  assert state.process_count == 2
+  assert state.pid is None and state.cfg_id is None
+  assert not state.measurement_running
+  assert not backend.stop_measurement()
+
+def test_stop_and_unload(backend, canoe):
+  backend.start_measurement(canoe.get_cfg_by_id('MMA'))
+
+  assert backend.stop_measurement()
+  state = backend.read_state()
+  assert state.cfg_id == 'MMA' and not state.measurement_running
+
+  assert backend.stop_measurement(unload=True)
+  state = backend.read_state()
+  assert state.process_count == 1 and state.cfg_id is None
+
+def test_crash_clears_state(backend, canoe):
+  backend.start_measurement(canoe.get_cfg_by_id('MMA'))
+  backend.crash()
+  assert backend.read_state().process_count == 0
+  assert backend.stop_measurement() # Nothing to stop
@@ -0,0 +1,42 @@
+def test_soft_close_keeps_canoe_and_cfg(run_server, connect):
+  server, port = run_server()
+  send = connect(port)
+  assert send('start MMA').startswith('0000')
+
+  assert send('close soft') == '0000,CANoe64.exe measurement stopped'
+  state = server.backend.read_state()
+  assert state.process_count == 1
+  assert state.cfg_id == 'MMA' and not state.measurement_running
+
+  # Restart of the loaded cfg: no launch, no open
+  assert send('start MMA').startswith('0000')
+  assert server.backend.read_state().measurement_running
+
+def test_close_mode_from_config(run_server, connect):
+  server, port = run_server(canoe={'closeMode': 'soft', 'softCloseUnload': True})
+  send = connect(port)
+  send('start MMA')
+
+  assert send('close') == '0000,CANoe64.exe measurement stopped'
+  state = server.backend.read_state()
+  assert state.process_count == 1 and state.cfg_id is None
+
+  assert send('close hard') == '0000,CANoe64.exe closed!'
+  assert server.backend.read_state().process_count == 0
+
+def test_failed_soft_close_kills_canoe(run_server, connect):
+  server, port = run_server()
+  send = connect(port)
+  send('start MMA')
+
+  server.backend.inject_failure('stop')
+  assert send('close soft') == '0000,CANoe64.exe closed!'
+  assert server.backend.read_state().process_count == 0
+
+def test_unknown_close_mode(run_server, connect):
+  server, port = run_server()
+  send = connect(port)
+  send('start MMA')
+
+  assert send('close gently') == '8201,Unknown close mode: gently'
+  assert server.backend.read_state().measurement_running
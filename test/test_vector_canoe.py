@@ -0,0 +1,109 @@
+import pytest
+
+from modules.canoe_session import CanoeSession, ComEvents
+from modules.request_context import trace_phases
+from modules.vector_canoe import read_measurement_state, start_measurement, stop_measurement
+
+CFG = '/cfg/MMA.cfg'
+
+class FakeEvents(ComEvents):
+  """Event adapter of a fake application: sinks are plain instances fired by the fake
+  """
+
+  def __init__(self):
+    self.sinks: dict[object, list] = {}
+
+  def attach(self, source, sink_class):
+    sink = sink_class()
+    self.sinks.setdefault(source, []).append(sink)
+    return sink
+
+  def detach(self, sink):
+    for sinks in self.sinks.values():
+      if sink in sinks:
+        sinks.remove(sink)
+
+  def fire(self, source, event: str, *args):
+    for sink in list(self.sinks.get(source, [])):
+      getattr(sink, event)(*args)
+
+class FakeConfiguration:
+  def __init__(self):
+    self.FullName = ''
+    self.Name = ''
+
+class FakeMeasurement:
+  def __init__(self, app):
+    self.app = app
+    self.Running = False
+
+  def Start(self):
+    # State is updated late, the event arrives first
+    self.app.events.fire(self, 'OnStart')
+
+  def Stop(self):
+    self.Running = False
+    self.app.events.fire(self, 'OnStop')
+
+class FakeApplication:
+  """CANoe.Application stand-in: Open and Start only report completion with events
+  """
+
+  def __init__(self, events: FakeEvents):
+    self.events = events
+    self.Configuration = FakeConfiguration()
+    self.Measurement = FakeMeasurement(self)
+    self.Visible = False
+    self.opened: list[str] = []
+
+  def Open(self, path: str):
+    self.opened.append(path)
+    self.events.fire(self, 'OnOpen', path)
+
+  def New(self, save: bool):
+    self.Configuration.FullName = ''
+
+@pytest.fixture
+def events():
+  return FakeEvents()
+
+@pytest.fixture
+def app(events):
+  return FakeApplication(events)
+
+@pytest.fixture
+def session(app, events):
+  session = CanoeSession(app_factory=lambda: app, disconnect_errors=(), events=events)
+  yield session
+  session.stop()
+
+def test_load_completes_with_configuration_event(session, app, events):
+  # FullName not updated yet: only OnOpen ends the wait
+  response = start_measurement('MMA', CFG, 'CANoe64.exe', session=session, timeout=1.0, start=False)
+  assert response == f'0000,MMA {CFG} loaded'
+  assert app.opened == [CFG]
+  assert all(not sinks for sinks in events.sinks.values())
+
+def test_start_completes_with_measurement_event(session, app):
+  with trace_phases() as trace:
+    response = start_measurement('MMA', CFG, 'CANoe64.exe', session=session, timeout=1.0)
+  assert response == f'0000,MMA {CFG} measurement running'
+  phases = {span.name: span.seconds for span in trace.spans}
+  assert phases['open_wait'] < 0.5 and phases['start_wait'] < 0.5
+
+def test_no_event_times_out(session, app, events):
+  events.fire = lambda source, event, *args: None # Events lost: polling only
+  response = start_measurement('MMA', CFG, 'CANoe64.exe', session=session, timeout=0.2)
+  assert response == f'8111,MMA Some error when opening file {CFG}'
+
+def test_stop_and_unload(session, app):
+  app.Configuration.FullName = CFG
+  app.Measurement.Running = True
+  assert stop_measurement('CANoe64.exe', session=session, unload=True, timeout=1.0)
+  assert not app.Measurement.Running and app.Configuration.FullName == ''
+
+def test_state_check_is_traced(session, app):
+  app.Configuration.FullName = app.Configuration.Name = CFG
+  with trace_phases() as trace:
+    assert read_measurement_state('CANoe64.exe', session) == (CFG, False)
+  assert [span.name for span in trace.spans] == ['state_app']
@@ -0,0 +1,48 @@
+import time
+
+from modules.models.warmup_model import WarmupModel
+
+def wait_job(server, job_id: str = '1', timeout: float = 5.0):
+  deadline = time.monotonic() + timeout
+  while time.monotonic() < deadline:
+    job = server.jobs.get(job_id)
+    if job is not None and job.done:
+      return job
+    time.sleep(0.01)
+  raise TimeoutError(f'job {job_id} not finished')
+
+def test_warmup_disabled_by_default():
+  assert WarmupModel.from_dic(None) == WarmupModel(enabled=False, cfgId='', startMeasurement=True)
+
+def test_warmup_loads_default_cfg(run_server, connect):
+  server, port = run_server(warmup={'enabled': True, 'cfgId': 'MMA', 'startMeasurement': False})
+
+  job = wait_job(server)
+  assert job.command == 'warmup MMA'
+  assert job.response == r'0000,MMA C:\cfg\MMA.cfg loaded'
+
+  state = server.backend.read_state()
+  assert state.cfg_id == 'MMA' and not state.measurement_running
+
+  send = connect(port)
+  assert send('job 1').startswith('0000,1 loaded ')
+  assert send('start MMA').startswith('0000')
+
+  # Warmup launched and opened, the start only started the measurement
+  timings = send('timings MMA')
+  assert 'launch:n=1,' in timings and 'open:n=1,' in timings and 'start:n=1,' in timings
+
+def test_start_joins_warmup_in_flight(run_server, connect):
+  server, port = run_server(warmup={'enabled': True, 'cfgId': 'MMA', 'startMeasurement': True},
+                            canoe={'simulator': {'timeScale': 0.05, 'seed': 1}})
+  send = connect(port)
+
+  assert send('start MMA').startswith('0000,MMA')
+  assert wait_job(server).code == '0000'
+  assert server.coordinator.joined == 1
+  assert server.coordinator.executed == 1
+
+def test_warmup_of_unknown_cfg_is_not_submitted(run_server):
+  server, _ = run_server(warmup={'enabled': True, 'cfgId': 'XYZ'})
+  assert server.jobs.get('1') is None
+  assert server.backend.read_state().process_count == 0
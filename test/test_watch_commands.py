@@ -0,0 +1,54 @@
+import socket
+
+import pytest
+
+@pytest.fixture(params=['threaded', 'asyncio'])
+def port(request, run_server):
+  server, port = run_server(request.param)
+  return port
+
+def connect(port: int):
+  connection = socket.create_connection(('127.0.0.1', port), timeout=5.0)
+  return connection, connection.makefile('rb')
+
+def test_watch_response_before_pushed_lines(port):
+  watcher, lines = connect(port)
+  watcher.sendall(b'watch\n')
+  assert lines.readline() == b'7000,CANoe64.exe closed\n'
+
+  client, replies = connect(port)
+  client.sendall(b'start MMA\n')
+  assert replies.readline().startswith(b'0000')
+
+  # State changes pushed with the terminator of the watch command until the measurement runs
+  while (line := lines.readline()) and not line.startswith(b'0000'):
+    assert line.endswith(b'\n') and not line.endswith(b'\r\n')
+  assert line.startswith(b'0000,MMA')
+
+  watcher.sendall(b'unwatch\n')
+  assert lines.readline() == b'0000,Watch stopped\n'
+  client.close()
+  watcher.close()
+
+def test_invalid_heartbeat(port):
+  watcher, lines = connect(port)
+  for value in (b'-1', b'0', b'nan', b'inf', b'x'):
+    watcher.sendall(b'watch ' + value + b'\n')
+    assert lines.readline() == b'8201,Invalid heartbeat: ' + value + b'\n'
+  watcher.close()
+
+def test_packet_mode_pushes_without_terminator(port):
+  watcher = socket.create_connection(('127.0.0.1', port), timeout=5.0)
+  watcher.sendall(b'watch') # PLC without terminator: every packet is one command
+  assert watcher.recv(4096) == b'7000,CANoe64.exe closed'
+
+  client, replies = connect(port)
+  client.sendall(b'start MMA\n')
+  assert replies.readline().startswith(b'0000')
+
+  data = b''
+  while b'0000,MMA' not in data:
+    data += watcher.recv(4096)
+  assert b'\r' not in data and b'\n' not in data
+  client.close()
+  watcher.close()
@@ -0,0 +1,93 @@
+import threading
+import time
+
+from modules.models.canoe_state_model import CanoeState
+from modules.watch_hub import WatchHub
+
+def state(count: int) -> CanoeState:
+  return CanoeState(count, None, None, None, False, time.time())
+
+def wait_for(condition, timeout: float = 2.0) -> bool:
+  deadline = time.monotonic() + timeout
+  while not condition() and time.monotonic() < deadline:
+    time.sleep(0.01)
+  return condition()
+
+def test_lines_are_pushed_after_activate():
+  hub = WatchHub('CANoe64.exe', tick=0.01)
+  lines = []
+  hub.subscribe('a', lines.append)
+  hub.publish(state(0))
+  time.sleep(0.05)
+  assert lines == []
+
+  hub.activate('a')
+  assert wait_for(lambda: lines == ['7000,CANoe64.exe closed\r\n'])
+  hub.stop()
+
+def test_states_published_before_subscribe_are_not_pushed():
+  hub = WatchHub('CANoe64.exe', tick=0.01)
+  lines = []
+  hub.publish(state(0)) # Sent as the watch response
+  hub.subscribe('a', lines.append)
+  hub.activate('a')
+  hub.publish(state(1))
+  assert wait_for(lambda: lines == ['7001,No cfg file loaded\r\n'])
+  hub.stop()
+
+def test_stalled_subscriber_does_not_block_others():
+  hub = WatchHub('CANoe64.exe', tick=0.01, max_pending=4)
+  sending, release = threading.Event(), threading.Event()
+  fast = []
+
+  def stalled_send(line: str):
+    sending.set()
+    release.wait(5.0)
+
+  hub.subscribe('stalled', stalled_send)
+  hub.subscribe('fast', fast.append)
+  hub.activate('stalled')
+  hub.activate('fast')
+
+  hub.publish(state(0))
+  assert sending.wait(2.0)
+  for count in range(8):
+    hub.publish(state(count % 2))
+    time.sleep(0.01)
+  assert wait_for(lambda: len(fast) == 9)
+
+  # Bounded queue: the stalled client keeps the newest lines only
+  stalled = hub.subscribers['stalled']
+  assert wait_for(lambda: stalled.dropped == 4)
+  assert len(stalled.pending) == 4
+  release.set()
+  hub.stop()
+
+def test_failed_send_unsubscribes():
+  hub = WatchHub('CANoe64.exe', tick=0.01)
+
+  def broken(line: str):
+    raise ConnectionResetError('closed')
+
+  hub.subscribe('a', broken)
+  hub.activate('a')
+  hub.publish(state(0))
+  assert wait_for(lambda: 'a' not in hub.subscribers)
+  hub.stop()
+
+def test_heartbeat_repeats_last_state():
+  hub = WatchHub('CANoe64.exe', tick=0.01)
+  lines = []
+  hub.publish(state(0))
+  hub.subscribe('a', lines.append, heartbeat=0.05)
+  hub.activate('a')
+  assert wait_for(lambda: len(lines) >= 2)
+  assert set(lines) == {'7000,CANoe64.exe closed\r\n'}
+  hub.stop()
+
+def test_unsubscribe():
+  hub = WatchHub('CANoe64.exe')
+  assert not hub.unsubscribe('a')
+  hub.subscribe('a', print)
+  assert hub.unsubscribe('a')
+  hub.stop()